@@ -0,0 +1,65 @@
+"""
+Measures the throughput of `RecordQuery` in records per second, against filtering `IBT.get_all()` lists.
+
+Run from the repository root:
+
+    python -m benchmarks.query_throughput --records 200000 --repeat 5
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from py_iracing.ibt import IBT
+from py_iracing.query import RecordQuery
+from tests.fakes import write_image
+
+VARIABLES = ([('SessionTime', 'd', 1), ('Lap', 'i', 1), ('Speed', 'f', 1), ('Brake', 'f', 1)]
+             + [(f'Scalar{i}', 'f', 1) for i in range(100)] + [(f'CarIdxArray{i}', 'f', 64) for i in range(10)])
+RECORDS_PER_LAP = 6000
+
+
+def run(records: int, repeat: int, chunk_size: int) -> None:
+    directory = tempfile.mkdtemp()
+    rows = [{'SessionTime': i / 60.0, 'Lap': i // RECORDS_PER_LAP, 'Speed': float(i % 80),
+             'Brake': (i % 100) / 100.0} for i in range(records)]
+    path = write_image(os.path.join(directory, 'bench.ibt'), VARIABLES, rows, ibt=True)
+    del rows
+    ibt = IBT()
+    ibt.open(path)
+    lap = records // RECORDS_PER_LAP // 2
+
+    def report(name: str, elapsed: float, scanned: int, matched: int) -> None:
+        print(f'{name:<44}{elapsed / repeat * 1e3:10.2f} ms{records * repeat / elapsed / 1e6:10.1f} M records/s'
+              f'{scanned:10d} scanned{matched:8d} matched')
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        brake, speed = ibt.get_all('Brake'), ibt.get_all('Speed')
+        matched = [i for i in range(records) if brake[i] > 0.9 and speed[i] > 50]
+    report('get_all() and a list comprehension', time.perf_counter() - start, records, len(matched))
+
+    for expression in ('Brake > 0.9 and Speed > 50', f'Brake > 0.9 and Speed > 50 and Lap == {lap}',
+                       'Brake > 0.9 and SessionTime < 60.0'):
+        query = RecordQuery(expression)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = query.run(ibt, chunk_size=chunk_size)
+        report(expression, time.perf_counter() - start, result.scanned, len(result))
+
+    ibt.close()
+    os.remove(path)
+    os.rmdir(directory)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--chunk-size', type=int, default=65536)
+    args = parser.parse_args()
+    run(args.records, args.repeat, args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
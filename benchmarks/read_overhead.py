@@ -0,0 +1,69 @@
+"""
+Compares the per-read overhead of the synchronous and asynchronous telemetry readers.
+
+Run from the repository root:
+
+    python -m benchmarks.read_overhead --reads 200000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from py_iracing.client import iRacingClient
+from tests.fakes import build_image
+
+VARIABLES = [('Speed', 'f', 1), ('Gear', 'i', 1), ('RPM', 'f', 1), ('CarIdxLapDistPct', 'f', 64)]
+
+
+async def run(reads: int) -> None:
+    fd, path = tempfile.mkstemp(suffix='.bin')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(build_image(VARIABLES, [{'Speed': 50.0, 'Gear': 3, 'RPM': 7000.0}] * 3))
+    ir = iRacingClient()
+    await ir.startup(test_file=path)
+    ir.freeze_var_buffer_now()
+
+    def report(name: str, elapsed: float) -> None:
+        print(f'{name:<32}{elapsed / reads * 1e9:8.0f} ns/read')
+
+    for key in ('Speed', 'CarIdxLapDistPct'):
+        start = time.perf_counter()
+        for _ in range(reads):
+            await ir.get(key)
+        report(f'await get({key!r})', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(reads):
+            ir.read(key)
+        report(f'read({key!r})', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(reads):
+            ir[key]
+        report(f'ir[{key!r}]', time.perf_counter() - start)
+
+    keys = ['Speed', 'Gear', 'RPM']
+    start = time.perf_counter()
+    for _ in range(reads):
+        await ir.get_consistent(keys)
+    report('await get_consistent(3 keys)', time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(reads):
+        ir.read_consistent(keys)
+    report('read_consistent(3 keys)', time.perf_counter() - start)
+
+    ir.shutdown()
+    os.remove(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reads', type=int, default=200000)
+    args = parser.parse_args()
+    asyncio.run(run(args.reads))
+
+
+if __name__ == '__main__':
+    main()
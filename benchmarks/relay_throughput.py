@@ -0,0 +1,90 @@
+"""
+Measures how many ticks per second the relay server delivers to 50 clients.
+
+A fake sim writes ticks into a test file as fast as the server polls it, while the clients subscribe to a mix of
+shared and distinct channel lists. Run from the repository root:
+
+    python -m benchmarks.relay_throughput --clients 50 --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from py_iracing.client import iRacingClient
+from py_iracing.relay import RelayClient, RelayServer
+from tests.fakes import FakeSim, build_image
+
+CHANNELS = 200
+
+
+async def run(clients: int, seconds: float, keyframe_interval: int) -> None:
+    variables = [(f'Channel{i}', 'f', 1) for i in range(CHANNELS)] + [('CarIdxLapDistPct', 'f', 64)]
+    fd, path = tempfile.mkstemp(suffix='.bin')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(build_image(variables, [{}, {}, {}], tick_rate=10000))
+
+    ir = iRacingClient()
+    await ir.startup(test_file=path)
+    server = RelayServer(ir, port=0, keyframe_interval=keyframe_interval)
+    await server.start()
+
+    names = [name for name, _, _ in variables]
+    rng = random.Random(1)
+    subscriptions = [names[:20], names[:20] + ['CarIdxLapDistPct']]
+    subscriptions += [rng.sample(names, 30) for _ in range(8)]
+    relay_clients = []
+    for i in range(clients):
+        client = RelayClient()
+        await client.connect(port=server.port, channels=subscriptions[i % len(subscriptions)])
+        relay_clients.append(client)
+
+    received = [0] * clients
+
+    async def consume(index: int, client: RelayClient) -> None:
+        while await client.recv() is not None:
+            received[index] += 1
+
+    consumers = [asyncio.create_task(consume(i, client)) for i, client in enumerate(relay_clients)]
+
+    sim = FakeSim(path, variables)
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        tick = sim.tick + 1
+        # About a third of the scalar channels change every tick
+        values = {f'Channel{channel}': float(tick) for channel in range(tick % 3, CHANNELS, 3)}
+        sim.write(**values, CarIdxLapDistPct=[(tick + car) / 1000.0 for car in range(64)])
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    await server.stop()
+    for task in consumers:
+        task.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+    ir.shutdown()
+    sim.close()
+    os.remove(path)
+
+    metrics = server.metrics
+    frames = metrics['keyframes'] + metrics['deltas']
+    print(f'clients:            {clients} ({len({tuple(s) for s in subscriptions[:clients]})} distinct subscriptions)')
+    print(f'ticks relayed:      {metrics["ticks"] / elapsed:,.0f}/s')
+    print(f'frames sent:        {frames / elapsed:,.0f}/s ({metrics["keyframes"]} keyframes, {metrics["deltas"]} deltas)')
+    print(f'frames received:    {sum(received) / elapsed:,.0f}/s')
+    print(f'bytes sent:         {metrics["bytes"] / elapsed / 1e6:,.2f} MB/s, {metrics["bytes"] / max(frames, 1):,.0f} bytes/frame')
+    print(f'ticks skipped:      {metrics["skipped"]} (slow clients)')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--keyframe-interval', type=int, default=60)
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.seconds, args.keyframe_interval))
+
+
+if __name__ == '__main__':
+    main()
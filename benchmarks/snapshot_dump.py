@@ -0,0 +1,66 @@
+"""
+Compares saving a tick as a binary snapshot with the text dump of `parse_to()`.
+
+Run from the repository root:
+
+    python -m benchmarks.snapshot_dump --repeat 200
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from py_iracing.client import iRacingClient
+from py_iracing.snapshot import Snapshot
+from tests.fakes import build_image
+
+VARIABLES = ([(f'Scalar{i}', 'f', 1) for i in range(250)] + [(f'Flag{i}', 'i', 1) for i in range(50)]
+             + [(f'CarIdxArray{i}', 'f', 64) for i in range(20)])
+SESSION_INFO = '---\nWeekendInfo:\n TrackName: spa\n\nDriverInfo:\n Drivers:\n' + ''.join(
+    f' - CarIdx: {i}\n   UserName: Driver {i}\n   CarNumber: "{i}"\n   IRating: {1500 + i}\n' for i in range(64)) + '\n...\n'
+
+
+async def run(repeat: int) -> None:
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'image.bin')
+    with open(path, 'wb') as f:
+        f.write(build_image(VARIABLES, [{'Scalar0': 1.0}] * 3, session_info=SESSION_INFO))
+    ir = iRacingClient()
+    await ir.startup(test_file=path)
+    ir.freeze_var_buffer_now()
+    text_path, snapshot_path = os.path.join(directory, 'tick.txt'), os.path.join(directory, 'tick.snap')
+
+    def report(name: str, elapsed: float, size: int) -> None:
+        print(f'{name:<28}{elapsed / repeat * 1e6:10.1f} us{size:10d} bytes')
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ir.parse_to(text_path)
+    report('parse_to()', time.perf_counter() - start, os.path.getsize(text_path))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ir.save_snapshot(snapshot_path)
+    report('save_snapshot()', time.perf_counter() - start, os.path.getsize(snapshot_path))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        Snapshot.load(snapshot_path).to_dict()
+    report('Snapshot.load().to_dict()', time.perf_counter() - start, os.path.getsize(snapshot_path))
+
+    ir.shutdown()
+    for name in (path, text_path, snapshot_path):
+        os.remove(name)
+    os.rmdir(directory)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import asyncio
 import py_iracing
+from py_iracing.pit import PitServicePlanner, PitServiceRequest
 
 async def main():
     # Create a new iRacingClient
@@ -12,6 +13,10 @@ async def main():
 
     print("Connected to iRacing.")
 
+    # Queue pit commands, collapsing duplicates and limiting the send rate
+    ir.start_broadcast_scheduler()
+    planner = PitServicePlanner(ir)
+
     on_pit_road = False
 
     try:
@@ -24,14 +29,10 @@ async def main():
                 on_pit_road = True
                 print("On pit road, requesting new tires and fuel.")
 
-                # Request new tires
-                ir.pit_command(py_iracing.PitCommandMode.lf)
-                ir.pit_command(py_iracing.PitCommandMode.rf)
-                ir.pit_command(py_iracing.PitCommandMode.lr)
-                ir.pit_command(py_iracing.PitCommandMode.rr)
-
-                # Request a full tank of fuel
-                ir.pit_command(py_iracing.PitCommandMode.fuel, 100)
+                # Request new tires and a full tank of fuel, sending only what is not selected yet
+                result = await planner.apply(PitServiceRequest(tires=('lf', 'rf', 'lr', 'rr'), fuel=100))
+                if not result.success:
+                    print("Pit service request was not confirmed.")
 
             elif not await ir.get('OnPitRoad') and on_pit_road:
                 on_pit_road = False
@@ -7,9 +7,28 @@ A Python 3 implementation of the iRacing SDK.
 This package allows you to get session data, live telemetry data, and broadcast messages to the iRacing simulator.
 """
 
+from .bitfields import EnumDecoder
+from .broadcast import BroadcastScheduler, FakeBroadcastBackend
+from .capture import CaptureReader, MemoryCapture
+from .catalog import Catalog
 from .client import iRacingClient
+from .dataset import IBTDataset
+from .derived import DerivedChannels, builtin_channels
+from .downsample import DownsamplePyramid
+from .estimators import StrategyEstimator
 from .ibt import IBT
+from .instrumentation import Instrumentation, LatencyHistogram
+from .laps import LapResampler
+from .pit import PitServicePlanner, PitServiceRequest
+from .query import RecordQuery
+from .relay import RelayClient, RelayServer
+from .replay import ReplayScanner
+from .session_cache import SessionInfoCache
+from .snapshot import Snapshot
+from .supervisor import ConnectionSupervisor
+from .timing import TimingEngine
+from .track import TrackIndex
 from .constants import VERSION
 
 __version__ = VERSION
-__all__ = ['iRacingClient', 'IBT']
\ No newline at end of file
+__all__ = ['iRacingClient', 'IBT', 'IBTDataset', 'BroadcastScheduler', 'CaptureReader', 'Catalog', 'ConnectionSupervisor', 'DerivedChannels', 'DownsamplePyramid', 'EnumDecoder', 'FakeBroadcastBackend', 'Instrumentation', 'LapResampler', 'LatencyHistogram', 'MemoryCapture', 'PitServicePlanner', 'PitServiceRequest', 'RecordQuery', 'RelayClient', 'RelayServer', 'ReplayScanner', 'SessionInfoCache', 'Snapshot', 'StrategyEstimator', 'TimingEngine', 'TrackIndex', 'builtin_channels']
\ No newline at end of file
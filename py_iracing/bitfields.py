@@ -0,0 +1,151 @@
+from enum import Enum, IntFlag
+from typing import Any, Dict, Iterable, Tuple, Type, Union
+
+from .enums import (CameraState, CarLeftRight, EngineWarnings, Flags, PaceFlags, PaceMode, PitSvFlags, PitSvStatus,
+                    SessionState, TrackLocation, TrackSurface, TrackWetness)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHANNEL_ENUMS: Dict[str, Type[Enum]] = {
+    'SessionFlags': Flags,
+    'CarIdxSessionFlags': Flags,
+    'EngineWarnings': EngineWarnings,
+    'CarIdxPaceFlags': PaceFlags,
+    'PaceMode': PaceMode,
+    'PitSvFlags': PitSvFlags,
+    'PlayerCarPitSvStatus': PitSvStatus,
+    'PlayerTrackSurface': TrackLocation,
+    'CarIdxTrackSurface': TrackLocation,
+    'PlayerTrackSurfaceMaterial': TrackSurface,
+    'CarIdxTrackSurfaceMaterial': TrackSurface,
+    'SessionState': SessionState,
+    'CamCameraState': CameraState,
+    'CarLeftRight': CarLeftRight,
+    'TrackWetness': TrackWetness,
+}
+
+Members = Union[str, int, Enum, Iterable[Union[str, int, Enum]]]
+
+
+class EnumDecoder:
+    """
+    Vectorized tests of bitfield and enum channels, e.g. `CarIdxSessionFlags` or `CarIdxTrackSurface`.
+
+    Values can be a single value, a live array channel (list, memoryview or NumPy array) or a whole `IBT`
+    column, and every test is one NumPy operation over all of them: bitfields are tested against a
+    precomputed mask, enums are looked up in a precomputed boolean table indexed by value.
+    """
+
+    _by_channel: Dict[str, 'EnumDecoder'] = {}
+
+    def __init__(self, enum: Type[Enum]) -> None:
+        """
+        Args:
+            enum: An `IntFlag` (bitfield) or `IntEnum` class from `py_iracing.enums`.
+        """
+        _require_numpy()
+        self.enum = enum
+        self.is_bitfield = issubclass(enum, IntFlag)
+        codes = [int(member) for member in enum]
+        self._low = min(codes)
+        self._span = max(codes) - self._low + 1
+        self._tables: Dict[Tuple[int, ...], 'np.ndarray'] = {}
+
+    @classmethod
+    def for_channel(cls, channel: str) -> 'EnumDecoder':
+        """
+        The shared decoder for a channel listed in `CHANNEL_ENUMS`.
+        """
+        decoder = cls._by_channel.get(channel)
+        if decoder is None:
+            if channel not in CHANNEL_ENUMS:
+                raise KeyError(f'No enum known for channel {channel!r}')
+            decoder = cls._by_channel[channel] = cls(CHANNEL_ENUMS[channel])
+        return decoder
+
+    def codes(self, members: Members) -> Tuple[int, ...]:
+        """
+        Resolves members given by name, value or enum member to their integer values.
+        """
+        if isinstance(members, (str, int, Enum)):
+            members = (members,)
+        return tuple(sorted({int(self.enum[member]) if isinstance(member, str) else int(member) for member in members}))
+
+    def mask(self, members: Members) -> int:
+        """
+        The bitmask of bitfield members.
+        """
+        if not self.is_bitfield:
+            raise TypeError(f'{self.enum.__name__} is not a bitfield')
+        mask = 0
+        for code in self.codes(members):
+            mask |= code
+        return mask
+
+    def test(self, values: Any, members: Members, require_all: bool = False) -> 'np.ndarray':
+        """
+        Tests values against members.
+
+        Args:
+            values: A value or an array of values of the channel.
+            members: The members to test for.
+            require_all: For bitfields, require every member's bits instead of any of them.
+
+        Returns:
+            A boolean array shaped like `values`.
+        """
+        values = _as_integers(values)
+        if self.is_bitfield:
+            mask = self.mask(members)
+            typed_mask = np.array(mask, dtype=np.uint64).astype(values.dtype)
+            masked = np.bitwise_and(values, typed_mask)
+            return masked == typed_mask if require_all else masked != 0
+        return self._lookup(values, self._table(self.codes(members)))
+
+    def where(self, values: Any, members: Members, require_all: bool = False) -> 'np.ndarray':
+        """
+        The indices of the values that pass `test()`.
+
+        Returns:
+            For a 1-D array (one tick of an array channel, or a scalar column), the matching indices.
+            For a 2-D array (an array channel column), an `(n, 2)` array of (record, car index) pairs.
+        """
+        mask = self.test(values, members, require_all)
+        if mask.ndim <= 1:
+            return np.flatnonzero(mask)
+        return np.argwhere(mask)
+
+    def unpack(self, values: Any) -> Dict[str, 'np.ndarray']:
+        """
+        Decodes values into one boolean array per member, keyed by member name.
+        """
+        return {member.name: self.test(values, member) for member in self.enum}
+
+    def _table(self, codes: Tuple[int, ...]) -> 'np.ndarray':
+        table = self._tables.get(codes)
+        if table is None:
+            table = np.zeros(self._span + 1, dtype=bool)
+            table[[code - self._low for code in codes if 0 <= code - self._low < self._span]] = True
+            self._tables[codes] = table
+        return table
+
+    def _lookup(self, values: 'np.ndarray', table: 'np.ndarray') -> 'np.ndarray':
+        index = values.astype(np.intp) - self._low
+        # Values the enum does not know index the trailing False entry.
+        index = np.where((index < 0) | (index >= self._span), self._span, index)
+        return table[index]
+
+
+def _as_integers(values: Any) -> 'np.ndarray':
+    values = np.asarray(values)
+    if values.dtype.kind not in 'iu':
+        values = np.nan_to_num(values, nan=0).astype(np.int64) if values.dtype.kind == 'f' else values.astype(np.int64)
+    return values
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError('EnumDecoder requires numpy, install it with: pip install py_iracing[numpy]')
@@ -0,0 +1,257 @@
+import asyncio
+import ctypes
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+from .constants import BROADCAST_MSG_NAME
+from .enums import BroadcastMsg, PitCommandMode, ReplayPositionMode, ReplaySearchMode
+from .instrumentation import Instrumentation
+
+
+class Win32BroadcastBackend:
+    """
+    Sends broadcast messages to the iRacing simulator with `SendNotifyMessageW`.
+    """
+
+    def __init__(self) -> None:
+        self._broadcast_msg_id: Optional[int] = None
+
+    @property
+    def broadcast_msg_id(self) -> int:
+        """
+        The ID of the broadcast message for sending commands to iRacing.
+        """
+        if self._broadcast_msg_id is None:
+            self._broadcast_msg_id = ctypes.windll.user32.RegisterWindowMessageW(BROADCAST_MSG_NAME)
+        return self._broadcast_msg_id
+
+    def send(self, broadcast_type: int, var1: int = 0, var2: int = 0, var3: int = 0) -> int:
+        return ctypes.windll.user32.SendNotifyMessageW(0xFFFF, self.broadcast_msg_id,
+                                                     broadcast_type | var1 << 16, var2 | var3 << 16)
+
+
+class FakeBroadcastBackend:
+    """
+    A broadcast backend that records messages instead of sending them, for tests and non-Windows platforms.
+    """
+
+    def __init__(self, result: int = 1) -> None:
+        self.result = result
+        self.sent: List[Tuple[int, int, int, int]] = []
+        self.sent_at: List[float] = []
+
+    def send(self, broadcast_type: int, var1: int = 0, var2: int = 0, var3: int = 0) -> int:
+        self.sent.append((int(broadcast_type), int(var1), int(var2), int(var3)))
+        self.sent_at.append(time.monotonic())
+        return self.result
+
+
+_ABSOLUTE_REPLAY_POSITIONS = (ReplayPositionMode.begin, ReplayPositionMode.end)
+_ABSOLUTE_REPLAY_SEARCHES = (ReplaySearchMode.to_start, ReplaySearchMode.to_end)
+
+_TIRES = frozenset(('lf', 'rf', 'lr', 'rr'))
+# The pit service items each pit command changes, `clear` and unknown commands change all of them
+_PIT_TARGETS: Dict[int, frozenset] = {
+    PitCommandMode.ws: frozenset(('ws',)), PitCommandMode.clear_ws: frozenset(('ws',)),
+    PitCommandMode.fuel: frozenset(('fuel',)), PitCommandMode.clear_fuel: frozenset(('fuel',)),
+    PitCommandMode.lf: frozenset(('lf',)), PitCommandMode.rf: frozenset(('rf',)),
+    PitCommandMode.lr: frozenset(('lr',)), PitCommandMode.rr: frozenset(('rr',)),
+    PitCommandMode.clear_tires: _TIRES,
+    PitCommandMode.fr: frozenset(('fr',)), PitCommandMode.clear_fr: frozenset(('fr',)),
+}
+_ALL_PIT_TARGETS = frozenset(('ws', 'fuel', 'fr')) | _TIRES
+
+
+def coalesce_key(broadcast_type: int, var1: int = 0, var2: int = 0, var3: int = 0) -> Optional[Hashable]:
+    """
+    Returns the key under which a queued command supersedes the command queued just before it, or None if it never does.
+
+    Camera switches supersede each other, as do absolute replay seeks, play speed, camera state and FFB changes.
+    Pit commands only collapse with identical pit commands, see `BroadcastScheduler.submit()`.
+    """
+    if broadcast_type in (BroadcastMsg.cam_switch_pos, BroadcastMsg.cam_switch_num):
+        return 'camera'
+    if broadcast_type in (BroadcastMsg.cam_set_state, BroadcastMsg.replay_set_play_speed):
+        return int(broadcast_type)
+    if broadcast_type == BroadcastMsg.ffb_command:
+        return int(broadcast_type), var1
+    if broadcast_type == BroadcastMsg.pit_command:
+        return int(broadcast_type), var1, var2
+    if (broadcast_type == BroadcastMsg.replay_search_session_time
+            or (broadcast_type == BroadcastMsg.replay_set_play_position and var1 in _ABSOLUTE_REPLAY_POSITIONS)
+            or (broadcast_type == BroadcastMsg.replay_search and var1 in _ABSOLUTE_REPLAY_SEARCHES)):
+        return 'replay_seek'
+    return None
+
+
+@dataclass
+class _PendingCommand:
+    args: Tuple[int, int, int, int]
+    key: Optional[Hashable]
+    futures: List['asyncio.Future[int]'] = field(default_factory=list)
+
+
+class BroadcastScheduler:
+    """
+    Queues broadcast messages and sends them from a single worker task, at most `rate_limit` per second.
+
+    A command that supersedes the last queued command (see `coalesce_key()`) replaces it, and the futures of both
+    resolve with the result of the command that was actually sent. Only the last queued command is ever replaced,
+    so commands are always sent in the order they were submitted. A pit command identical to one still queued is
+    dropped unless a pit command queued in between changes the same pit service item, since sending it again would
+    not change anything.
+    """
+
+    def __init__(self, backend: Any, rate_limit: float = 30.0, burst: int = 5,
+                 instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        Args:
+            backend: The backend used to send messages, e.g. `Win32BroadcastBackend` or `FakeBroadcastBackend`.
+            rate_limit: The sustained number of messages per second.
+            burst: The number of messages that can be sent back to back before the rate limit applies.
+            instrumentation: Optional instrumentation to record send latencies and counters in.
+        """
+        self.backend = backend
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.instrumentation = instrumentation
+        self.metrics: Dict[str, int] = {'submitted': 0, 'sent': 0, 'coalesced': 0, 'failed': 0}
+
+        self._queue: Deque[_PendingCommand] = deque()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional['asyncio.Task[None]'] = None
+
+    @property
+    def queue_length(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        """
+        Starts the worker task on the running event loop.
+        """
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            if self._queue:
+                self._wakeup.set()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, drain: bool = True) -> None:
+        """
+        Stops the worker task, after sending all queued commands when `drain` is True.
+        """
+        if drain:
+            await self.join()
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops the worker task immediately and cancels the futures of all queued commands.
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        while self._queue:
+            for future in self._queue.popleft().futures:
+                if not future.done():
+                    future.cancel()
+
+    async def join(self) -> None:
+        """
+        Waits until every queued command has been sent.
+
+        Raises:
+            RuntimeError: If commands are queued but the worker task is not running.
+        """
+        while self._queue:
+            if self._worker is None or self._worker.done():
+                raise RuntimeError('The broadcast scheduler is not running, call start() first')
+            await asyncio.gather(*self._queue[-1].futures, return_exceptions=True)
+
+    def submit(self, broadcast_type: int, var1: int = 0, var2: int = 0, var3: int = 0) -> 'asyncio.Future[int]':
+        """
+        Queues a broadcast message.
+
+        Returns:
+            A future resolving to the result of the broadcast message.
+        """
+        future = asyncio.get_running_loop().create_future()
+        args = (broadcast_type, var1, var2, var3)
+        key = coalesce_key(*args)
+        self.metrics['submitted'] += 1
+        pending = self._queue[-1] if self._queue else None
+        if key is not None and pending is not None and pending.key == key:
+            pending.args = args
+            pending.futures.append(future)
+            self.metrics['coalesced'] += 1
+            if self.instrumentation is not None:
+                self.instrumentation.count('broadcasts_coalesced')
+            return future
+        if broadcast_type == BroadcastMsg.pit_command:
+            duplicate = self._queued_pit_command(args)
+            if duplicate is not None:
+                duplicate.futures.append(future)
+                self.metrics['coalesced'] += 1
+                if self.instrumentation is not None:
+                    self.instrumentation.count('broadcasts_coalesced')
+                return future
+
+        self._queue.append(_PendingCommand(args, key, [future]))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return future
+
+    def _queued_pit_command(self, args: Tuple[int, int, int, int]) -> Optional[_PendingCommand]:
+        """
+        Returns the queued pit command identical to `args`, if no pit command queued after it changes the same items.
+        """
+        targets = _PIT_TARGETS.get(args[1], _ALL_PIT_TARGETS)
+        for pending in reversed(self._queue):
+            if pending.args == args:
+                return pending
+            if pending.args[0] == BroadcastMsg.pit_command and targets & _PIT_TARGETS.get(pending.args[1], _ALL_PIT_TARGETS):
+                return None
+        return None
+
+    def _take_token(self) -> float:
+        """
+        Takes a token from the bucket, or returns how long to wait for the next one.
+        """
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._last_refill) * self.rate_limit)
+        self._last_refill = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate_limit
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            delay = self._take_token()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+
+            command = self._queue.popleft()
+            start = time.perf_counter_ns()
+            try:
+                result = self.backend.send(*command.args)
+            except Exception as e:
+                self.metrics['failed'] += 1
+                for future in command.futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            if self.instrumentation is not None:
+                self.instrumentation.record('broadcast', time.perf_counter_ns() - start)
+            self.metrics['sent'] += 1
+            for future in command.futures:
+                if not future.done():
+                    future.set_result(result)
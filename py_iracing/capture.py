@@ -0,0 +1,389 @@
+import asyncio
+import hashlib
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+from .instrumentation import Instrumentation
+
+CAPTURE_MAGIC: bytes = b'IRCAP\x00'
+CAPTURE_VERSION: int = 1
+PAGE_SIZE: int = 4096
+
+# The main header and the var buffer table, which change every tick
+HEADER_BYTES: int = 112
+MAX_VAR_BUFS: int = 4
+
+# Magic, format version, image size and page size
+FILE_HEADER = struct.Struct('<6sHII')
+# Every record is a payload length and a record type, followed by the payload
+RECORD_HEADER = struct.Struct('<IB')
+RECORD_PAGE = 1
+RECORD_TICK = 2
+RECORD_INDEX = 3
+# A page record holds the page number followed by the page
+PAGE_HEADER = struct.Struct('<I')
+# A tick record holds the seconds since the capture started and the var buffer slot, followed by
+# the main header and the var buffer
+TICK_HEADER = struct.Struct('<dB')
+# The index lists the tick records (offset, time, tick count) and the page records (offset, page number)
+INDEX_HEADER = struct.Struct('<II')
+INDEX_TICK = struct.Struct('<Qdi')
+INDEX_PAGE = struct.Struct('<QI')
+# The file ends with the offset of the index record
+FOOTER = struct.Struct('<Q6s')
+
+
+@dataclass(frozen=True)
+class CapturedTick:
+    """
+    A tick record in a capture.
+
+    Attributes:
+        offset: The file offset of the record.
+        time: The seconds since the capture started.
+        tick_count: The tick count of the captured var buffer.
+    """
+    offset: int
+    time: float
+    tick_count: int
+
+
+class CaptureWriter:
+    """
+    Writes a capture container: the memory image as 4 KB pages, then one record per tick with the main header
+    and the var buffer that tick was written to. Pages are only written again when their content hash changes.
+    """
+
+    def __init__(self, path: str, image_size: int) -> None:
+        self._file: BinaryIO = open(path, 'wb')
+        self.image_size = image_size
+        self.ticks: List[CapturedTick] = []
+        self.pages: List[Tuple[int, int]] = []
+        self.pages_skipped = 0
+        empty = _page_hash(bytes(PAGE_SIZE))
+        self._hashes: List[bytes] = [empty] * ((image_size + PAGE_SIZE - 1) // PAGE_SIZE)
+        self._file.write(FILE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, image_size, PAGE_SIZE))
+
+    @property
+    def bytes_written(self) -> int:
+        return self._file.tell()
+
+    def write_pages(self, mem: Any, start: int = 0, end: Optional[int] = None) -> int:
+        """
+        Writes the pages overlapping `mem[start:end]` whose content changed since they were last written.
+
+        Returns:
+            The number of pages written.
+        """
+        end = self.image_size if end is None else min(end, self.image_size)
+        written = 0
+        for page in range(start // PAGE_SIZE, (end + PAGE_SIZE - 1) // PAGE_SIZE):
+            data = mem[page * PAGE_SIZE:min((page + 1) * PAGE_SIZE, self.image_size)]
+            digest = _page_hash(data)
+            if digest == self._hashes[page]:
+                self.pages_skipped += 1
+                continue
+            self._hashes[page] = digest
+            self.pages.append((self._write_record(RECORD_PAGE, PAGE_HEADER.pack(page), data), page))
+            written += 1
+        return written
+
+    def write_tick(self, elapsed: float, slot: int, header: bytes, buffer: bytes) -> None:
+        tick_count = struct.unpack_from('<i', header, 48 + slot * 16)[0]
+        offset = self._write_record(RECORD_TICK, TICK_HEADER.pack(elapsed, slot), header, buffer)
+        self.ticks.append(CapturedTick(offset, elapsed, tick_count))
+
+    def close(self) -> None:
+        """
+        Writes the index and closes the file.
+        """
+        if self._file.closed:
+            return
+        index = [INDEX_HEADER.pack(len(self.ticks), len(self.pages))]
+        index.extend(INDEX_TICK.pack(tick.offset, tick.time, tick.tick_count) for tick in self.ticks)
+        index.extend(INDEX_PAGE.pack(offset, page) for offset, page in self.pages)
+        index_offset = self._write_record(RECORD_INDEX, *index)
+        self._file.write(FOOTER.pack(index_offset, CAPTURE_MAGIC))
+        self._file.close()
+
+    def _write_record(self, record_type: int, *parts: bytes) -> int:
+        offset = self._file.tell()
+        self._file.write(RECORD_HEADER.pack(sum(len(part) for part in parts), record_type))
+        for part in parts:
+            self._file.write(part)
+        return offset
+
+
+class MemoryCapture:
+    """
+    Records the memory map of an `iRacingClient` at every tick, for reproducing bugs with `CaptureReader.replay()`.
+
+    The first tick writes the whole image, skipping empty pages. Every tick then stores only the main header and
+    the var buffer slot that tick was written to, and session info changes store only the 4 KB pages that changed.
+    """
+
+    def __init__(self, ir: Any, path: str, instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        Args:
+            ir: A started `iRacingClient`.
+            path: The capture file to write.
+            instrumentation: Optional instrumentation to record tick capture latencies in.
+        """
+        self.ir = ir
+        self.path = path
+        self.instrumentation = instrumentation
+        self.writer: Optional[CaptureWriter] = None
+        self._session_info_update: Optional[int] = None
+        self._started = 0.0
+        self._task: Optional['asyncio.Task[None]'] = None
+
+    async def start(self) -> None:
+        """
+        Starts capturing in a background task.
+        """
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Stops capturing and finishes the file.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.close()
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+    async def run(self, duration: Optional[float] = None) -> None:
+        """
+        Captures every tick, for `duration` seconds or until cancelled.
+        """
+        ir = self.ir
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration if duration is not None else None
+        last_tick = None
+        try:
+            while deadline is None or loop.time() < deadline:
+                if ir._data_valid_event is None:
+                    # Test files have no data valid event to wait on, so poll at the tick rate instead
+                    await asyncio.sleep(1 / (ir._header.tick_rate if ir._header.tick_rate > 0 else 60))
+                # A failed freeze leaves an unfrozen buffer the sim may still be writing, so skip that tick
+                if not await ir.freeze_var_buffer_latest():
+                    continue
+                var_buf = ir._var_buffer_latest
+                if var_buf.tick_count == last_tick:
+                    continue
+                last_tick = var_buf.tick_count
+                self.capture_tick(var_buf)
+        finally:
+            if duration is not None:
+                self.close()
+
+    def capture_tick(self, var_buf: Any) -> None:
+        """
+        Writes a frozen var buffer, and the pages of the image that changed with the session info.
+
+        Raises:
+            ValueError: If the var buffer is not frozen.
+        """
+        if not var_buf.is_memory_frozen:
+            raise ValueError('capture_tick() needs a frozen var buffer, freeze it with freeze_var_buffer_now()')
+        ir = self.ir
+        mem = ir._shared_mem
+        start = time.perf_counter_ns() if self.instrumentation is not None else 0
+        if self.writer is None:
+            self.writer = CaptureWriter(self.path, len(mem))
+            self._started = time.perf_counter()
+            self.writer.write_pages(mem)
+            self._session_info_update = ir._header.session_info_update
+        elif self._session_info_update != ir._header.session_info_update:
+            self._session_info_update = ir._header.session_info_update
+            self.writer.write_pages(mem, ir._header.session_info_offset,
+                                    ir._header.session_info_offset + ir._header.session_info_len)
+        slot = (var_buf._offset - 48) // 16
+        # The sim may have written the next tick since the freeze, so pin the slot to the captured tick
+        header = bytearray(mem[:HEADER_BYTES])
+        struct.pack_into('<i', header, var_buf._offset, var_buf.tick_count)
+        self.writer.write_tick(time.perf_counter() - self._started, slot, bytes(header), var_buf.get_memory())
+        if self.instrumentation is not None:
+            self.instrumentation.record('capture_tick', time.perf_counter_ns() - start)
+
+
+class CaptureReader:
+    """
+    Reads a capture written by `MemoryCapture`, rebuilding the memory image at any tick or replaying it
+    into a file that `iRacingClient.startup(test_file=...)` reads as if iRacing were running.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file: BinaryIO = open(path, 'rb')
+        magic, version, self.image_size, self.page_size = FILE_HEADER.unpack(self._file.read(FILE_HEADER.size))
+        if magic != CAPTURE_MAGIC:
+            raise ValueError('Not a py_iracing capture')
+        if version > CAPTURE_VERSION:
+            raise ValueError(f'Unsupported capture version {version}')
+        self.ticks: List[CapturedTick] = []
+        self.pages: List[Tuple[int, int]] = []
+        if not self._read_index():
+            # The capture was not closed, so rebuild the index from the records
+            self._scan()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'CaptureReader':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    @property
+    def duration(self) -> float:
+        return self.ticks[-1].time - self.ticks[0].time if self.ticks else 0.0
+
+    def image_at(self, index: int) -> bytearray:
+        """
+        Rebuilds the memory image as it was at a tick, including the older var buffer slots.
+        """
+        image = bytearray(self.image_size)
+        tick_offset = self.ticks[index].offset
+        offsets = [offset for offset, _ in self.pages if offset < tick_offset]
+        offsets.extend(tick.offset for tick in self.ticks[max(0, index - MAX_VAR_BUFS + 1):index + 1])
+        for offset in sorted(offsets):
+            self._apply(image, *self._read_record(offset))
+        return image
+
+    async def replay(self, test_file: str, speed: float = 1.0, start: int = 0, stop: Optional[int] = None,
+                     on_tick: Optional[Callable[[CapturedTick], Any]] = None) -> None:
+        """
+        Writes the captured ticks into `test_file` at their original pace, the way iRacing writes its memory map.
+
+        Args:
+            test_file: The file to replay into. Start an `iRacingClient` on it once it exists.
+            speed: The playback speed, e.g. 4.0 for four times faster. 0 replays as fast as possible.
+            start: The first tick to replay.
+            stop: The tick to stop before.
+            on_tick: Called after each tick is written.
+        """
+        ticks = self.ticks[start:stop]
+        if not ticks:
+            return
+        self._create(test_file, self.image_at(start))
+        with open(test_file, 'r+b') as f:
+            mem = mmap.mmap(f.fileno(), 0)
+            try:
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                if on_tick is not None:
+                    on_tick(ticks[0])
+                remaining = iter(ticks[1:])
+                for record_type, payload_offset, length in self._records(ticks[0].offset, ticks[-1].offset):
+                    if payload_offset - RECORD_HEADER.size == ticks[0].offset:
+                        continue
+                    if record_type != RECORD_TICK:
+                        self._apply(mem, record_type, payload_offset, length)
+                        continue
+                    tick = next(remaining)
+                    if speed > 0:
+                        delay = started + (tick.time - ticks[0].time) / speed - loop.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    self._apply(mem, record_type, payload_offset, length)
+                    if on_tick is not None:
+                        on_tick(tick)
+            finally:
+                mem.close()
+
+    def _create(self, path: str, image: bytearray) -> None:
+        # Write next to the target and rename, so a client never maps a half-written image
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(image)
+        os.replace(temp_path, path)
+
+    def _apply(self, mem: Any, record_type: int, payload_offset: int, length: int) -> None:
+        self._file.seek(payload_offset)
+        payload = self._file.read(length)
+        if record_type == RECORD_PAGE:
+            page = PAGE_HEADER.unpack_from(payload)[0]
+            data = payload[PAGE_HEADER.size:]
+            mem[page * self.page_size:page * self.page_size + len(data)] = data
+        elif record_type == RECORD_TICK:
+            slot = TICK_HEADER.unpack_from(payload)[1]
+            header = payload[TICK_HEADER.size:TICK_HEADER.size + HEADER_BYTES]
+            buffer = payload[TICK_HEADER.size + HEADER_BYTES:]
+            buf_offset = struct.unpack_from('<i', header, 48 + slot * 16 + 4)[0]
+            # The var buffer first and the header last, so readers never see a tick count before its data
+            mem[buf_offset:buf_offset + len(buffer)] = buffer
+            mem[:HEADER_BYTES] = header
+
+    def _read_record(self, offset: int) -> Tuple[int, int, int]:
+        self._file.seek(offset)
+        length, record_type = RECORD_HEADER.unpack(self._file.read(RECORD_HEADER.size))
+        return record_type, offset + RECORD_HEADER.size, length
+
+    def _records(self, offset: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """
+        The (type, payload offset, length) of the records from `offset` up to and including the one at `end`.
+        """
+        while offset <= end:
+            record_type, payload_offset, length = self._read_record(offset)
+            yield record_type, payload_offset, length
+            offset = payload_offset + length
+
+    def _read_index(self) -> bool:
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        if size < FILE_HEADER.size + FOOTER.size:
+            return False
+        self._file.seek(size - FOOTER.size)
+        index_offset, magic = FOOTER.unpack(self._file.read(FOOTER.size))
+        if magic != CAPTURE_MAGIC or not (FILE_HEADER.size <= index_offset < size):
+            return False
+        record_type, payload_offset, length = self._read_record(index_offset)
+        if record_type != RECORD_INDEX:
+            return False
+        payload = self._file.read(length)
+        tick_count, page_count = INDEX_HEADER.unpack_from(payload)
+        position = INDEX_HEADER.size
+        for _ in range(tick_count):
+            self.ticks.append(CapturedTick(*INDEX_TICK.unpack_from(payload, position)))
+            position += INDEX_TICK.size
+        for _ in range(page_count):
+            self.pages.append(INDEX_PAGE.unpack_from(payload, position))
+            position += INDEX_PAGE.size
+        return True
+
+    def _scan(self) -> None:
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        offset = FILE_HEADER.size
+        while offset + RECORD_HEADER.size <= size:
+            record_type, payload_offset, length = self._read_record(offset)
+            if payload_offset + length > size:
+                break
+            payload = self._file.read(min(length, TICK_HEADER.size + HEADER_BYTES))
+            if record_type == RECORD_PAGE:
+                self.pages.append((offset, PAGE_HEADER.unpack_from(payload)[0]))
+            elif record_type == RECORD_TICK:
+                elapsed, slot = TICK_HEADER.unpack_from(payload)
+                tick_count = struct.unpack_from('<i', payload, TICK_HEADER.size + 48 + slot * 16)[0]
+                self.ticks.append(CapturedTick(offset, elapsed, tick_count))
+            offset = payload_offset + length
+
+
+def _page_hash(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
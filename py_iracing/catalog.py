@@ -0,0 +1,304 @@
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .ibt import IBT
+from .laps import LapRange, LapResampler, find_laps
+from .track import parse_track_length
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CATALOG_SCHEMA_VERSION: int = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    session_start_date INTEGER,
+    session_start_time REAL,
+    session_end_time REAL,
+    session_lap_count INTEGER,
+    session_record_count INTEGER,
+    tick_rate INTEGER,
+    track_id INTEGER,
+    track_name TEXT,
+    track_display_name TEXT,
+    track_config_name TEXT,
+    track_length REAL,
+    car_id INTEGER,
+    car_path TEXT,
+    car_screen_name TEXT,
+    best_lap_time REAL
+);
+CREATE TABLE IF NOT EXISTS channels (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    type INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    unit TEXT,
+    PRIMARY KEY (file_id, name)
+);
+CREATE TABLE IF NOT EXISTS laps (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    lap INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    stop INTEGER NOT NULL,
+    complete INTEGER NOT NULL,
+    lap_time REAL,
+    PRIMARY KEY (file_id, lap, start)
+);
+CREATE INDEX IF NOT EXISTS files_track ON files (track_name);
+CREATE INDEX IF NOT EXISTS files_car ON files (car_path);
+CREATE INDEX IF NOT EXISTS laps_lap_time ON laps (lap_time);
+CREATE INDEX IF NOT EXISTS channels_name ON channels (name);
+"""
+
+_FILE_COLUMNS: Tuple[str, ...] = (
+    'session_start_date', 'session_start_time', 'session_end_time', 'session_lap_count', 'session_record_count',
+    'tick_rate', 'track_id', 'track_name', 'track_display_name', 'track_config_name', 'track_length',
+    'car_id', 'car_path', 'car_screen_name', 'best_lap_time',
+)
+
+
+@dataclass
+class ScanResult:
+    """
+    What a `Catalog.scan()` changed.
+    """
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+
+
+def parse_lap_time(lap_time: str) -> float:
+    """
+    Parses a lap time such as '1:40', '1:39.876' or '99.8' to seconds.
+    """
+    match = re.fullmatch(r'\s*(?:(\d+):)?(\d+(?:\.\d*)?)\s*', lap_time)
+    if not match:
+        raise ValueError(f'Invalid lap time: {lap_time!r}')
+    return int(match.group(1) or 0) * 60 + float(match.group(2))
+
+
+def extract(path: str) -> Dict[str, Any]:
+    """
+    Reads the catalog entry of a single `.ibt` file: its headers, track and car, channels and laps.
+    """
+    ibt = IBT()
+    ibt.open(path)
+    try:
+        disk_header = ibt._disk_header
+        weekend_info = ibt.session_info('WeekendInfo') or {}
+        driver_info = ibt.session_info('DriverInfo') or {}
+        driver = next((d for d in driver_info.get('Drivers') or [] if d.get('CarIdx') == driver_info.get('DriverCarIdx')), {})
+        channels = [(v.name, v.type, v.count, v.unit) for v in ibt._var_headers]
+
+        laps = []
+        names = set(ibt.var_headers_names)
+        if {'Lap', 'LapDistPct', 'SessionTime'} <= names:
+            resampler = LapResampler(channels=(), points=2)
+            lap_times = {r.lap_range: r.lap_time for r in resampler.resample_all(ibt, complete_only=True)}
+            laps = [(r.lap, r.start, r.stop, r.complete, lap_times.get(r)) for r in find_laps(ibt)]
+        elif 'Lap' in names:
+            laps = [(r.lap, r.start, r.stop, r.complete, None) for r in find_laps(ibt)]
+        lap_times = [lap[4] for lap in laps if lap[4] is not None]
+
+        return {
+            'session_start_date': disk_header.session_start_date,
+            'session_start_time': disk_header.session_start_time,
+            'session_end_time': disk_header.session_end_time,
+            'session_lap_count': disk_header.session_lap_count,
+            'session_record_count': disk_header.session_record_count,
+            'tick_rate': ibt._header.tick_rate,
+            'track_id': weekend_info.get('TrackID'),
+            'track_name': weekend_info.get('TrackName'),
+            'track_display_name': weekend_info.get('TrackDisplayName'),
+            'track_config_name': weekend_info.get('TrackConfigName'),
+            'track_length': parse_track_length(weekend_info.get('TrackLength')),
+            'car_id': driver.get('CarID'),
+            'car_path': driver.get('CarPath'),
+            'car_screen_name': driver.get('CarScreenName'),
+            'best_lap_time': min(lap_times) if lap_times else None,
+            'channels': channels,
+            'laps': laps,
+        }
+    finally:
+        ibt.close()
+
+
+def _extract_or_error(path: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    try:
+        return path, extract(path), None
+    except Exception as e:
+        return path, None, f'{type(e).__name__}: {e}'
+
+
+class Catalog:
+    """
+    A SQLite index of `.ibt` files, so archives can be queried without opening every file.
+
+    `scan()` adds new and changed files (by mtime and size) and drops deleted ones. The query methods return
+    file paths and `LapRange`s that can be passed straight to `IBT`, `LapResampler` or `IBT.get_array()`.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path: The SQLite database file. It is created if it does not exist.
+        """
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute('PRAGMA foreign_keys = ON')
+        version = self._db.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, CATALOG_SCHEMA_VERSION):
+            raise ValueError(f'{path} has catalog schema version {version}, expected {CATALOG_SCHEMA_VERSION}')
+        self._db.executescript(_SCHEMA)
+        self._db.execute(f'PRAGMA user_version = {CATALOG_SCHEMA_VERSION}')
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> 'Catalog':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def scan(self, folder: str, workers: Optional[int] = None, remove_missing: bool = True) -> ScanResult:
+        """
+        Indexes every `.ibt` file below `folder`, reading only new and changed files.
+
+        Args:
+            folder: The folder to scan recursively.
+            workers: The number of worker processes, None for one per CPU, 0 to read files in this process.
+            remove_missing: Whether to drop entries of files below `folder` that no longer exist.
+
+        Raises:
+            ImportError: If numpy, which finding the laps of a file needs, is not installed.
+        """
+        if np is None:
+            raise ImportError('Catalog.scan requires numpy, install it with: pip install py_iracing[numpy]')
+        result = ScanResult()
+        known = {path: (mtime, size) for path, mtime, size in self._db.execute('SELECT path, mtime, size FROM files')}
+        found = {}
+        for root, _, names in os.walk(folder):
+            for name in names:
+                if name.lower().endswith('.ibt'):
+                    path = os.path.abspath(os.path.join(root, name))
+                    stat = os.stat(path)
+                    found[path] = (stat.st_mtime, stat.st_size)
+
+        stale = [path for path, stat in sorted(found.items()) if known.get(path) != stat]
+        result.unchanged = len(found) - len(stale)
+        with self._db:
+            for path, entry, error in self._extract_all(stale, workers):
+                if entry is None:
+                    result.failed[path] = error
+                    continue
+                if path in known:
+                    result.updated += 1
+                else:
+                    result.added += 1
+                self._store(path, found[path], entry)
+
+            if remove_missing:
+                prefix = os.path.join(os.path.abspath(folder), '')
+                missing = [path for path in known if path.startswith(prefix) and path not in found]
+                self._db.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in missing])
+                result.removed = len(missing)
+        return result
+
+    @staticmethod
+    def _extract_all(paths: List[str], workers: Optional[int]) -> Iterable[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        if not paths:
+            return []
+        if workers == 0 or len(paths) == 1:
+            return map(_extract_or_error, paths)
+        with ProcessPoolExecutor(workers) as executor:
+            return list(executor.map(_extract_or_error, paths, chunksize=4))
+
+    def _store(self, path: str, stat: Tuple[float, int], entry: Dict[str, Any]) -> None:
+        self._db.execute('DELETE FROM files WHERE path = ?', (path,))
+        columns = ('path', 'mtime', 'size') + _FILE_COLUMNS
+        cursor = self._db.execute(
+            f'INSERT INTO files ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+            (path, *stat, *(entry[column] for column in _FILE_COLUMNS)))
+        file_id = cursor.lastrowid
+        self._db.executemany('INSERT INTO channels VALUES (?, ?, ?, ?, ?)',
+                             [(file_id, *channel) for channel in entry['channels']])
+        self._db.executemany('INSERT INTO laps VALUES (?, ?, ?, ?, ?, ?)',
+                             [(file_id, *lap) for lap in entry['laps']])
+
+    @staticmethod
+    def _filters(track: Optional[str], car: Optional[str], channels: Iterable[str]) -> Tuple[List[str], List[Any]]:
+        where, params = [], []
+        if track is not None:
+            where.append('(files.track_name = ? OR files.track_display_name = ?)')
+            params += [track, track]
+        if car is not None:
+            where.append('(files.car_path = ? OR files.car_screen_name = ?)')
+            params += [car, car]
+        for channel in channels:
+            where.append('EXISTS (SELECT 1 FROM channels WHERE channels.file_id = files.id AND channels.name = ?)')
+            params.append(channel)
+        return where, params
+
+    def files(self, track: Optional[str] = None, car: Optional[str] = None, channels: Iterable[str] = (),
+              max_lap_time: Optional[float] = None) -> List[str]:
+        """
+        The paths of the files matching all the given filters, oldest session first.
+
+        Args:
+            track: The `TrackName` or `TrackDisplayName`.
+            car: The `CarPath` or `CarScreenName`.
+            channels: Channels the files must contain.
+            max_lap_time: Only files with a complete lap faster than this, in seconds.
+        """
+        where, params = self._filters(track, car, channels)
+        if max_lap_time is not None:
+            where.append('files.best_lap_time < ?')
+            params.append(max_lap_time)
+        sql = 'SELECT path FROM files' + (' WHERE ' + ' AND '.join(where) if where else '')
+        sql += ' ORDER BY session_start_date, path'
+        return [path for path, in self._db.execute(sql, params)]
+
+    def laps(self, track: Optional[str] = None, car: Optional[str] = None, channels: Iterable[str] = (),
+             max_lap_time: Optional[float] = None, complete_only: bool = True) -> List[Tuple[LapRange, Optional[float]]]:
+        """
+        The laps matching all the given filters with their lap times, fastest first.
+
+        Takes the same filters as `files()`. Laps without a lap time are listed last.
+        """
+        where, params = self._filters(track, car, channels)
+        if complete_only:
+            where.append('laps.complete')
+        if max_lap_time is not None:
+            where.append('laps.lap_time < ?')
+            params.append(max_lap_time)
+        sql = ('SELECT files.path, laps.lap, laps.start, laps.stop, laps.complete, laps.lap_time '
+               'FROM laps JOIN files ON files.id = laps.file_id')
+        sql += (' WHERE ' + ' AND '.join(where) if where else '')
+        sql += ' ORDER BY laps.lap_time IS NULL, laps.lap_time, files.path, laps.start'
+        return [(LapRange(path, lap, start, stop, bool(complete)), lap_time)
+                for path, lap, start, stop, complete, lap_time in self._db.execute(sql, params)]
+
+    def channels(self, path: str) -> List[str]:
+        """
+        The channel names of an indexed file.
+        """
+        return [name for name, in self._db.execute(
+            'SELECT channels.name FROM channels JOIN files ON files.id = channels.file_id WHERE files.path = ? '
+            'ORDER BY channels.rowid', (os.path.abspath(path),))]
+
+    def __len__(self) -> int:
+        return self._db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
@@ -1,6 +1,86 @@
 import argparse
+import asyncio
+from .capture import CaptureReader, MemoryCapture
+from .catalog import Catalog, parse_lap_time
 from .client import iRacingClient
 from .constants import VERSION
+from .relay import RELAY_PORT, RelayServer
+
+def catalog(args: argparse.Namespace) -> None:
+    """
+    Scans a folder of .ibt files into a catalog, or queries the laps in one.
+    """
+    with Catalog(args.database) as cat:
+        if args.catalog_command == 'scan':
+            result = cat.scan(args.folder, workers=args.workers)
+            print(f'added {result.added}, updated {result.updated}, unchanged {result.unchanged}, '
+                  f'removed {result.removed}, failed {len(result.failed)}')
+            for path, error in result.failed.items():
+                print(f'failed: {path}: {error}')
+            return
+
+        max_lap_time = parse_lap_time(args.max_lap_time) if args.max_lap_time else None
+        for lap_range, lap_time in cat.laps(args.track, args.car, args.channel or (), max_lap_time)[:args.limit]:
+            lap_time_str = f'{int(lap_time // 60)}:{lap_time % 60:06.3f}' if lap_time is not None else '-'
+            print(f'{lap_time_str}\t{lap_range.file_name}\tlap {lap_range.lap}\trecords {lap_range.start}:{lap_range.stop}')
+
+async def dump(args: argparse.Namespace) -> None:
+    """
+    Connects to iRacing (or a test file), optionally dumping the memory map, parsing it or saving a snapshot of it to a file.
+    """
+    ir = iRacingClient()
+    if not await ir.startup(test_file=args.test, dump_to=args.dump):
+        print('iRacing not running.')
+        return
+    try:
+        if args.parse:
+            ir.freeze_var_buffer_now()
+            ir.parse_to(args.parse)
+        if args.snapshot:
+            ir.save_snapshot(args.snapshot)
+    finally:
+        ir.shutdown()
+
+async def capture(args: argparse.Namespace) -> None:
+    """
+    Records every tick of the memory map to a capture file, or replays one into a test file.
+    """
+    if args.capture_command == 'replay':
+        with CaptureReader(args.capture) as reader:
+            print(f'replaying {len(reader)} ticks into {args.image}')
+            await reader.replay(args.image, speed=args.speed)
+        return
+
+    ir = iRacingClient()
+    if not await ir.startup(test_file=args.test):
+        print('iRacing not running.')
+        return
+    recorder = MemoryCapture(ir, args.capture)
+    try:
+        await recorder.run(args.duration)
+    finally:
+        recorder.close()
+        ir.shutdown()
+
+async def relay(args: argparse.Namespace) -> None:
+    """
+    Relays live telemetry to remote clients until interrupted.
+    """
+    ir = iRacingClient()
+    if not await ir.startup(test_file=args.test):
+        print('iRacing not running.')
+        return
+    server = RelayServer(ir, host=args.host, port=args.port, keyframe_interval=args.keyframe_interval,
+                         websocket_port=args.websocket_port)
+    await server.start()
+    print(f'relaying on {args.host}:{server.port}')
+    if server.websocket_port is not None:
+        print(f'relaying over WebSocket on ws://{args.host}:{server.websocket_port}/')
+    try:
+        await server.serve_forever()
+    finally:
+        await server.stop()
+        ir.shutdown()
 
 def main() -> None:
     """
@@ -11,13 +91,57 @@ def main() -> None:
     parser.add_argument('--test', help='use test file as irsdk mmap')
     parser.add_argument('--dump', help='dump irsdk mmap to file')
     parser.add_argument('--parse', help='parse current irsdk mmap to file')
+    parser.add_argument('--snapshot', help='save current irsdk mmap tick to a binary snapshot file')
+    subparsers = parser.add_subparsers(dest='command')
+
+    catalog_parser = subparsers.add_parser('catalog', help='index .ibt files in a SQLite catalog and query it')
+    catalog_subparsers = catalog_parser.add_subparsers(dest='catalog_command', required=True)
+    scan_parser = catalog_subparsers.add_parser('scan', help='add new and changed .ibt files below a folder')
+    scan_parser.add_argument('database', help='catalog database file')
+    scan_parser.add_argument('folder', help='folder to scan recursively')
+    scan_parser.add_argument('--workers', type=int, help='number of worker processes, 0 to scan in this process')
+    query_parser = catalog_subparsers.add_parser('query', help='list the fastest matching laps')
+    query_parser.add_argument('database', help='catalog database file')
+    query_parser.add_argument('--track', help='TrackName or TrackDisplayName')
+    query_parser.add_argument('--car', help='CarPath or CarScreenName')
+    query_parser.add_argument('--channel', action='append', help='channel the file must contain, can be repeated')
+    query_parser.add_argument('--max-lap-time', help='only laps faster than this, e.g. 1:40')
+    query_parser.add_argument('--limit', type=int, default=20, help='maximum number of laps to list')
+
+    capture_parser = subparsers.add_parser('capture', help='record every tick of the irsdk mmap and replay it')
+    capture_subparsers = capture_parser.add_subparsers(dest='capture_command', required=True)
+    record_parser = capture_subparsers.add_parser('record', help='record ticks until interrupted')
+    record_parser.add_argument('capture', help='capture file to write')
+    record_parser.add_argument('--duration', type=float, help='seconds to record')
+    replay_parser = capture_subparsers.add_parser('replay', help='replay a capture into a file usable with --test')
+    replay_parser.add_argument('capture', help='capture file to read')
+    replay_parser.add_argument('image', help='test file to write the ticks into')
+    replay_parser.add_argument('--speed', type=float, default=1.0, help='playback speed, 0 for as fast as possible')
+
+    relay_parser = subparsers.add_parser('relay', help='stream live telemetry to remote clients over TCP or WebSocket')
+    relay_parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    relay_parser.add_argument('--port', type=int, default=RELAY_PORT, help='port to listen on')
+    relay_parser.add_argument('--websocket-port', type=int, help='also accept WebSocket clients on this port')
+    relay_parser.add_argument('--keyframe-interval', type=int, default=60, help='ticks between full keyframes')
     args = parser.parse_args()
 
-    ir = iRacingClient()
-    ir.startup(test_file=args.test, dump_to=args.dump)
+    if args.command == 'catalog':
+        catalog(args)
+        return
+    if args.command == 'capture':
+        try:
+            asyncio.run(capture(args))
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.command == 'relay':
+        try:
+            asyncio.run(relay(args))
+        except KeyboardInterrupt:
+            pass
+        return
 
-    if args.parse:
-        ir.parse_to(args.parse)
+    asyncio.run(dump(args))
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,24 +1,42 @@
 import ctypes
 import asyncio
 import mmap
-import re
 import struct
-from typing import Any, Dict, List, Optional, TextIO, Union
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple, Union
 import aiohttp
-import yaml
-from yaml.reader import Reader as YamlReader
 
 from .constants import (
-    BROADCAST_MSG_NAME, DATA_VALID_EVENT_NAME, MEM_MAP_FILE, MEM_MAP_FILE_SIZE,
-    SIM_STATUS_URL, VAR_TYPE_MAP, YAML_CODE_PAGE, YAML_TRANSLATER
+    DATA_VALID_EVENT_NAME, MEM_MAP_FILE, MEM_MAP_FILE_SIZE,
+    SIM_STATUS_URL, VAR_DTYPE_MAP, VAR_TYPE_MAP, YAML_CODE_PAGE
 )
 from .enums import (
     BroadcastMsg, CameraState, ChatCommandMode, FFBCommandMode,
     PitCommandMode, ReloadTexturesMode, ReplayPositionMode, ReplaySearchMode,
     ReplayStateMode, StatusField, TelemCommandMode, VideoCaptureMode
 )
-from .structs import Header, VarBuffer, VarHeader
-from .yaml_parser import CustomYamlSafeLoader
+from .broadcast import BroadcastScheduler, Win32BroadcastBackend
+from .derived import DerivedChannels
+from .instrumentation import Instrumentation
+from .session_cache import SessionInfoCache, load_section
+from .snapshot import dump_snapshot
+from .structs import Header, VarBuffer, VarHeader, read_var_headers
+from .yaml_parser import find_section
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BroadcastResult = Union[int, 'asyncio.Future[int]']
+
+ARRAY_TYPES: Tuple[str, ...] = ('list', 'memoryview', 'numpy')
+
+# The number of key sets whose read plans and compiled readers are kept, least recently used first out
+READ_PLAN_CACHE_SIZE: int = 256
+
+CompiledReader = Tuple[struct.Struct, int, List[Tuple[str, int, int]]]
 
 
 class iRacingClient:
@@ -29,12 +47,39 @@ class iRacingClient:
     It uses asyncio for non-blocking I/O, making it suitable for real-time applications.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, instrumentation: Optional[Instrumentation] = None,
+                 derived_channels: Optional[DerivedChannels] = None,
+                 broadcast_backend: Optional[Any] = None,
+                 session_info_cache: Optional[SessionInfoCache] = None,
+                 array_type: str = 'list') -> None:
         """
         Initializes the iRacingClient.
-        """
+
+        Args:
+            instrumentation: Optional hot-path instrumentation. Can also be set later through the `instrumentation` attribute.
+            derived_channels: Optional derived channels, readable through `get()` and `get_consistent()` like native variables.
+            broadcast_backend: The backend used to send broadcast messages. Defaults to `Win32BroadcastBackend`.
+            session_info_cache: Optional on-disk cache of parsed session info sections, shared across restarts.
+            array_type: How array variables such as `CarIdxLapDistPct` are returned: 'list', or 'memoryview' or
+                'numpy' for typed read-only views. Views over a frozen buffer share its snapshot without copying
+                and stay valid after it is unfrozen. Reads from an unfrozen buffer return views over a copy.
+        """
+        if array_type not in ARRAY_TYPES:
+            raise ValueError(f'array_type must be one of {ARRAY_TYPES}')
+        if array_type == 'numpy' and np is None:
+            raise ImportError("array_type='numpy' requires numpy, install it with: pip install py_iracing[numpy]")
         self.is_initialized = False
         self.last_session_info_update = 0
+        self.instrumentation = instrumentation
+        self.derived_channels = derived_channels
+        self.broadcast_backend = broadcast_backend if broadcast_backend is not None else Win32BroadcastBackend()
+        self.broadcast_scheduler: Optional[BroadcastScheduler] = None
+        self.session_info_cache = session_info_cache
+        self.torn_read_retries = 0
+        self.array_type = array_type
+        self.sim_status_url = SIM_STATUS_URL
+        # A pooled session for status checks, e.g. the one kept by `ConnectionSupervisor`
+        self.http_session: Optional[aiohttp.ClientSession] = None
 
         self._shared_mem: Optional[mmap.mmap] = None
         self._header: Optional[Header] = None
@@ -44,25 +89,200 @@ class iRacingClient:
         self.__var_headers_dict: Optional[Dict[str, VarHeader]] = None
         self.__var_headers_names: Optional[List[str]] = None
         self.__var_buffer_latest: Optional[VarBuffer] = None
+        self.__compiled_readers: 'OrderedDict[Tuple[str, ...], CompiledReader]' = OrderedDict()
+        self.__var_readers: Dict[str, Tuple[struct.Struct, int, int, int]] = {}
+        self.__read_plans: 'OrderedDict[Tuple[str, ...], Tuple[List[str], Optional[CompiledReader]]]' = OrderedDict()
+        self.__derived_cache: Dict[str, Any] = {}
+        self.__derived_cache_tick: Optional[int] = None
         self.__session_info_dict: Dict[str, dict] = {}
-        self.__broadcast_msg_id: Optional[int] = None
         self.__test_file: Optional[TextIO] = None
         self.__workaround_connected_state = 0
 
     def __getitem__(self, key: str) -> Union[int, float, bool, str, List[Any], None]:
-        raise NotImplementedError("Use get() for asynchronous access.")
+        """
+        Reads a telemetry variable or derived channel synchronously, see `read()`.
+
+        Raises:
+            KeyError: If the key is neither, e.g. a session info section, which needs `await get(key)`.
+        """
+        if not self._is_telemetry(key):
+            raise KeyError(f'{key!r} is not a telemetry variable, use await get({key!r}) for session info')
+        return self.read(key)
 
     async def get(self, key: str) -> Union[int, float, bool, str, List[Any], None]:
+        start = time.perf_counter_ns() if self.instrumentation is not None else 0
+        if self._is_telemetry(key):
+            value = self._read_telemetry(key)
+        else:
+            value = await self._get_session_info(key)
+
+        if self.instrumentation is not None:
+            self.instrumentation.record('get', time.perf_counter_ns() - start)
+        return value
+
+    def read(self, key: str) -> Union[int, float, bool, str, List[Any], None]:
+        """
+        Reads a telemetry variable or derived channel without going through a coroutine.
+
+        Telemetry reads only unpack from memory, so they can be made from synchronous code. Session info is parsed
+        on first use and is only available through `get()`.
+
+        Returns:
+            The value, or None if the key is not a telemetry variable or derived channel.
+        """
+        start = time.perf_counter_ns() if self.instrumentation is not None else 0
+        if key in self.__var_readers:
+            value = self._read_var(key)
+        else:
+            value = self._read_telemetry(key) if self._is_telemetry(key) else None
+        if self.instrumentation is not None:
+            self.instrumentation.record('read', time.perf_counter_ns() - start)
+        return value
+
+    def _is_telemetry(self, key: str) -> bool:
+        return key in self.__var_readers or bool(self._var_headers_dict and key in self._var_headers_dict) or \
+            (self.derived_channels is not None and key in self.derived_channels)
+
+    def _read_telemetry(self, key: str) -> Union[int, float, bool, str, List[Any], None]:
         if self._var_headers_dict and key in self._var_headers_dict:
-            var_header = self._var_headers_dict[key]
-            var_buf_latest = self._var_buffer_latest
-            res = struct.unpack_from(
-                VAR_TYPE_MAP[var_header.type] * var_header.count,
-                var_buf_latest.get_memory(),
-                var_buf_latest.buf_offset + var_header.offset)
-            return res[0] if var_header.count == 1 else list(res)
+            return self._read_var(key)
+        var_buf_latest = self._var_buffer_latest
+        return self.derived_channels.evaluate(key, self._read_var, self._derived_cache(var_buf_latest.tick_count)) \
+            if var_buf_latest else None
+
+    async def get_consistent(self, keys: Iterable[str], max_retries: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        Reads several variables from the same tick, see `read_consistent()`.
 
-        return await self._get_session_info(key)
+        Keys that are not telemetry variables or derived channels are looked up in the session info.
+
+        Returns:
+            A dictionary of values keyed by name, or None if every attempt raced with the writer.
+        """
+        keys = tuple(dict.fromkeys(keys))
+        telemetry_values = self.read_consistent(keys, max_retries)
+        if telemetry_values is None:
+            return None
+        values: Dict[str, Any] = {}
+        for key in keys:
+            values[key] = telemetry_values[key] if key in telemetry_values else await self.get(key)
+        return values
+
+    def read_consistent(self, keys: Iterable[str], max_retries: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        Reads several variables from the same tick, without copying the whole buffer.
+
+        When the buffer is not frozen, the requested variables are unpacked straight from the same var buffer
+        `get()` reads, with a single precompiled struct, and the read is retried if the buffer's `tick_count`
+        changed while reading. Retries are counted in `torn_read_retries`.
+
+        Args:
+            keys: The variable names to read. Derived channels are computed from native variables read in the same pass,
+                other keys that are not telemetry variables are left out.
+            max_retries: The maximum number of retries after a torn read.
+
+        Returns:
+            A dictionary of values keyed by name, or None if every attempt raced with the writer.
+        """
+        keys = tuple(dict.fromkeys(keys))
+        # The same keys in any order or with repeats share a plan
+        plan_key = tuple(sorted(keys))
+        plan = self.__read_plans.get(plan_key)
+        if plan is None:
+            plan = self.__read_plans[plan_key] = self._read_plan(plan_key)
+            if len(self.__read_plans) > READ_PLAN_CACHE_SIZE:
+                self.__read_plans.popitem(last=False)
+        else:
+            self.__read_plans.move_to_end(plan_key)
+        derived_keys, reader = plan
+        native_values: Dict[str, Any] = {}
+        if reader is not None:
+            compiled_struct, base_offset, slots = reader
+            if self.__var_buffer_latest:
+                tick_count = self.__var_buffer_latest.tick_count
+                res = compiled_struct.unpack_from(self.__var_buffer_latest.get_memory(), base_offset)
+            else:
+                var_buf = self._var_buffer_latest
+                for _ in range(max_retries + 1):
+                    tick_count = var_buf.tick_count
+                    res = compiled_struct.unpack_from(self._shared_mem, var_buf.buf_offset + base_offset)
+                    if tick_count == var_buf.tick_count:
+                        break
+                    self.torn_read_retries += 1
+                    if self.instrumentation is not None:
+                        self.instrumentation.count('torn_read_retries')
+                else:
+                    return None
+            frozen = self.__var_buffer_latest is not None
+            for key, index, count in slots:
+                if count == 1:
+                    native_values[key] = res[index]
+                elif self.array_type == 'list':
+                    native_values[key] = list(res[index:index + count])
+                elif frozen:
+                    native_values[key] = self._read_var(key)
+                else:
+                    native_values[key] = self._array_from_values(key, res[index:index + count])
+            if derived_keys:
+                cache = self._derived_cache(tick_count)
+                for key in derived_keys:
+                    native_values[key] = self.derived_channels.evaluate(key, native_values.get, cache)
+        values: Dict[str, Any] = {}
+        for key in keys:
+            if key in native_values:
+                values[key] = native_values[key]
+            elif self._is_telemetry(key):
+                values[key] = self._read_telemetry(key)
+        return values
+
+    def _read_var(self, key: str) -> Union[int, float, bool, str, List[Any], None]:
+        """
+        Reads a telemetry variable from the latest (or frozen) var buffer, with a struct compiled once per variable.
+        """
+        reader = self.__var_readers.get(key)
+        if reader is None:
+            var_header = self._var_headers_dict.get(key) if self._var_headers_dict else None
+            if var_header is None:
+                return None
+            reader = self.__var_readers[key] = (struct.Struct(VAR_TYPE_MAP[var_header.type] * var_header.count),
+                                                var_header.offset, var_header.count, var_header.type)
+        compiled_struct, offset, count, var_type = reader
+        var_buf_latest = self._var_buffer_latest
+        if count > 1 and self.array_type != 'list':
+            return self._array_view(var_buf_latest, offset, count, var_type, compiled_struct.size)
+        res = compiled_struct.unpack_from(var_buf_latest.get_memory(), var_buf_latest.buf_offset + offset)
+        return res[0] if count == 1 else list(res)
+
+    def _array_view(self, var_buf: VarBuffer, offset: int, count: int, var_type: int, size: int) -> Any:
+        """
+        A typed view of an array variable, over the frozen snapshot or over a copy of the live buffer.
+        """
+        if var_buf.is_memory_frozen:
+            memory, start = var_buf.get_memory(), offset
+        else:
+            start = var_buf.buf_offset + offset
+            memory, start = self._shared_mem[start:start + size], 0
+        if self.array_type == 'numpy':
+            return np.frombuffer(memory, VAR_DTYPE_MAP[var_type], count, start)
+        return memoryview(memory)[start:start + size].cast(VAR_TYPE_MAP[var_type])
+
+    def _array_from_values(self, key: str, values: Tuple[Any, ...]) -> Any:
+        """
+        A typed array holding already unpacked values, for reads that must not touch the live buffer again.
+        """
+        var_type = self._var_headers_dict[key].type
+        if self.array_type == 'numpy':
+            return np.array(values, dtype=VAR_DTYPE_MAP[var_type])
+        return memoryview(struct.pack(VAR_TYPE_MAP[var_type] * len(values), *values)).cast(VAR_TYPE_MAP[var_type])
+
+    def _derived_cache(self, tick_count: int) -> Dict[str, Any]:
+        """
+        The derived channel values computed for the given tick.
+        """
+        if tick_count != self.__derived_cache_tick:
+            self.__derived_cache_tick = tick_count
+            self.__derived_cache = {}
+        return self.__derived_cache
 
     async def is_connected(self) -> bool:
         if self._header:
@@ -70,9 +290,10 @@ class iRacingClient:
                 self.__workaround_connected_state = 0
             if self.__workaround_connected_state == 0 and self._header.status != StatusField.status_connected:
                 self.__workaround_connected_state = 1
-            if self.__workaround_connected_state == 1 and (await self.get('SessionNum') is None or self.__test_file):
+            # read() only touches telemetry, so a missing SessionNum never falls into the session info path
+            if self.__workaround_connected_state == 1 and (self.read('SessionNum') is None or self.__test_file):
                 self.__workaround_connected_state = 2
-            if self.__workaround_connected_state == 2 and await self.get('SessionNum') is not None:
+            if self.__workaround_connected_state == 2 and self.read('SessionNum') is not None:
                 self.__workaround_connected_state = 3
         return self._header is not None and \
             (self.__test_file or self._data_valid_event) and \
@@ -135,21 +356,70 @@ class iRacingClient:
         Shuts down the iRacingClient and releases all resources.
         """
         self.is_initialized = False
-        self.last_session_info_update = 0
         if self._shared_mem:
             self._shared_mem.close()
             self._shared_mem = None
         self._header = None
         self._data_valid_event = None
+        self.reset_layout()
+        self.reset_session_info()
+        if self.broadcast_scheduler is not None:
+            self.broadcast_scheduler.close()
+            self.broadcast_scheduler = None
+        if self.__test_file:
+            self.__test_file.close()
+            self.__test_file = None
+
+    def reset_layout(self) -> None:
+        """
+        Drops everything derived from the variable layout: var headers, compiled readers and the frozen buffer.
+
+        Called when the sim restarted with a different set of variables.
+        """
         self.__var_headers = None
         self.__var_headers_dict = None
         self.__var_headers_names = None
         self.__var_buffer_latest = None
+        self.__compiled_readers = OrderedDict()
+        self.__var_readers = {}
+        self.__read_plans = OrderedDict()
+        self.__derived_cache = {}
+        self.__derived_cache_tick = None
+
+    def reset_session_info(self) -> None:
+        """
+        Drops the parsed session info, e.g. after a sim restart, where the update counter starts over.
+        """
+        self.last_session_info_update = 0
         self.__session_info_dict = {}
-        self.__broadcast_msg_id = None
-        if self.__test_file:
-            self.__test_file.close()
-            self.__test_file = None
+
+    def start_broadcast_scheduler(self, rate_limit: float = 30.0, burst: int = 5) -> BroadcastScheduler:
+        """
+        Starts queueing broadcast messages instead of sending them synchronously.
+
+        While the scheduler is running, the broadcast methods return futures, superseded commands are coalesced,
+        and messages are sent from a single worker task at most `rate_limit` per second.
+        Must be called from a running event loop.
+
+        Args:
+            rate_limit: The sustained number of messages per second.
+            burst: The number of messages that can be sent back to back before the rate limit applies.
+
+        Returns:
+            The running scheduler, whose `metrics` count submitted, sent and coalesced messages.
+        """
+        if self.broadcast_scheduler is None:
+            self.broadcast_scheduler = BroadcastScheduler(self.broadcast_backend, rate_limit, burst, self.instrumentation)
+        self.broadcast_scheduler.start()
+        return self.broadcast_scheduler
+
+    async def stop_broadcast_scheduler(self, drain: bool = True) -> None:
+        """
+        Stops the broadcast scheduler, after sending all queued messages when `drain` is True.
+        """
+        if self.broadcast_scheduler is not None:
+            scheduler, self.broadcast_scheduler = self.broadcast_scheduler, None
+            await scheduler.stop(drain)
 
     def parse_to(self, to_file: str) -> None:
         """
@@ -161,13 +431,33 @@ class iRacingClient:
         if not self.is_initialized:
             return
         with open(to_file, 'w', encoding='utf-8') as f:
-            f.write(self._shared_mem[self._header.session_info_offset:self._header.session_info_len].rstrip(b'\x00').decode(YAML_CODE_PAGE))
+            start = self._header.session_info_offset
+            f.write(self._shared_mem[start:start + self._header.session_info_len].rstrip(b'\x00').decode(YAML_CODE_PAGE))
             f.write('\n'.join([
                 '{:32}{}'.format(i, self[i])
                 for i in sorted(self._var_headers_dict.keys(), key=str.lower)
             ]))
 
-    def cam_switch_pos(self, position: int = 0, group: int = 1, camera: int = 0) -> int:
+    def snapshot(self, session_info: bool = True) -> Optional[bytes]:
+        """
+        Serializes the frozen tick (or a copy of the latest one) with every variable, and the session info
+        YAML unless `session_info` is False, into the binary format read back by `Snapshot`.
+        """
+        if not self.is_initialized:
+            return None
+        var_buf = self.__var_buffer_latest
+        return dump_snapshot(self._header, var_buf if var_buf and var_buf.is_memory_frozen else None, session_info)
+
+    def save_snapshot(self, to_file: str, session_info: bool = True) -> None:
+        """
+        Writes `snapshot()` to a file. Much faster and smaller than `parse_to()`.
+        """
+        data = self.snapshot(session_info)
+        if data is not None:
+            with open(to_file, 'wb') as f:
+                f.write(data)
+
+    def cam_switch_pos(self, position: int = 0, group: int = 1, camera: int = 0) -> BroadcastResult:
         """
         Switches the camera to a specific position.
 
@@ -177,11 +467,11 @@ class iRacingClient:
             camera: The camera to use.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.cam_switch_pos, position, group, camera)
 
-    def cam_switch_num(self, car_number: str = '1', group: int = 1, camera: int = 0) -> int:
+    def cam_switch_num(self, car_number: str = '1', group: int = 1, camera: int = 0) -> BroadcastResult:
         """
         Switches the camera to a specific car number.
 
@@ -191,11 +481,11 @@ class iRacingClient:
             camera: The camera to use.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.cam_switch_num, self._pad_car_num(car_number), group, camera)
 
-    def cam_set_state(self, camera_state: CameraState = CameraState.cam_tool_active) -> int:
+    def cam_set_state(self, camera_state: CameraState = CameraState.cam_tool_active) -> BroadcastResult:
         """
         Sets the state of the camera.
 
@@ -203,11 +493,11 @@ class iRacingClient:
             camera_state: The camera state to set.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.cam_set_state, camera_state)
 
-    def replay_set_play_speed(self, speed: int = 0, slow_motion: bool = False) -> int:
+    def replay_set_play_speed(self, speed: int = 0, slow_motion: bool = False) -> BroadcastResult:
         """
         Sets the replay play speed.
 
@@ -216,11 +506,11 @@ class iRacingClient:
             slow_motion: Whether to use slow motion.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.replay_set_play_speed, speed, 1 if slow_motion else 0)
 
-    def replay_set_play_position(self, pos_mode: ReplayPositionMode = ReplayPositionMode.begin, frame_num: int = 0) -> int:
+    def replay_set_play_position(self, pos_mode: ReplayPositionMode = ReplayPositionMode.begin, frame_num: int = 0) -> BroadcastResult:
         """
         Sets the replay play position.
 
@@ -229,11 +519,11 @@ class iRacingClient:
             frame_num: The frame number to seek to.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.replay_set_play_position, pos_mode, frame_num)
 
-    def replay_search(self, search_mode: ReplaySearchMode = ReplaySearchMode.to_start) -> int:
+    def replay_search(self, search_mode: ReplaySearchMode = ReplaySearchMode.to_start) -> BroadcastResult:
         """
         Searches the replay.
 
@@ -241,11 +531,11 @@ class iRacingClient:
             search_mode: The search mode to use.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.replay_search, search_mode)
 
-    def replay_set_state(self, state_mode: ReplayStateMode = ReplayStateMode.erase_tape) -> int:
+    def replay_set_state(self, state_mode: ReplayStateMode = ReplayStateMode.erase_tape) -> BroadcastResult:
         """
         Sets the replay state.
 
@@ -253,20 +543,20 @@ class iRacingClient:
             state_mode: The state mode to use.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.replay_set_state, state_mode)
 
-    def reload_all_textures(self) -> int:
+    def reload_all_textures(self) -> BroadcastResult:
         """
         Reloads all car textures.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.reload_textures, ReloadTexturesMode.all)
 
-    def reload_texture(self, car_idx: int = 0) -> int:
+    def reload_texture(self, car_idx: int = 0) -> BroadcastResult:
         """
         Reloads the texture for a specific car.
 
@@ -274,11 +564,11 @@ class iRacingClient:
             car_idx: The car index to reload the texture for.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.reload_textures, ReloadTexturesMode.car_idx, car_idx)
 
-    def chat_command(self, chat_command_mode: ChatCommandMode = ChatCommandMode.begin_chat) -> int:
+    def chat_command(self, chat_command_mode: ChatCommandMode = ChatCommandMode.begin_chat) -> BroadcastResult:
         """
         Sends a chat command.
 
@@ -286,11 +576,11 @@ class iRacingClient:
             chat_command_mode: The chat command mode to use.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.chat_command, chat_command_mode)
 
-    def chat_command_macro(self, macro_num: int = 0) -> int:
+    def chat_command_macro(self, macro_num: int = 0) -> BroadcastResult:
         """
         Sends a chat command macro.
 
@@ -298,11 +588,11 @@ class iRacingClient:
             macro_num: The macro number to send.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.chat_command, ChatCommandMode.macro, macro_num)
 
-    def pit_command(self, pit_command_mode: PitCommandMode = PitCommandMode.clear, var: int = 0) -> int:
+    def pit_command(self, pit_command_mode: PitCommandMode = PitCommandMode.clear, var: int = 0) -> BroadcastResult:
         """
         Sends a pit command.
 
@@ -311,11 +601,11 @@ class iRacingClient:
             var: An optional variable for the pit command.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.pit_command, pit_command_mode, var)
 
-    def telem_command(self, telem_command_mode: TelemCommandMode = TelemCommandMode.stop) -> int:
+    def telem_command(self, telem_command_mode: TelemCommandMode = TelemCommandMode.stop) -> BroadcastResult:
         """
         Sends a telemetry command.
 
@@ -323,11 +613,11 @@ class iRacingClient:
             telem_command_mode: The telemetry command mode to use.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.telem_command, telem_command_mode)
 
-    def ffb_command(self, ffb_command_mode: FFBCommandMode = FFBCommandMode.ffb_command_max_force, value: float = 0) -> int:
+    def ffb_command(self, ffb_command_mode: FFBCommandMode = FFBCommandMode.ffb_command_max_force, value: float = 0) -> BroadcastResult:
         """
         Sends a force feedback command.
 
@@ -336,11 +626,11 @@ class iRacingClient:
             value: The value for the command.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.ffb_command, ffb_command_mode, int(value * 65536))
 
-    def replay_search_session_time(self, session_num: int = 0, session_time_ms: int = 0) -> int:
+    def replay_search_session_time(self, session_num: int = 0, session_time_ms: int = 0) -> BroadcastResult:
         """
         Searches the replay to a specific session time.
 
@@ -349,11 +639,11 @@ class iRacingClient:
             session_time_ms: The session time in milliseconds to search for.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.replay_search_session_time, session_num, session_time_ms)
 
-    def video_capture(self, video_capture_mode: VideoCaptureMode = VideoCaptureMode.trigger_screen_shot) -> int:
+    def video_capture(self, video_capture_mode: VideoCaptureMode = VideoCaptureMode.trigger_screen_shot) -> BroadcastResult:
         """
         Sends a video capture command.
 
@@ -361,7 +651,7 @@ class iRacingClient:
             video_capture_mode: The video capture mode to use.
 
         Returns:
-            The result of the broadcast message.
+            The result of the broadcast message, or a future resolving to it when the broadcast scheduler is running.
         """
         return self._broadcast_msg(BroadcastMsg.video_capture, video_capture_mode)
 
@@ -370,8 +660,11 @@ class iRacingClient:
         Checks if the iRacing simulator is running.
         """
         try:
+            if self.http_session is not None:
+                async with self.http_session.get(self.sim_status_url) as response:
+                    return 'running:1' in await response.text()
             async with aiohttp.ClientSession() as session:
-                async with session.get(SIM_STATUS_URL) as response:
+                async with session.get(self.sim_status_url) as response:
                     text = await response.text()
                     return 'running:1' in text
         except aiohttp.ClientError as e:
@@ -381,10 +674,14 @@ class iRacingClient:
     @property
     def _var_buffer_latest(self) -> Optional[VarBuffer]:
         """
-        The latest telemetry variable buffer.
+        The frozen telemetry variable buffer, or the one unfrozen reads use: the buffer before the latest one,
+        which iRacing has finished writing. `get()` and `read_consistent()` both read from it.
         """
+        if self.__var_buffer_latest:
+            return self.__var_buffer_latest
         if self._header:
-            return sorted(self._header.var_buf, key=lambda v: v.tick_count, reverse=True)[1]
+            var_bufs = sorted(self._header.var_buf, key=lambda v: v.tick_count, reverse=True)
+            return var_bufs[min(1, len(var_bufs) - 1)]
         return None
 
     @property
@@ -393,10 +690,7 @@ class iRacingClient:
         A list of all the telemetry variable headers.
         """
         if self.__var_headers is None and self._header:
-            self.__var_headers = []
-            for i in range(self._header.num_vars):
-                var_header = VarHeader(_shared_mem=self._shared_mem, offset=self._header.var_header_offset + i * 144)
-                self._var_headers.append(var_header)
+            self.__var_headers = read_var_headers(self._shared_mem, self._header.var_header_offset, self._header.num_vars)
         return self.__var_headers
 
     @property
@@ -410,12 +704,119 @@ class iRacingClient:
                 self.__var_headers_dict[var_header.name] = var_header
         return self.__var_headers_dict
 
-    def freeze_var_buffer_latest(self) -> None:
+    def _read_plan(self, keys: Tuple[str, ...]) -> Tuple[List[str], Optional[CompiledReader]]:
+        """
+        The derived channels among the deduplicated `keys` and the compiled reader of the native variables
+        they need, for `read_consistent()`.
+        """
+        var_headers_dict = self._var_headers_dict or {}
+        derived_keys = [key for key in keys if key not in var_headers_dict
+                        and self.derived_channels is not None and key in self.derived_channels]
+        var_keys = tuple(sorted(set([key for key in keys if key in var_headers_dict] + [
+            key for key in (self.derived_channels.native_inputs(derived_keys) if derived_keys else [])
+            if key in var_headers_dict])))
+        return derived_keys, self._compiled_reader(var_keys) if var_keys else None
+
+    def _compiled_reader(self, keys: Tuple[str, ...]) -> CompiledReader:
+        """
+        A struct that unpacks the given variables with a single call, the offset of the first one
+        within the var buffer, and the (name, index, count) of each variable within the unpacked tuple.
+        """
+        reader = self.__compiled_readers.get(keys)
+        if reader is not None:
+            self.__compiled_readers.move_to_end(keys)
+        else:
+            var_headers = sorted((self._var_headers_dict[key] for key in keys), key=lambda v: v.offset)
+            base_offset = var_headers[0].offset
+            fmt = '<'
+            position = base_offset
+            index = 0
+            slots = []
+            for var_header in var_headers:
+                var_type = VAR_TYPE_MAP[var_header.type]
+                if var_header.offset > position:
+                    fmt += '%dx' % (var_header.offset - position)
+                fmt += var_type * var_header.count
+                position = var_header.offset + struct.calcsize('<' + var_type) * var_header.count
+                slots.append((var_header.name, index, var_header.count))
+                index += var_header.count
+            reader = self.__compiled_readers[keys] = (struct.Struct(fmt), base_offset, slots)
+            if len(self.__compiled_readers) > READ_PLAN_CACHE_SIZE:
+                self.__compiled_readers.popitem(last=False)
+        return reader
+
+    async def freeze_var_buffer_latest(self) -> bool:
+        """
+        Waits for the next tick and freezes a copy of the latest telemetry variable buffer,
+        so that all subsequent `get()` calls read from the same tick. See `freeze_var_buffer_now()`.
+        """
         self.unfreeze_var_buffer_latest()
-        self._wait_valid_data_event()
-        if self._header:
-            self.__var_buffer_latest = sorted(self._header.var_buf, key=lambda v: v.tick_count, reverse=True)[0]
-            self.__var_buffer_latest.freeze()
+        await self._wait_valid_data_event()
+        return self.freeze_var_buffer_now()
+
+    def freeze_var_buffer_now(self, max_retries: int = 2) -> bool:
+        """
+        Freezes a copy of the latest telemetry variable buffer without waiting for the next tick.
+
+        For synchronous readers that pace themselves, e.g. with their own frame timer. When every copy of the
+        latest buffer races with the writer, the previous tick's buffer is frozen instead, and if that races
+        too, nothing is frozen.
+
+        Args:
+            max_retries: The maximum number of retries per buffer after a torn copy.
+
+        Returns:
+            True if a consistent copy was frozen, False if the buffer was left unfrozen.
+        """
+        self.unfreeze_var_buffer_latest()
+        if not self._header:
+            return False
+        instrumentation = self.instrumentation
+        start = time.perf_counter_ns() if instrumentation is not None else 0
+        for var_buf in sorted(self._header.var_buf, key=lambda v: v.tick_count, reverse=True)[:2]:
+            retries = var_buf.freeze(max_retries)
+            if retries:
+                self.torn_read_retries += retries
+                if instrumentation is not None:
+                    instrumentation.count('torn_read_retries', retries)
+            if var_buf.is_memory_frozen:
+                self.__var_buffer_latest = var_buf
+                break
+        if instrumentation is not None:
+            instrumentation.record('freeze', time.perf_counter_ns() - start)
+            if self.__var_buffer_latest is None:
+                instrumentation.count('freeze_failures')
+            else:
+                instrumentation.record_tick(self.__var_buffer_latest.tick_count)
+        return self.__var_buffer_latest is not None
+
+    async def wait_for_change(self, keys: Iterable[str], timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        """
+        Waits, tick by tick, until any of the given variables changes.
+
+        Each tick is frozen with `freeze_var_buffer_latest()`, so after a change all `get()` calls
+        read from the tick the change was seen in.
+
+        Args:
+            keys: The variable names to watch.
+            timeout: The maximum time to wait, in seconds.
+
+        Returns:
+            The new values keyed by name, or None if nothing changed before the timeout.
+        """
+        keys = list(keys)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        previous = await self.get_consistent(keys)
+        while loop.time() < deadline:
+            if self._data_valid_event is None:
+                # Test files have no data valid event to wait on, so poll at the tick rate instead
+                await asyncio.sleep(1 / (self._header.tick_rate if self._header and self._header.tick_rate > 0 else 60))
+            await self.freeze_var_buffer_latest()
+            current = await self.get_consistent(keys)
+            if current != previous:
+                return current
+        return None
 
     def unfreeze_var_buffer_latest(self) -> None:
         if self.__var_buffer_latest:
@@ -432,7 +833,15 @@ class iRacingClient:
         Waits for the data valid event to be set by the iRacing simulator.
         """
         if self._data_valid_event is not None:
-            return await asyncio.to_thread(ctypes.windll.kernel32.WaitForSingleObject, self._data_valid_event, 32) == 0
+            instrumentation = self.instrumentation
+            if instrumentation is None:
+                return await asyncio.to_thread(ctypes.windll.kernel32.WaitForSingleObject, self._data_valid_event, 32) == 0
+            start = time.perf_counter_ns()
+            signaled = await asyncio.to_thread(ctypes.windll.kernel32.WaitForSingleObject, self._data_valid_event, 32) == 0
+            instrumentation.record('event_wait', time.perf_counter_ns() - start)
+            if not signaled:
+                instrumentation.count('event_timeouts')
+            return signaled
         return True
 
     async def _get_session_info(self, key: str) -> Union[Dict[str, Any], None]:
@@ -464,14 +873,7 @@ class iRacingClient:
         if not self._header:
             return None
         start = self._header.session_info_offset
-        end = start + self._header.session_info_len
-        match_start = re.compile(('\n%s:\n' % key).encode(YAML_CODE_PAGE)).search(self._shared_mem, start, end)
-        if not match_start:
-            return None
-        match_end = re.compile(b'\n\n').search(self._shared_mem, match_start.start() + 1, end)
-        if not match_end:
-            return None
-        return self._shared_mem[match_start.start() + 1: match_end.start()]
+        return find_section(self._shared_mem, start, start + self._header.session_info_len, key)
 
     async def _parse_yaml(self, key: str, session_data: dict) -> None:
         """
@@ -490,42 +892,31 @@ class iRacingClient:
             return
         session_data['data_binary'] = data_binary
 
-        yaml_src = await asyncio.to_thread(self._prepare_yaml, data_binary, key)
-        result = await asyncio.to_thread(yaml.load, yaml_src, Loader=CustomYamlSafeLoader)
-        if result and self.last_session_info_update == session_info_update:
-            session_data['data'] = result.get(key)
+        start = time.perf_counter_ns() if self.instrumentation is not None else 0
+        # The cache reads, writes and unpickles files, so it runs in the worker thread with the parse
+        result, cached = await asyncio.to_thread(load_section, self.session_info_cache, data_binary, key)
+        if self.instrumentation is not None:
+            self.instrumentation.record('session_info_cache_load' if cached else 'session_info_parse',
+                                        time.perf_counter_ns() - start)
+        if self.last_session_info_update == session_info_update:
+            session_data['data'] = result
             if session_data['data']:
                 session_data['update'] = session_info_update
             elif 'data_last' in session_data:
                 session_data['data'] = session_data['data_last']
 
-    def _prepare_yaml(self, data_binary: bytes, key: str) -> str:
-        """
-        Prepares the session info YAML for parsing.
-        """
-        yaml_src = re.sub(YamlReader.NON_PRINTABLE, '', data_binary.translate(YAML_TRANSLATER).rstrip(b'\x00').decode(YAML_CODE_PAGE))
-        if key == 'DriverInfo':
-            def name_replace(m: re.Match) -> str:
-                return m.group(1) + '"%s"' % re.sub(r'(["\\])', r'\\\1', m.group(2))
-            yaml_src = re.sub(r'((?:DriverSetupName|UserName|TeamName|AbbrevName|Initials): )(.*)', name_replace, yaml_src)
-        yaml_src = re.sub(r'(\w+: )(,.*)', r'\1"\2"', yaml_src)
-        return yaml_src
-
-    @property
-    def _broadcast_msg_id(self) -> int:
-        """
-        The ID of the broadcast message for sending commands to iRacing.
-        """
-        if self.__broadcast_msg_id is None:
-            self.__broadcast_msg_id = ctypes.windll.user32.RegisterWindowMessageW(BROADCAST_MSG_NAME)
-        return self.__broadcast_msg_id
-
-    def _broadcast_msg(self, broadcast_type: int = 0, var1: int = 0, var2: int = 0, var3: int = 0) -> int:
+    def _broadcast_msg(self, broadcast_type: int = 0, var1: int = 0, var2: int = 0, var3: int = 0) -> BroadcastResult:
         """
-        Broadcasts a message to the iRacing simulator.
+        Broadcasts a message to the iRacing simulator, or queues it when the broadcast scheduler is running.
         """
-        return ctypes.windll.user32.SendNotifyMessageW(0xFFFF, self._broadcast_msg_id,
-                                                     broadcast_type | var1 << 16, var2 | var3 << 16)
+        if self.broadcast_scheduler is not None:
+            return self.broadcast_scheduler.submit(broadcast_type, var1, var2, var3)
+        if self.instrumentation is None:
+            return self.broadcast_backend.send(broadcast_type, var1, var2, var3)
+        start = time.perf_counter_ns()
+        result = self.broadcast_backend.send(broadcast_type, var1, var2, var3)
+        self.instrumentation.record('broadcast', time.perf_counter_ns() - start)
+        return result
 
     def _pad_car_num(self, num: str) -> int:
         """
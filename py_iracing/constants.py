@@ -10,6 +10,7 @@ MEM_MAP_FILE_SIZE: int = 1164 * 1024
 BROADCAST_MSG_NAME: str = 'IRSDK_BROADCASTMSG'
 
 VAR_TYPE_MAP: List[str] = ['c', '?', 'i', 'I', 'f', 'd']
+VAR_DTYPE_MAP: List[str] = ['S1', '?', '<i4', '<u4', '<f4', '<f8']
 
 YAML_TRANSLATER: dict[int, int] = bytes.maketrans(b'\x81\x8D\x8F\x90\x9D', b'     ')
-YAML_CODE_PAGE: str = 'cp122'
\ No newline at end of file
+YAML_CODE_PAGE: str = 'cp1252'
\ No newline at end of file
@@ -0,0 +1,203 @@
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .constants import VAR_DTYPE_MAP
+from .ibt import IBT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class IBTDataset:
+    """
+    An ordered list of `IBT` files, e.g. the stints of a race, presented as one continuous sequence of records.
+
+    Records are addressed by global index. Channels are the union of the channels of all files, and values
+    of a channel missing from a file read as NaN. When a file's time channel starts before the previous file
+    ended, its times are shifted to continue one tick after it, so the timeline never goes backwards.
+    """
+
+    def __init__(self, files: Sequence[Union[str, IBT]], time_channel: str = 'SessionTime',
+                 continuous_time: bool = True) -> None:
+        """
+        Args:
+            files: Open `IBT` instances or paths, in timeline order. Paths are opened here and closed by `close()`.
+            time_channel: The channel holding the time of each record.
+            continuous_time: Whether to shift the time channel of each file to continue after the previous one.
+        """
+        if np is None:
+            raise ImportError('IBTDataset requires numpy, install it with: pip install py_iracing[numpy]')
+        self.time_channel = time_channel
+        self.files: List[IBT] = []
+        self._owned: List[IBT] = []
+        for ibt_file in files:
+            if not isinstance(ibt_file, IBT):
+                ibt = IBT()
+                ibt.open(ibt_file)
+                self._owned.append(ibt)
+                ibt_file = ibt
+            self.files.append(ibt_file)
+
+        counts = [ibt._disk_header.session_record_count for ibt in self.files]
+        self.starts: List[int] = [0]
+        for count in counts:
+            self.starts.append(self.starts[-1] + count)
+        self.schema: Dict[str, Tuple['np.dtype', int]] = self._reconcile()
+        self.time_offsets: List[float] = self._time_offsets() if continuous_time else [0.0] * len(self.files)
+
+    def close(self) -> None:
+        """
+        Closes the files this dataset opened.
+        """
+        for ibt in self._owned:
+            ibt.close()
+        self._owned = []
+
+    def __enter__(self) -> 'IBTDataset':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.starts[-1]
+
+    @property
+    def var_headers_names(self) -> List[str]:
+        return list(self.schema)
+
+    def _reconcile(self) -> Dict[str, Tuple['np.dtype', int]]:
+        """
+        The dtype and count of every channel, widened so all files fit and missing values can be NaN.
+        """
+        found: Dict[str, List[Tuple['np.dtype', int]]] = {}
+        for ibt in self.files:
+            for var_header in ibt._var_headers:
+                found.setdefault(var_header.name, []).append((np.dtype(VAR_DTYPE_MAP[var_header.type]), var_header.count))
+        schema = {}
+        for name, types in found.items():
+            dtype = np.result_type(*(dtype for dtype, _ in types))
+            counts = {count for _, count in types}
+            if (len(types) < len(self.files) or len(counts) > 1) and dtype.kind not in 'fS':
+                dtype = np.dtype(np.float64)
+            schema[name] = (dtype, max(counts))
+        return schema
+
+    def _time_offsets(self) -> List[float]:
+        offsets: List[float] = []
+        previous_end = None
+        for ibt in self.files:
+            offset = 0.0
+            times = ibt.get_array(self.time_channel, copy=False)
+            if times is not None and len(times):
+                first, last = float(times[0]), float(times[-1])
+                if previous_end is not None and first <= previous_end:
+                    offset = previous_end + 1.0 / (ibt._header.tick_rate or 60) - first
+                previous_end = last + offset
+            del times
+            offsets.append(offset)
+        return offsets
+
+    def locate(self, index: int) -> Tuple[int, int]:
+        """
+        Maps a global record index to a file index and the record index within that file.
+        """
+        if index < 0:
+            index += len(self)
+        if not (0 <= index < len(self)):
+            raise IndexError(f'Record {index} out of range')
+        file_index = bisect_right(self.starts, index) - 1
+        return file_index, index - self.starts[file_index]
+
+    def segments(self, start: int = 0, stop: Optional[int] = None) -> List[Tuple[int, int, int]]:
+        """
+        Splits the global records `start:stop` into (file index, start, stop) ranges within single files.
+
+        Pass the ranges to `IBT.get_array(copy=False)` or `IBT.iter_chunks()` to read them without copying.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        segments = []
+        for file_index, ibt in enumerate(self.files):
+            lo, hi = max(start, self.starts[file_index]), min(stop, self.starts[file_index + 1])
+            if lo < hi:
+                segments.append((file_index, lo - self.starts[file_index], hi - self.starts[file_index]))
+        return segments
+
+    def get(self, index: int, key: str) -> Any:
+        """
+        Gets the value of a channel at a global record index, NaN if that record's file lacks the channel.
+        """
+        if key not in self.schema:
+            return None
+        file_index, local_index = self.locate(index)
+        value = self.files[file_index].get(local_index, key)
+        if value is None:
+            return self._missing_value(key)
+        if key == self.time_channel:
+            value += self.time_offsets[file_index]
+        return value
+
+    def get_all(self, key: str) -> Optional['np.ndarray']:
+        return self.get_array(key)
+
+    def get_array(self, key: str, start: int = 0, stop: Optional[int] = None) -> Optional['np.ndarray']:
+        """
+        Returns a channel over the global records `start:stop` as one array in the reconciled dtype.
+        """
+        if key not in self.schema:
+            return None
+        dtype, count = self.schema[key]
+        segments = self.segments(start, stop)
+        length = sum(hi - lo for _, lo, hi in segments)
+        result = np.empty((length, count) if count > 1 else (length,), dtype)
+        position = 0
+        for file_index, lo, hi in segments:
+            target = result[position:position + hi - lo]
+            position += hi - lo
+            view = self.files[file_index].get_array(key, lo, hi, copy=False)
+            if view is None:
+                target[...] = self._missing_value(key)
+                continue
+            if view.ndim == 2 and view.shape[1] < count:
+                target[:, view.shape[1]:] = self._missing_value(key)
+                target = target[:, :view.shape[1]]
+            elif view.ndim == 1 and target.ndim == 2:
+                target[:, 1:] = self._missing_value(key)
+                target = target[:, 0]
+            np.copyto(target, view, casting='unsafe')
+            del view
+            if key == self.time_channel and self.time_offsets[file_index]:
+                target += self.time_offsets[file_index]
+        return result
+
+    def time_slice(self, start_time: float, end_time: float) -> Tuple[int, int]:
+        """
+        The global record range `start:stop` with times in `[start_time, end_time)`.
+        """
+        start = stop = None
+        for file_index, ibt in enumerate(self.files):
+            times = ibt.get_array(self.time_channel, copy=False)
+            if times is None:
+                continue
+            offset = self.time_offsets[file_index]
+            lo = int(np.searchsorted(times, start_time - offset, 'left'))
+            hi = int(np.searchsorted(times, end_time - offset, 'left'))
+            del times
+            if lo < hi:
+                if start is None:
+                    start = self.starts[file_index] + lo
+                stop = self.starts[file_index] + hi
+        if start is None:
+            return 0, 0
+        return start, stop
+
+    def get_time_slice(self, key: str, start_time: float, end_time: float) -> Optional['np.ndarray']:
+        """
+        Returns a channel for the records with times in `[start_time, end_time)`.
+        """
+        return self.get_array(key, *self.time_slice(start_time, end_time))
+
+    def _missing_value(self, key: str) -> Any:
+        return b'' if self.schema[key][0].kind == 'S' else np.nan
@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+STANDARD_GRAVITY: float = 9.80665
+
+
+@dataclass(frozen=True)
+class DerivedChannel:
+    """
+    A channel computed from other channels.
+
+    `func` is called with the values of `inputs`, in order. It should only use arithmetic that works
+    both on scalars and on NumPy arrays, so the same definition runs per tick and over whole IBT columns.
+    """
+    name: str
+    inputs: Tuple[str, ...]
+    func: Callable[..., Any]
+    unit: str = ''
+    desc: str = ''
+
+
+class DerivedChannels:
+    """
+    A registry of derived channels, declared as functions of native or other derived channels.
+
+    Pass a registry to `iRacingClient(derived_channels=...)` to make its channels readable through
+    `get()` and `get_consistent()`, where each one is evaluated at most once per tick and only when requested.
+    Use `evaluate_columns()` to compute them over whole `IBT` columns.
+    """
+
+    def __init__(self) -> None:
+        self._channels: Dict[str, DerivedChannel] = {}
+        self._order_cache: Dict[str, List[str]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._channels
+
+    def __getitem__(self, name: str) -> DerivedChannel:
+        return self._channels[name]
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._channels)
+
+    def register(self, name: str, inputs: Iterable[str], func: Optional[Callable[..., Any]] = None,
+                 unit: str = '', desc: str = '') -> Any:
+        """
+        Registers a derived channel. Can be used as a decorator when `func` is omitted.
+
+        Args:
+            name: The name of the channel.
+            inputs: The names of the channels `func` is computed from.
+            func: The function computing the channel.
+            unit: The unit of the channel.
+            desc: A description of the channel.
+        """
+        def decorator(f: Callable[..., Any]) -> Callable[..., Any]:
+            self._channels[name] = DerivedChannel(name, tuple(inputs), f, unit, desc)
+            self._order_cache = {}
+            return f
+
+        if func is None:
+            return decorator
+        decorator(func)
+        return None
+
+    def resolve(self, name: str) -> List[str]:
+        """
+        Returns the derived channels needed to compute `name`, dependencies first.
+
+        Raises:
+            ValueError: If the channel depends on itself.
+        """
+        order = self._order_cache.get(name)
+        if order is None:
+            order = []
+            self._visit(name, order, set())
+            self._order_cache[name] = order
+        return order
+
+    def _visit(self, name: str, order: List[str], visiting: Set[str]) -> None:
+        if name not in self._channels or name in order:
+            return
+        if name in visiting:
+            raise ValueError(f'Derived channel {name!r} has a circular dependency')
+        visiting.add(name)
+        for input_name in self._channels[name].inputs:
+            self._visit(input_name, order, visiting)
+        visiting.discard(name)
+        order.append(name)
+
+    def native_inputs(self, names: Iterable[str]) -> List[str]:
+        """
+        Returns the native channels needed to compute all of `names`.
+        """
+        native = {}
+        for name in names:
+            for derived_name in self.resolve(name):
+                for input_name in self._channels[derived_name].inputs:
+                    if input_name not in self._channels:
+                        native[input_name] = None
+        return list(native)
+
+    def evaluate(self, name: str, read: Callable[[str], Any], cache: Dict[str, Any]) -> Any:
+        """
+        Evaluates a derived channel, reading native channels with `read`.
+
+        `cache` holds the values already computed for the current tick and is updated in place,
+        so dependencies shared between channels are only computed once.
+        """
+        if name in cache:
+            return cache[name]
+        for derived_name in self.resolve(name):
+            if derived_name in cache:
+                continue
+            channel = self._channels[derived_name]
+            args = [cache[i] if i in self._channels else read(i) for i in channel.inputs]
+            cache[derived_name] = None if any(arg is None for arg in args) else channel.func(*args)
+        return cache[name]
+
+    def evaluate_columns(self, ibt: Any, names: Iterable[str], start: int = 0, stop: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Evaluates derived channels over whole `IBT` columns (or the records in `start:stop`).
+
+        Returns:
+            A dictionary of NumPy arrays keyed by channel name.
+        """
+        names = list(names)
+        cache: Dict[str, Any] = {}
+        columns: Dict[str, Any] = {}
+
+        def read(key: str) -> Any:
+            if key not in columns:
+                columns[key] = ibt.get_array(key, start, stop)
+            return columns[key]
+
+        return {name: self.evaluate(name, read, cache) for name in names}
+
+
+def _average(*values: Any) -> Any:
+    return sum(values) / len(values)
+
+
+def builtin_channels() -> DerivedChannels:
+    """
+    Returns a registry with commonly used derived channels.
+
+    Delta speed and fuel per lap are left out: a derived channel only sees the values of one tick (or the matching
+    rows of IBT columns), while both need earlier ticks. Fuel per lap is tracked by `StrategyEstimator`, and
+    delta speed over IBT columns is `np.diff(ibt.get_array('Speed'))`.
+    """
+    channels = DerivedChannels()
+    channels.register('LatG', ['LatAccel'], lambda a: a / STANDARD_GRAVITY, 'G', 'Lateral acceleration')
+    channels.register('LongG', ['LongAccel'], lambda a: a / STANDARD_GRAVITY, 'G', 'Longitudinal acceleration')
+    channels.register('VertG', ['VertAccel'], lambda a: a / STANDARD_GRAVITY, 'G', 'Vertical acceleration (including gravity)')
+    channels.register('CombinedG', ['LatG', 'LongG'], lambda lat, lon: (lat * lat + lon * lon) ** 0.5, 'G',
+                      'Combined lateral and longitudinal acceleration')
+    channels.register('SpeedKph', ['Speed'], lambda speed: speed * 3.6, 'km/h', 'Speed')
+    for tire in ('LF', 'RF', 'LR', 'RR'):
+        channels.register(f'{tire}tempAvg', [f'{tire}tempCL', f'{tire}tempCM', f'{tire}tempCR'], _average, 'C',
+                          f'{tire} tire average carcass temperature')
+    channels.register('TireTempAvg', ['LFtempAvg', 'RFtempAvg', 'LRtempAvg', 'RRtempAvg'], _average, 'C',
+                      'Average carcass temperature of all tires')
+    return channels
@@ -0,0 +1,269 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .ibt import IBT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+AGGREGATES: Tuple[str, ...] = ('min', 'max', 'mean', 'last')
+
+_FIELDS: Tuple[str, ...] = ('time', 'min', 'max', 'sum', 'count', 'last')
+
+
+def lttb(x: 'np.ndarray', y: 'np.ndarray', points: int) -> 'np.ndarray':
+    """
+    Largest-triangle-three-buckets: picks `points` samples that preserve the visual shape of a series.
+
+    Returns:
+        The indices of the picked samples, always including the first and the last.
+    """
+    _require_numpy()
+    length = len(x)
+    if points >= length:
+        return np.arange(length)
+    if points < 3:
+        raise ValueError('LTTB needs at least 3 points')
+    edges = np.linspace(1, length - 1, points - 1).astype(np.intp)
+    indices = np.empty(points, dtype=np.intp)
+    indices[0], indices[-1] = 0, length - 1
+    selected = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < points - 1 else length
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[selected] - avg_x) * (y[lo:hi] - y[selected]) - (x[selected] - x[lo:hi]) * (avg_y - y[selected]))
+        selected = lo + int(np.argmax(area))
+        indices[i + 1] = selected
+    return indices
+
+
+@dataclass
+class Buckets:
+    """
+    Bucketed aggregates of a series at one level of a `DownsamplePyramid`.
+
+    Attributes:
+        level: The pyramid level.
+        bucket_size: The number of samples in each bucket.
+        time: The time of the first sample in each bucket.
+        min, max, mean, last: The aggregates of each bucket.
+    """
+    level: int
+    bucket_size: int
+    time: 'np.ndarray'
+    min: 'np.ndarray'
+    max: 'np.ndarray'
+    mean: 'np.ndarray'
+    last: 'np.ndarray'
+
+
+class _Column:
+    """
+    A growable float64 array.
+    """
+
+    def __init__(self) -> None:
+        self.data = np.empty(64, dtype=np.float64)
+        self.size = 0
+
+    def extend(self, values: 'np.ndarray') -> None:
+        size = self.size + len(values)
+        if size > len(self.data):
+            data = np.empty(max(size, 2 * len(self.data)), dtype=np.float64)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        self.data[self.size:size] = values
+        self.size = size
+
+    @property
+    def values(self) -> 'np.ndarray':
+        return self.data[:self.size]
+
+
+class _Level:
+    """
+    One level of the pyramid, combining every `size` inputs (samples or buckets of the level below) into a bucket.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.columns = {name: _Column() for name in _FIELDS}
+        self.lttb_time = _Column()
+        self.lttb_value = _Column()
+        self._pending = {name: np.empty(0) for name in _FIELDS}
+        self._candidates = (np.empty(0), np.empty(0))
+        self._waiting: Optional[Tuple[List[float], List[float]]] = None
+        self._selected: Optional[Tuple[float, float]] = None
+
+    def add(self, inputs: Dict[str, 'np.ndarray']) -> Dict[str, 'np.ndarray']:
+        """
+        Adds inputs and returns the buckets they complete.
+        """
+        pending = {name: np.concatenate((self._pending[name], inputs[name])) for name in _FIELDS}
+        n = len(pending['time']) // self.size * self.size
+        size = self.size
+        complete = {
+            'time': pending['time'][:n:size],
+            'min': pending['min'][:n].reshape(-1, size).min(axis=1),
+            'max': pending['max'][:n].reshape(-1, size).max(axis=1),
+            'sum': pending['sum'][:n].reshape(-1, size).sum(axis=1),
+            'count': pending['count'][:n].reshape(-1, size).sum(axis=1),
+            'last': pending['last'][size - 1:n:size],
+        }
+        self._pending = {name: values[n:] for name, values in pending.items()}
+        for name in _FIELDS:
+            self.columns[name].extend(complete[name])
+        return complete
+
+    def add_candidates(self, time: 'np.ndarray', value: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        Adds LTTB candidates (samples or the points picked by the level below) and returns the newly picked points.
+
+        A bucket's point is picked once the next bucket is complete, as its average is the third triangle corner.
+        """
+        time = np.concatenate((self._candidates[0], time))
+        value = np.concatenate((self._candidates[1], value))
+        n = len(time) // self.size * self.size
+        self._candidates = (time[n:], value[n:])
+        picked_time, picked_value = [], []
+        for group_time, group_value in zip(time[:n].reshape(-1, self.size).tolist(), value[:n].reshape(-1, self.size).tolist()):
+            if self._selected is None:
+                self._selected = group_time[0], group_value[0]
+                picked_time.append(group_time[0])
+                picked_value.append(group_value[0])
+                continue
+            if self._waiting is not None:
+                avg_time, avg_value = sum(group_time) / self.size, sum(group_value) / self.size
+                selected_time, selected_value = self._selected
+                best, best_area = 0, -1.0
+                for i, (t, v) in enumerate(zip(*self._waiting)):
+                    area = abs((selected_time - avg_time) * (v - selected_value) - (selected_time - t) * (avg_value - selected_value))
+                    if area > best_area:
+                        best, best_area = i, area
+                self._selected = self._waiting[0][best], self._waiting[1][best]
+                picked_time.append(self._selected[0])
+                picked_value.append(self._selected[1])
+            self._waiting = group_time, group_value
+        picked = np.array(picked_time, dtype=np.float64), np.array(picked_value, dtype=np.float64)
+        self.lttb_time.extend(picked[0])
+        self.lttb_value.extend(picked[1])
+        return picked
+
+    def __len__(self) -> int:
+        return self.columns['time'].size
+
+
+class DownsamplePyramid:
+    """
+    Precomputed min/max/mean/last buckets and LTTB points of a series at several resolutions, for plotting.
+
+    Level 0 buckets `bucket_size` samples, and each level above combines `factor` buckets of the level below,
+    so a query is a lookup in the finest level that fits the requested number of points, never a rescan.
+    Samples can be added in bulk from `.ibt` files or one by one from a live session. The most recent,
+    still incomplete bucket of each level is left out of queries until it completes.
+    """
+
+    def __init__(self, bucket_size: int = 4, factor: int = 4, levels: int = 8) -> None:
+        """
+        Args:
+            bucket_size: The number of samples in each level 0 bucket.
+            factor: The number of buckets combined into one bucket of the next level.
+            levels: The number of levels.
+        """
+        _require_numpy()
+        if bucket_size < 1 or factor < 2 or levels < 1:
+            raise ValueError('bucket_size must be at least 1, factor at least 2 and levels at least 1')
+        self.bucket_size = bucket_size
+        self.factor = factor
+        self.levels: List[_Level] = [_Level(bucket_size)] + [_Level(factor) for _ in range(levels - 1)]
+        self.sample_count = 0
+
+    @classmethod
+    def from_arrays(cls, time: Sequence[float], value: Sequence[float], **kwargs: Any) -> 'DownsamplePyramid':
+        pyramid = cls(**kwargs)
+        pyramid.extend(time, value)
+        return pyramid
+
+    @classmethod
+    def from_ibt(cls, ibt: IBT, key: str, time_channel: str = 'SessionTime', chunk_size: int = 65536,
+                 **kwargs: Any) -> 'DownsamplePyramid':
+        """
+        Builds a pyramid from a scalar channel of an `.ibt` file, streaming it with `IBT.iter_chunks()`.
+        """
+        pyramid = cls(**kwargs)
+        for _, chunk in ibt.iter_chunks([time_channel, key], chunk_size):
+            if chunk[key].ndim != 1:
+                raise ValueError(f'Cannot downsample array channel {key!r}')
+            pyramid.extend(chunk[time_channel], chunk[key])
+        return pyramid
+
+    def append(self, time: float, value: float) -> None:
+        """
+        Adds a single sample, e.g. once per tick of a live session.
+        """
+        self.extend((time,), (value,))
+
+    def extend(self, time: Sequence[float], value: Sequence[float]) -> None:
+        """
+        Adds samples, which must come after every sample added before.
+        """
+        time = np.asarray(time, dtype=np.float64)
+        value = np.asarray(value, dtype=np.float64)
+        if time.shape != value.shape or time.ndim != 1:
+            raise ValueError('time and value must be 1-D arrays of the same length')
+        self.sample_count += len(time)
+        inputs = {'time': time, 'min': value, 'max': value, 'sum': value, 'count': np.ones(len(time)), 'last': value}
+        candidates = time, value
+        for level in self.levels:
+            inputs = level.add(inputs)
+            candidates = level.add_candidates(*candidates)
+
+    def level_for(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+                  max_points: int = 1000) -> Tuple[int, int, int]:
+        """
+        Picks the finest level with at most `max_points` buckets in `[start_time, end_time)`.
+
+        Returns:
+            The level, and the range of its buckets in the time range.
+        """
+        # There is always at least one level, and the coarsest one is used when none is coarse enough
+        for index, level in enumerate(self.levels):
+            lo, hi = self._range(level.columns['time'].values, start_time, end_time)
+            if hi - lo <= max_points:
+                break
+        return index, lo, hi
+
+    def query(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+              max_points: int = 1000) -> Buckets:
+        """
+        The bucketed aggregates of `[start_time, end_time)` at the finest level with at most `max_points` buckets.
+        """
+        index, lo, hi = self.level_for(start_time, end_time, max_points)
+        columns = {name: column.values[lo:hi] for name, column in self.levels[index].columns.items()}
+        return Buckets(index, self.bucket_size * self.factor ** index, columns['time'].copy(), columns['min'].copy(),
+                       columns['max'].copy(), columns['sum'] / columns['count'], columns['last'].copy())
+
+    def query_lttb(self, start_time: Optional[float] = None, end_time: Optional[float] = None,
+                   max_points: int = 1000) -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        The LTTB points of `[start_time, end_time)` at the finest level with at most `max_points` points.
+        """
+        for level in self.levels:
+            lo, hi = self._range(level.lttb_time.values, start_time, end_time)
+            if hi - lo <= max_points:
+                break
+        return level.lttb_time.values[lo:hi].copy(), level.lttb_value.values[lo:hi].copy()
+
+    @staticmethod
+    def _range(time: 'np.ndarray', start_time: Optional[float], end_time: Optional[float]) -> Tuple[int, int]:
+        lo = int(np.searchsorted(time, start_time, 'left')) if start_time is not None else 0
+        hi = int(np.searchsorted(time, end_time, 'left')) if end_time is not None else len(time)
+        return lo, max(lo, hi)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError('Downsampling requires numpy, install it with: pip install py_iracing[numpy]')
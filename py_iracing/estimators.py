@@ -0,0 +1,338 @@
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .enums import Flags
+
+ESTIMATOR_KEYS: List[str] = ['SessionTime', 'SessionTimeRemain', 'SessionFlags', 'FuelLevel', 'LapCompleted',
+                             'LapLastLapTime', 'OnPitRoad', 'CarIdxLapCompleted', 'CarIdxLastLapTime']
+
+CAUTION_FLAGS: Flags = Flags.yellow | Flags.yellow_waving | Flags.caution | Flags.caution_waving
+
+
+class RollingStats:
+    """
+    Mean and variance over the last `window` values (or all values), updated in O(1) with Welford's algorithm.
+    """
+
+    def __init__(self, window: Optional[int] = None) -> None:
+        if window is not None and window < 1:
+            raise ValueError('window must be at least 1')
+        self.window = window
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._values: List[float] = [0.0] * window if window else []
+        self._next = 0
+
+    def add(self, value: float) -> None:
+        if self.window:
+            if self.count == self.window:
+                self._remove(self._values[self._next])
+            self._values[self._next] = value
+            self._next = (self._next + 1) % self.window
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def _remove(self, value: float) -> None:
+        self.count -= 1
+        if not self.count:
+            self.mean = self._m2 = 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self._m2 = max(self._m2 - delta * (value - self.mean), 0.0)
+
+    @property
+    def variance(self) -> Optional[float]:
+        """
+        The sample variance, or None with fewer than two values.
+        """
+        return self._m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def std(self) -> Optional[float]:
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+    def is_outlier(self, value: float, sigmas: float, min_count: int = 3, min_std: float = 0.0) -> bool:
+        """
+        Whether `value` is more than `sigmas` standard deviations from the mean, once `min_count` values were added.
+        The standard deviation is taken to be at least `min_std`, so near-identical values do not make every
+        small change an outlier.
+        """
+        std = self.std
+        if self.count < min_count or std is None:
+            return False
+        return abs(value - self.mean) > sigmas * max(std, min_std, 1e-9)
+
+    def reset(self) -> None:
+        self.count = 0
+        self.mean = self._m2 = 0.0
+        self._next = 0
+
+
+class EWMA:
+    """
+    An exponentially weighted moving average, updated in O(1).
+    """
+
+    def __init__(self, alpha: float = 0.3) -> None:
+        if not 0 < alpha <= 1:
+            raise ValueError('alpha must be in (0, 1]')
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def add(self, value: float) -> float:
+        self.value = value if self.value is None else self.value + self.alpha * (value - self.value)
+        return self.value
+
+    def reset(self) -> None:
+        self.value = None
+
+
+@dataclass(frozen=True)
+class LapSample:
+    """
+    A completed lap seen by `StrategyEstimator`.
+
+    Attributes:
+        lap: The `LapCompleted` value at the end of the lap.
+        lap_time: The lap time in seconds, None if unknown.
+        fuel_used: The fuel used in litres.
+        rejected: Why the lap was left out of the estimates: 'pit', 'caution', 'fuel_outlier' or
+            'pace_outlier', or '' when it was used.
+    """
+    lap: int
+    lap_time: Optional[float]
+    fuel_used: float
+    rejected: str = ''
+
+
+@dataclass(frozen=True)
+class StrategyEstimate:
+    """
+    Fuel and pace predictions, each None until enough clean laps were seen.
+
+    Attributes:
+        fuel_per_lap: The weighted fuel use per lap in litres.
+        fuel_per_lap_std: The standard deviation of the fuel use over the window.
+        lap_time: The weighted lap time in seconds.
+        pace_trend: The weighted change of lap time from one lap to the next, in seconds.
+        laps_of_fuel: The laps the fuel in the tank lasts.
+        laps_remaining: The laps that fit in the time left in a timed session at the current pace.
+        fuel_to_finish: The fuel to add to finish, counting one more lap for the lap in progress when the clock
+            runs out. Negative when there is fuel to spare.
+    """
+    fuel_per_lap: Optional[float]
+    fuel_per_lap_std: Optional[float]
+    lap_time: Optional[float]
+    pace_trend: Optional[float]
+    laps_of_fuel: Optional[float]
+    laps_remaining: Optional[float]
+    fuel_to_finish: Optional[float]
+
+
+class StrategyEstimator:
+    """
+    Incremental fuel, pace and laps-remaining estimates for the player, and pace estimates for every car.
+
+    Call `update()` every tick with the values of `ESTIMATOR_KEYS` (or `update_from()`). The work per tick and the
+    memory are constant: at each lap boundary the lap's fuel use and time are added to rolling windows and
+    exponentially weighted averages. Laps with a pit visit or a caution flag are rejected, as are laps whose fuel
+    use or time is more than `outlier_sigmas` standard deviations from the window. `estimate()` can be called at
+    any tick without rescanning anything.
+
+    So that a real change of pace or fuel use (rain, a fuel saving mode) is not rejected forever, `outlier_run`
+    outliers in a row on the same side of the mean are taken as the new level: the window restarts from them.
+    """
+
+    def __init__(self, window: int = 5, alpha: float = 0.3, outlier_sigmas: float = 3.0, car_count: int = 64,
+                 outlier_floor: float = 0.005, outlier_run: int = 3) -> None:
+        """
+        Args:
+            window: The number of clean laps in the rolling windows.
+            alpha: The weight of the latest lap in the exponentially weighted averages.
+            outlier_sigmas: The distance from the window mean, in standard deviations, beyond which a lap is rejected.
+            car_count: The number of cars, the length of the `CarIdx*` arrays.
+            outlier_floor: The smallest standard deviation used for the outlier test, as a fraction of the window mean.
+            outlier_run: The number of outliers in a row after which they are taken as a new level.
+        """
+        self.outlier_sigmas = outlier_sigmas
+        self.outlier_floor = outlier_floor
+        self.outlier_run = outlier_run
+        self.fuel_stats = RollingStats(window)
+        self.lap_time_stats = RollingStats(window)
+        self.fuel_per_lap = EWMA(alpha)
+        self.lap_time = EWMA(alpha)
+        self.pace_trend = EWMA(alpha)
+        self.last_lap: Optional[LapSample] = None
+        self.car_lap_time: List[Optional[float]] = [None] * car_count
+        self.car_lap_time_stats = [RollingStats(window) for _ in range(car_count)]
+        self._alpha = alpha
+
+        self._lap: Optional[int] = None
+        self._lap_start_fuel: Optional[float] = None
+        self._lap_start_time: Optional[float] = None
+        self._pitted = False
+        self._caution = False
+        self._previous_lap_time: Optional[float] = None
+        self._fuel_level: Optional[float] = None
+        self._session_time_remain: Optional[float] = None
+        self._car_laps: List[int] = [-1] * car_count
+        self._car_pending: List[bool] = [False] * car_count
+        self._car_times: List[Optional[float]] = [None] * car_count
+        self._fuel_outliers: List[float] = []
+        self._lap_time_outliers: List[float] = []
+        self._car_outliers: List[List[float]] = [[] for _ in range(car_count)]
+
+    def update(self, values: Dict[str, Any]) -> Optional[LapSample]:
+        """
+        Takes the values of one tick.
+
+        Returns:
+            The lap that ended at this tick, if any.
+        """
+        fuel = values.get('FuelLevel')
+        lap = values.get('LapCompleted')
+        session_time = values.get('SessionTime')
+        self._fuel_level = fuel
+        remain = values.get('SessionTimeRemain')
+        self._session_time_remain = remain if remain is not None and 0 <= remain < 604800 else None
+        self._update_cars(values.get('CarIdxLapCompleted'), values.get('CarIdxLastLapTime'))
+        if fuel is None or lap is None:
+            return None
+
+        if values.get('OnPitRoad'):
+            self._pitted = True
+        if (values.get('SessionFlags') or 0) & CAUTION_FLAGS:
+            self._caution = True
+        if self._lap is None or lap < self._lap or lap > self._lap + 1:
+            # First tick, a reset or a jump: start over without a sample
+            self._start_lap(lap, fuel, session_time)
+            return None
+        if lap == self._lap:
+            return None
+
+        # LapLastLapTime lags the lap boundary, so it is only a fallback
+        lap_time = None
+        if session_time is not None and self._lap_start_time is not None:
+            lap_time = session_time - self._lap_start_time
+        elif (values.get('LapLastLapTime') or 0) > 0:
+            lap_time = values['LapLastLapTime']
+        sample = self._add_lap(lap, lap_time, self._lap_start_fuel - fuel)
+        self._start_lap(lap, fuel, session_time)
+        return sample
+
+    async def update_from(self, ir: Any) -> Optional[LapSample]:
+        """
+        Updates from an `iRacingClient`, reading every value from the same tick.
+        """
+        values = await ir.get_consistent(ESTIMATOR_KEYS)
+        return self.update(values) if values is not None else None
+
+    def _start_lap(self, lap: int, fuel: float, session_time: Optional[float]) -> None:
+        self._lap = lap
+        self._lap_start_fuel = fuel
+        self._lap_start_time = session_time
+        self._pitted = False
+        self._caution = False
+
+    def _add_lap(self, lap: int, lap_time: Optional[float], fuel_used: float) -> LapSample:
+        if self._pitted or fuel_used < 0:
+            rejected = 'pit'
+        elif self._caution:
+            rejected = 'caution'
+        else:
+            fuel = self._screen(self.fuel_stats, self._fuel_outliers, fuel_used)
+            pace = self._screen(self.lap_time_stats, self._lap_time_outliers, lap_time) if lap_time is not None else 'ok'
+            if fuel == 'shift':
+                self._restart(self.fuel_stats, self.fuel_per_lap, self._fuel_outliers)
+            if pace == 'shift':
+                self._restart(self.lap_time_stats, self.lap_time, self._lap_time_outliers)
+                self._previous_lap_time = lap_time
+            rejected = 'fuel_outlier' if fuel == 'outlier' else 'pace_outlier' if pace == 'outlier' else ''
+            if not rejected:
+                if fuel == 'ok':
+                    self.fuel_stats.add(fuel_used)
+                    self.fuel_per_lap.add(fuel_used)
+                if pace == 'ok' and lap_time is not None:
+                    self.lap_time_stats.add(lap_time)
+                    self.lap_time.add(lap_time)
+                    if self._previous_lap_time is not None:
+                        self.pace_trend.add(lap_time - self._previous_lap_time)
+                    self._previous_lap_time = lap_time
+        if rejected:
+            # The next clean lap is not consecutive with the previous one, so it gives no trend
+            self._previous_lap_time = None
+        self.last_lap = LapSample(lap, lap_time, fuel_used, rejected)
+        return self.last_lap
+
+    def _screen(self, stats: RollingStats, outliers: List[float], value: float) -> str:
+        """
+        Returns 'ok' for a value within the window, 'outlier' for an outlier, or 'shift' when the value completes
+        a run of `outlier_run` outliers on the same side of the mean, which are kept in `outliers`.
+        """
+        if not stats.is_outlier(value, self.outlier_sigmas, min_std=self.outlier_floor * abs(stats.mean)):
+            outliers.clear()
+            return 'ok'
+        if outliers and (outliers[0] > stats.mean) != (value > stats.mean):
+            outliers.clear()
+        outliers.append(value)
+        return 'shift' if len(outliers) >= self.outlier_run else 'outlier'
+
+    @staticmethod
+    def _restart(stats: RollingStats, average: EWMA, outliers: List[float]) -> None:
+        """
+        Restarts a window and its average from a run of outliers.
+        """
+        stats.reset()
+        average.reset()
+        for value in outliers:
+            stats.add(value)
+            average.add(value)
+        outliers.clear()
+
+    def _update_cars(self, car_laps: Optional[List[int]], car_lap_times: Optional[List[float]]) -> None:
+        """
+        `CarIdxLastLapTime` is updated some ticks after `CarIdxLapCompleted`, so a car's lap time is taken
+        when it changes after its lap count went up.
+        """
+        if car_laps is None or car_lap_times is None:
+            return
+        for car_idx in range(min(len(car_laps), len(self._car_laps))):
+            lap, lap_time = car_laps[car_idx], car_lap_times[car_idx]
+            previous_lap = self._car_laps[car_idx]
+            if lap != previous_lap:
+                self._car_laps[car_idx] = lap
+                self._car_pending[car_idx] = previous_lap >= 0 and lap == previous_lap + 1
+            if self._car_pending[car_idx] and lap_time != self._car_times[car_idx] and lap_time > 0:
+                self._car_pending[car_idx] = False
+                stats, outliers = self.car_lap_time_stats[car_idx], self._car_outliers[car_idx]
+                screened = self._screen(stats, outliers, lap_time)
+                if screened == 'ok':
+                    stats.add(lap_time)
+                    current = self.car_lap_time[car_idx]
+                    self.car_lap_time[car_idx] = lap_time if current is None else current + self._alpha * (lap_time - current)
+                elif screened == 'shift':
+                    average = EWMA(self._alpha)
+                    self._restart(stats, average, outliers)
+                    self.car_lap_time[car_idx] = average.value
+            self._car_times[car_idx] = lap_time
+
+    def estimate(self) -> StrategyEstimate:
+        """
+        The predictions as of the latest tick.
+        """
+        fuel_per_lap = self.fuel_per_lap.value
+        lap_time = self.lap_time.value
+        fuel = self._fuel_level
+        laps_of_fuel = fuel / fuel_per_lap if fuel is not None and fuel_per_lap else None
+        laps_remaining = self._session_time_remain / lap_time if lap_time and self._session_time_remain is not None else None
+        fuel_to_finish = None
+        if laps_remaining is not None and fuel_per_lap is not None and fuel is not None:
+            fuel_to_finish = (laps_remaining + 1.0) * fuel_per_lap - fuel
+        return StrategyEstimate(fuel_per_lap, self.fuel_stats.std, lap_time, self.pace_trend.value, laps_of_fuel,
+                                laps_remaining, fuel_to_finish)
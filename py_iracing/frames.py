@@ -0,0 +1,136 @@
+import importlib.util
+import re
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FRAME_BACKENDS: Tuple[str, ...] = ('auto', 'pandas', 'polars')
+
+_ELEMENT = re.compile(r'^(.+)\[(\d+)\]$')
+
+# A column name, its channel and the element of an array channel (None for scalar channels)
+Column = Tuple[str, str, Optional[int]]
+
+
+def to_frame(ibt: Any, channels: Optional[Sequence[str]] = None,
+             time_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+             backend: str = 'auto', copy: bool = False) -> Any:
+    """
+    The records of an `IBT` file as a pandas DataFrame or a polars LazyFrame. See `IBT.to_frame()`.
+    """
+    if backend not in FRAME_BACKENDS:
+        raise ValueError(f'backend must be one of {FRAME_BACKENDS}')
+    if np is None:
+        raise ImportError('IBT.to_frame requires numpy, install it with: pip install py_iracing[numpy]')
+    if ibt.metadata_only:
+        raise ValueError('to_frame() needs the records, open the file without metadata_only')
+    if backend == 'auto':
+        backend = 'polars' if importlib.util.find_spec('polars') is not None else 'pandas'
+    columns = _columns(ibt, channels)
+    start, stop = _record_range(ibt, time_range)
+    if backend == 'polars':
+        return _to_polars(ibt, columns, start, stop)
+    return _to_pandas(ibt, columns, start, stop, copy)
+
+
+def _columns(ibt: Any, channels: Optional[Sequence[str]]) -> List[Column]:
+    """
+    Resolves channels to columns. Array channels expand to one column per element, named like
+    `CarIdxLapDistPct[3]`, and a single element can be asked for by that name. Without channels,
+    every scalar channel is included.
+    """
+    var_headers = ibt._var_headers_dict
+    if channels is None:
+        return [(name, name, None) for name, var_header in var_headers.items() if var_header.count == 1]
+    columns = []
+    for channel in channels:
+        match = _ELEMENT.match(channel)
+        if channel not in var_headers and match and match.group(1) in var_headers:
+            key, index = match.group(1), int(match.group(2))
+            if index >= var_headers[key].count:
+                raise KeyError(f'{channel!r} is out of range, {key!r} has {var_headers[key].count} elements')
+            columns.append((channel, key, index))
+        elif channel in var_headers:
+            count = var_headers[channel].count
+            if count == 1:
+                columns.append((channel, channel, None))
+            else:
+                columns.extend((f'{channel}[{index}]', channel, index) for index in range(count))
+        else:
+            raise KeyError(f'{channel!r} is not in {ibt.file_name}')
+    return columns
+
+
+def _record_range(ibt: Any, time_range: Optional[Tuple[Optional[float], Optional[float]]]) -> Tuple[int, int]:
+    """
+    The records with `SessionTime` in `[start_time, end_time)`.
+    """
+    record_count = ibt._disk_header.session_record_count
+    if time_range is None:
+        return 0, record_count
+    start_time, end_time = time_range
+    times = ibt.get_array('SessionTime', copy=False)
+    if times is None:
+        raise KeyError(f'time_range needs SessionTime, which is not in {ibt.file_name}')
+    start = int(np.searchsorted(times, start_time, 'left')) if start_time is not None else 0
+    stop = int(np.searchsorted(times, end_time, 'left')) if end_time is not None else record_count
+    del times
+    return start, max(start, stop)
+
+
+def _column(ibt: Any, key: str, index: Optional[int], start: int, stop: int) -> 'np.ndarray':
+    view = ibt.get_array(key, start, stop, copy=False)
+    return view[:, index] if index is not None else view
+
+
+def _to_pandas(ibt: Any, columns: List[Column], start: int, stop: int, copy: bool) -> Any:
+    pd = _import('pandas')
+    data = {}
+    for name, key, index in columns:
+        view = _column(ibt, key, index, start, stop)
+        data[name] = view.copy() if copy else view
+    return pd.DataFrame(data, index=pd.RangeIndex(start, stop), copy=False)
+
+
+def _to_polars(ibt: Any, columns: List[Column], start: int, stop: int) -> Any:
+    pl = _import('polars')
+    from polars.io.plugins import register_io_source
+
+    by_name = {name: (key, index) for name, key, index in columns}
+    var_headers = ibt._var_headers_dict
+    # In the order of VAR_TYPE_MAP
+    dtypes = [pl.Binary, pl.Boolean, pl.Int32, pl.UInt32, pl.Float32, pl.Float64]
+    schema = {name: dtypes[var_headers[key].type] for name, key, _ in columns}
+
+    def source(with_columns: Optional[List[str]], predicate: Any, n_rows: Optional[int],
+               batch_size: Optional[int]) -> Iterator[Any]:
+        names = with_columns if with_columns is not None else list(by_name)
+        remaining = n_rows
+        batch_size = batch_size or 65536
+        for lo in range(start, stop, batch_size):
+            hi = min(lo + batch_size, stop)
+            if remaining is not None and predicate is None:
+                hi = min(hi, lo + remaining)
+            # Building the batch is the single copy out of the file's mmap
+            batch = pl.DataFrame({name: _column(ibt, *by_name[name], lo, hi) for name in names}, schema=
+                                 {name: schema[name] for name in names})
+            if predicate is not None:
+                batch = batch.filter(predicate)
+            if remaining is not None:
+                batch = batch.head(remaining)
+                remaining -= len(batch)
+            yield batch
+            if remaining is not None and remaining <= 0:
+                return
+
+    return register_io_source(source, schema=schema)
+
+
+def _import(name: str) -> Any:
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ImportError(f'IBT.to_frame with {name} requires {name}, install it with: pip install py_iracing[{name}]') from None
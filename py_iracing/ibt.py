@@ -1,22 +1,45 @@
 import mmap
 import struct
-from typing import Any, Dict, List, Optional, TextIO
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
 
-from .constants import VAR_TYPE_MAP
-from .structs import DiskSubHeader, Header, VarHeader
+from .constants import VAR_DTYPE_MAP, VAR_TYPE_MAP
+from .frames import to_frame
+from .instrumentation import Instrumentation
+from .session_cache import SessionInfoCache, load_section
+from .structs import VAR_HEADER_SIZE, DiskSubHeader, Header, VarHeader, read_var_headers
+from .yaml_parser import find_section
+
+# The main header followed by the disk sub-header
+_FILE_HEADER_SIZE = 144
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class IBT:
-    def __init__(self) -> None:
+    def __init__(self, instrumentation: Optional[Instrumentation] = None,
+                 session_info_cache: Optional[SessionInfoCache] = None) -> None:
+        """
+        Args:
+            instrumentation: Optional instrumentation to record read latencies in.
+            session_info_cache: Optional on-disk cache of parsed session info sections, shared across files.
+        """
+        self.instrumentation = instrumentation
+        self.session_info_cache = session_info_cache
+        self.metadata_only = False
         self._ibt_file: Optional[TextIO] = None
-        self._shared_mem: Optional[mmap.mmap] = None
+        self._shared_mem: Union[mmap.mmap, bytes, None] = None
         self._header: Optional[Header] = None
         self._disk_header: Optional[DiskSubHeader] = None
 
         self.__var_headers: Optional[List[VarHeader]] = None
         self.__var_headers_dict: Optional[Dict[str, VarHeader]] = None
         self.__var_headers_names: Optional[List[str]] = None
-        self.__session_info_dict: Optional[dict] = None
+        self.__session_info_dict: Dict[str, Any] = {}
+        self.__record_dtypes: Dict[Tuple[str, ...], 'np.dtype'] = {}
 
     def __getitem__(self, key: str) -> Any:
         return self.get(self._disk_header.session_record_count - 1, key)
@@ -37,14 +60,36 @@ class IBT:
             self.__var_headers_names = [var_header.name for var_header in self._var_headers]
         return self.__var_headers_names
 
-    def open(self, ibt_file: str) -> None:
+    def open(self, ibt_file: str, metadata_only: bool = False) -> None:
+        """
+        Opens a telemetry file.
+
+        Args:
+            ibt_file: The path of the file.
+            metadata_only: Read only the headers, var headers and session info, without mapping the records.
+                Telemetry reads then return None, which makes scanning many files cheap.
+        """
         self._ibt_file = open(ibt_file, 'rb')
-        self._shared_mem = mmap.mmap(self._ibt_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.metadata_only = metadata_only
+        if metadata_only:
+            self._shared_mem = self._read_metadata()
+        else:
+            self._shared_mem = mmap.mmap(self._ibt_file.fileno(), 0, access=mmap.ACCESS_READ)
         self._header = Header(self._shared_mem)
         self._disk_header = DiskSubHeader(self._shared_mem, 112)
 
+    def _read_metadata(self) -> bytes:
+        """
+        Reads everything in front of the record area.
+        """
+        data = self._ibt_file.read(_FILE_HEADER_SIZE)
+        header = Header(data)
+        end = max(header.var_header_offset + header.num_vars * VAR_HEADER_SIZE,
+                  header.session_info_offset + header.session_info_len)
+        return data + self._ibt_file.read(max(0, end - len(data)))
+
     def close(self) -> None:
-        if self._shared_mem:
+        if isinstance(self._shared_mem, mmap.mmap):
             self._shared_mem.close()
 
         if self._ibt_file:
@@ -58,25 +103,52 @@ class IBT:
         self.__var_headers = None
         self.__var_headers_dict = None
         self.__var_headers_names = None
-        self.__session_info_dict = None
+        self.__session_info_dict = {}
+        self.__record_dtypes = {}
+        self.metadata_only = False
 
-    def get(self, index: int, key: str) -> Any:
+    def session_info(self, key: str) -> Any:
+        """
+        Gets a section of the session info YAML, e.g. 'WeekendInfo' or 'DriverInfo'.
+
+        Sections are parsed on first use and kept until the file is closed.
+        """
         if not self._header:
             return None
+        if key not in self.__session_info_dict:
+            start = self._header.session_info_offset
+            data_binary = find_section(self._shared_mem, start, start + self._header.session_info_len, key)
+            value = None
+            if data_binary:
+                start_ns = time.perf_counter_ns() if self.instrumentation is not None else 0
+                value, from_cache = load_section(self.session_info_cache, data_binary, key)
+                if self.instrumentation is not None:
+                    self.instrumentation.record('session_info_cache_load' if from_cache else 'session_info_parse',
+                                                time.perf_counter_ns() - start_ns)
+            self.__session_info_dict[key] = value
+        return self.__session_info_dict[key]
+
+    def get(self, index: int, key: str) -> Any:
+        if not self._header or self.metadata_only:
+            return None
         if not (0 <= index < self._disk_header.session_record_count):
             return None
         if key in self._var_headers_dict:
+            start = time.perf_counter_ns() if self.instrumentation is not None else 0
             var_header = self._var_headers_dict[key]
             fmt = VAR_TYPE_MAP[var_header.type] * var_header.count
             var_offset = var_header.offset + self._header.var_buf[0].buf_offset + index * self._header.buf_len
             res = struct.unpack_from(fmt, self._shared_mem, var_offset)
+            if self.instrumentation is not None:
+                self.instrumentation.record('get', time.perf_counter_ns() - start)
             return list(res) if var_header.count > 1 else res[0]
         return None
 
     def get_all(self, key: str) -> Optional[List[Any]]:
-        if not self._header:
+        if not self._header or self.metadata_only:
             return None
         if key in self._var_headers_dict:
+            start = time.perf_counter_ns() if self.instrumentation is not None else 0
             var_header = self._var_headers_dict[key]
             fmt = VAR_TYPE_MAP[var_header.type] * var_header.count
             var_offset = var_header.offset + self._header.var_buf[0].buf_offset
@@ -86,18 +158,146 @@ class IBT:
             for i in range(self._disk_header.session_record_count):
                 res = struct.unpack_from(fmt, self._shared_mem, var_offset + i * buf_len)
                 results.append(list(res) if is_array else res[0])
+            if self.instrumentation is not None:
+                self.instrumentation.record('get_all', time.perf_counter_ns() - start)
             return results
         return None
 
+    def get_array(self, key: str, start: int = 0, stop: Optional[int] = None, copy: bool = True) -> Optional['np.ndarray']:
+        """
+        Returns a whole channel (or the records in `start:stop`) as a NumPy array.
+
+        Array variables are returned as 2-D arrays of shape (records, count). With `copy=False` the array
+        is a strided view over the file's mmap, which must be released before calling `close()`.
+        """
+        if np is None:
+            raise ImportError('IBT.get_array requires numpy, install it with: pip install py_iracing[numpy]')
+        if not self._header or self.metadata_only or key not in self._var_headers_dict:
+            return None
+        record_count = self._disk_header.session_record_count
+        start, stop, _ = slice(start, stop).indices(record_count)
+        stop = max(start, stop)
+        var_header = self._var_headers_dict[key]
+        dtype = np.dtype(VAR_DTYPE_MAP[var_header.type])
+        buf_len = self._header.buf_len
+        offset = self._header.var_buf[0].buf_offset + start * buf_len + var_header.offset
+        if var_header.count > 1:
+            shape, strides = (stop - start, var_header.count), (buf_len, dtype.itemsize)
+        else:
+            shape, strides = (stop - start,), (buf_len,)
+        start_ns = time.perf_counter_ns() if self.instrumentation is not None else 0
+        view = np.ndarray(shape, dtype, buffer=self._shared_mem, offset=offset, strides=strides)
+        result = view.copy() if copy else view
+        if self.instrumentation is not None:
+            self.instrumentation.record('get_array', time.perf_counter_ns() - start_ns)
+        return result
+
+    def iter_chunks(self, channels: Sequence[str], chunk_size: int = 4096,
+                    start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, 'np.ndarray']]]:
+        """
+        Streams channels in chunks of consecutive records, with constant memory use.
+
+        Each chunk is gathered from the file through a structured view compiled once per channel list, into
+        arrays that are allocated once and reused, so the yielded arrays are overwritten by the next chunk.
+        Copy them to keep them.
+
+        Args:
+            channels: The channels to read.
+            chunk_size: The number of records per chunk.
+            start: The first record to read.
+            stop: The record to stop at, or None to read to the end.
+
+        Returns:
+            An iterator of (first record index, arrays keyed by channel) tuples.
+        """
+        if np is None:
+            raise ImportError('IBT.iter_chunks requires numpy, install it with: pip install py_iracing[numpy]')
+        if not self._header:
+            return
+        if self.metadata_only:
+            raise ValueError(f'{self.file_name} was opened with metadata_only')
+        channels = tuple(channels)
+        record_dtype = self._record_dtype(channels)
+        start, stop, _ = slice(start, stop).indices(self._disk_header.session_record_count)
+        chunk_size = max(1, min(chunk_size, stop - start))
+        columns = {key: np.empty((chunk_size,) + record_dtype.fields[key][0].shape, record_dtype.fields[key][0].base)
+                   for key in channels}
+        buf_len = self._header.buf_len
+        data_offset = self._header.var_buf[0].buf_offset
+
+        for chunk_start in range(start, stop, chunk_size):
+            count = min(chunk_size, stop - chunk_start)
+            start_ns = time.perf_counter_ns() if self.instrumentation is not None else 0
+            view = np.ndarray((count,), record_dtype, buffer=self._shared_mem, offset=data_offset + chunk_start * buf_len)
+            chunk = {}
+            for key in channels:
+                np.copyto(columns[key][:count], view[key])
+                chunk[key] = columns[key][:count]
+            # Release the view of the mmap before handing control back, so close() never finds it exported
+            del view
+            if self.instrumentation is not None:
+                self.instrumentation.record('iter_chunk', time.perf_counter_ns() - start_ns)
+            yield chunk_start, chunk
+
+    def iter_records(self, channels: Sequence[str], chunk_size: int = 4096,
+                     start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[Any, ...]]:
+        """
+        Iterates over records, yielding a tuple with the values of `channels` for each record.
+
+        Values are read with `iter_chunks()`, so memory use stays constant however large the file is.
+        """
+        channels = tuple(channels)
+        for _, chunk in self.iter_chunks(channels, chunk_size, start, stop):
+            yield from zip(*(chunk[key].tolist() for key in channels))
+
+    def to_frame(self, channels: Optional[Sequence[str]] = None,
+                 time_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+                 backend: str = 'auto', copy: bool = False) -> Any:
+        """
+        Returns records as a pandas DataFrame, or a polars LazyFrame.
+
+        With pandas, each column is a strided view over the file's mmap (or a single copy with `copy=True`), so
+        nothing is decoded up front and only the pages of the columns that are touched are read. The frame must be
+        released before calling `close()` unless it was copied. With polars, the LazyFrame reads the file when
+        collected, and only the selected columns and the records within any `head()` are copied out of it.
+
+        Args:
+            channels: The channels to include, all scalar channels by default. Array channels expand to one column
+                per element, like `CarIdxLapDistPct[0]`, and a single element can be selected by that name.
+            time_range: The (start, end) `SessionTime` of the records to include, either end None for open.
+            backend: 'pandas', 'polars', or 'auto' for polars when it is installed and pandas otherwise.
+            copy: Copy the pandas columns out of the mmap.
+        """
+        return to_frame(self, channels, time_range, backend, copy)
+
+    def _record_dtype(self, channels: Tuple[str, ...]) -> 'np.dtype':
+        """
+        A structured dtype spanning a whole record, with a field for each channel at its offset.
+        """
+        record_dtype = self.__record_dtypes.get(channels)
+        if record_dtype is None:
+            formats = []
+            for key in channels:
+                if key not in self._var_headers_dict:
+                    raise KeyError(f'{self.file_name} has no {key!r} channel')
+                var_header = self._var_headers_dict[key]
+                dtype = np.dtype(VAR_DTYPE_MAP[var_header.type])
+                formats.append((dtype, (var_header.count,)) if var_header.count > 1 else dtype)
+            record_dtype = np.dtype({
+                'names': list(channels),
+                'formats': formats,
+                'offsets': [self._var_headers_dict[key].offset for key in channels],
+                'itemsize': self._header.buf_len,
+            })
+            self.__record_dtypes[channels] = record_dtype
+        return record_dtype
+
     @property
     def _var_headers(self) -> Optional[List[VarHeader]]:
         if not self._header:
             return None
         if self.__var_headers is None:
-            self.__var_headers = []
-            for i in range(self._header.num_vars):
-                var_header = VarHeader(self._shared_mem, self._header.var_header_offset + i * 144)
-                self._var_headers.append(var_header)
+            self.__var_headers = read_var_headers(self._shared_mem, self._header.var_header_offset, self._header.num_vars)
         return self.__var_headers
 
     @property
@@ -0,0 +1,192 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class LatencyHistogram:
+    """
+    A fixed-memory, HDR-style latency histogram.
+
+    Values (in nanoseconds) are stored in log-linear buckets: exact below `2 ** sub_bucket_bits`,
+    and with a relative error of at most `2 ** -(sub_bucket_bits - 1)` above that.
+    Values larger than `max_value` are clamped into the last bucket.
+    """
+
+    def __init__(self, max_value: int = 60 * 10 ** 9, sub_bucket_bits: int = 5) -> None:
+        self._sub_bucket_bits = sub_bucket_bits
+        self._sub_bucket_count = 1 << sub_bucket_bits
+        self._half_count = self._sub_bucket_count >> 1
+        self._max_index = self._index(max_value)
+        self._counts: List[int] = [0] * (self._max_index + 1)
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_bucket_count:
+            return value
+        exponent = value.bit_length() - self._sub_bucket_bits
+        return self._sub_bucket_count + (exponent - 1) * self._half_count + (value >> exponent) - self._half_count
+
+    def _value_at(self, index: int) -> int:
+        if index < self._sub_bucket_count:
+            return index
+        exponent, sub_bucket = divmod(index - self._sub_bucket_count, self._half_count)
+        exponent += 1
+        # Report the upper edge of the bucket, so percentiles never under-report
+        return ((sub_bucket + self._half_count + 1) << exponent) - 1
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+        index = self._index(value)
+        self._counts[index if index < self._max_index else self._max_index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent: float) -> Optional[int]:
+        """
+        The value at or below which `percent` of all recorded values fall.
+        """
+        if not self.count:
+            return None
+        target = max(1, int(round(self.count * percent / 100.0)))
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= target:
+                if index == self._max_index:
+                    return self.max
+                return min(self._value_at(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def reset(self) -> None:
+        self._counts = [0] * (self._max_index + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+        }
+
+
+class Instrumentation:
+    """
+    Call counters and latency histograms for the hot paths of `iRacingClient` and `IBT`.
+
+    Assign an instance to `iRacingClient.instrumentation` or `IBT.instrumentation` to enable it,
+    and set it back to None to disable it again. Latencies are recorded in nanoseconds.
+
+    Recorded latencies:
+        event_wait: waiting for the data valid event.
+        freeze: copying the latest var buffer.
+        get: reading a single telemetry variable or session info key.
+        session_info_parse: parsing a session info section.
+        broadcast: sending a broadcast message.
+
+    Counters:
+        ticks: frozen ticks.
+        ticks_skipped: ticks that were never frozen, according to `tick_count` gaps.
+        event_timeouts: data valid event waits that timed out.
+    """
+
+    def __init__(self, report_hook: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 report_interval: float = 10.0) -> None:
+        """
+        Args:
+            report_hook: Called with a snapshot every `report_interval` seconds.
+            report_interval: The interval between reports, in seconds.
+        """
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.last_tick: Optional[int] = None
+        self._report_hook: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._report_interval_ns = 0
+        self._next_report_ns = 0
+        self.set_report_hook(report_hook, report_interval)
+
+    def set_report_hook(self, report_hook: Optional[Callable[[Dict[str, Any]], None]], report_interval: float = 10.0) -> None:
+        """
+        Sets the periodic report hook. The hook is called from whichever hot path records
+        a value after the interval expires, so it should return quickly.
+        """
+        self._report_hook = report_hook
+        self._report_interval_ns = int(report_interval * 1e9)
+        self._next_report_ns = time.perf_counter_ns() + self._report_interval_ns
+
+    def record(self, name: str, elapsed_ns: int, now_ns: Optional[int] = None) -> None:
+        """
+        Records a latency and counts the call.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(elapsed_ns)
+        if self._report_hook is not None:
+            now_ns = now_ns or time.perf_counter_ns()
+            if now_ns >= self._next_report_ns:
+                self._next_report_ns = now_ns + self._report_interval_ns
+                self._report_hook(self.snapshot())
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_tick(self, tick_count: int) -> None:
+        """
+        Counts a frozen tick, and the ticks skipped since the previous one.
+        """
+        self.count('ticks')
+        if self.last_tick is not None and tick_count > self.last_tick + 1:
+            self.count('ticks_skipped', tick_count - self.last_tick - 1)
+        self.last_tick = tick_count
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """
+        Measures the latency of a block of code, e.g. the user code run on every tick.
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            self.record(name, end - start, end)
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Any]:
+        """
+        Returns the current counters and latency statistics.
+
+        Args:
+            reset: Whether to reset all counters and histograms after taking the snapshot.
+        """
+        snapshot = {
+            'counters': dict(self.counters),
+            'latency': {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+        }
+        if reset:
+            self.reset()
+        return snapshot
+
+    def reset(self) -> None:
+        self.histograms = {}
+        self.counters = {}
+        self.last_tick = None
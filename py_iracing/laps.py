@@ -0,0 +1,194 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .ibt import IBT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@dataclass(frozen=True)
+class LapRange:
+    """
+    The records of a single lap within an `IBT` file.
+
+    `start:stop` are the records with the same `Lap` value. A lap is complete when the records
+    just before and after it exist, so its start and finish line crossings can be interpolated.
+    """
+    file_name: Optional[str]
+    lap: int
+    start: int
+    stop: int
+    complete: bool
+
+
+@dataclass
+class ResampledLap:
+    """
+    A lap resampled onto a fixed `LapDistPct` grid.
+
+    `time` is the time elapsed since the start/finish line crossing at each grid point,
+    and `channels` holds the resampled channels keyed by name.
+    """
+    lap_range: LapRange
+    grid: 'np.ndarray'
+    time: 'np.ndarray'
+    channels: Dict[str, 'np.ndarray'] = field(default_factory=dict)
+    track_length: Optional[float] = None
+
+    @property
+    def lap_time(self) -> Optional[float]:
+        return float(self.time[-1]) if self.lap_range.complete else None
+
+    @property
+    def distance(self) -> Optional['np.ndarray']:
+        """
+        The grid in metres, when the track length is known.
+        """
+        return self.grid * self.track_length if self.track_length else None
+
+
+def find_laps(ibt: IBT) -> List[LapRange]:
+    """
+    Splits an `IBT` file into lap ranges using the `Lap` channel.
+    """
+    _require_numpy()
+    return _find_laps(ibt.file_name, ibt.get_array('Lap'))
+
+
+def _find_laps(file_name: Optional[str], lap: 'np.ndarray') -> List[LapRange]:
+    record_count = len(lap)
+    if not record_count:
+        return []
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(lap)) + 1, [record_count]))
+    return [
+        LapRange(file_name, int(lap[start]), int(start), int(stop), bool(start > 0 and stop < record_count))
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def delta_time(reference: ResampledLap, other: ResampledLap) -> 'np.ndarray':
+    """
+    The time `other` is behind `reference` at each grid point (negative when it is ahead).
+    """
+    if len(reference.grid) != len(other.grid):
+        raise ValueError('Laps were resampled onto different grids')
+    return other.time - reference.time
+
+
+class LapResampler:
+    """
+    Resamples laps from `IBT` files onto a fixed `LapDistPct` grid, so laps can be compared point by point.
+
+    Resampled laps are cached by file name and lap number, up to `cache_size` laps.
+    """
+
+    def __init__(self, channels: Sequence[str] = ('Speed', 'Throttle', 'Brake'), points: int = 1000,
+                 track_length: Optional[float] = None, cache_size: int = 256) -> None:
+        """
+        Args:
+            channels: The channels to resample. Only scalar channels are supported.
+            points: The number of grid points, from 0 to 1 inclusive.
+            track_length: The track length in metres, used for `ResampledLap.distance`.
+            cache_size: The maximum number of cached laps.
+        """
+        _require_numpy()
+        self.channels = tuple(channels)
+        self.grid = np.linspace(0.0, 1.0, points)
+        self.track_length = track_length
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[Tuple[Optional[str], int], ResampledLap]' = OrderedDict()
+
+    def resample(self, ibt: IBT, lap: int) -> Optional[ResampledLap]:
+        """
+        Resamples a single lap, or returns None if the file has no such lap.
+        """
+        cached = self._cached(ibt.file_name, lap)
+        if cached is not None:
+            return cached
+        for resampled in self.resample_all(ibt, laps=[lap]):
+            return resampled
+        return None
+
+    def resample_all(self, ibt: IBT, laps: Optional[Iterable[int]] = None, complete_only: bool = False) -> List[ResampledLap]:
+        """
+        Resamples all laps (or the given lap numbers) of a file, reading each channel once.
+        """
+        wanted = set(laps) if laps is not None else None
+        columns = self._read_columns(ibt)
+        results = []
+        for lap_range in _find_laps(ibt.file_name, columns['Lap']):
+            if (wanted is not None and lap_range.lap not in wanted) or (complete_only and not lap_range.complete):
+                continue
+            resampled = self._cached(ibt.file_name, lap_range.lap)
+            if resampled is None:
+                resampled = self._resample_range(lap_range, columns)
+                self._store(resampled)
+            results.append(resampled)
+        return results
+
+    def resample_files(self, files: Iterable[Union[str, IBT]], complete_only: bool = True) -> Dict[str, List[ResampledLap]]:
+        """
+        Resamples all laps of many files, keyed by file name. Paths are opened and closed as they are processed.
+        """
+        results = {}
+        for ibt_file in files:
+            if isinstance(ibt_file, IBT):
+                results[ibt_file.file_name] = self.resample_all(ibt_file, complete_only=complete_only)
+                continue
+            ibt = IBT()
+            ibt.open(ibt_file)
+            try:
+                results[ibt.file_name] = self.resample_all(ibt, complete_only=complete_only)
+            finally:
+                ibt.close()
+        return results
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def _read_columns(self, ibt: IBT) -> Dict[str, 'np.ndarray']:
+        columns = {}
+        for key in ('Lap', 'LapDistPct', 'SessionTime') + self.channels:
+            column = ibt.get_array(key)
+            if column is None:
+                raise KeyError(f'{ibt.file_name} has no {key!r} channel')
+            if column.ndim != 1:
+                raise ValueError(f'Cannot resample array channel {key!r}')
+            columns[key] = column
+        return columns
+
+    def _resample_range(self, lap_range: LapRange, columns: Dict[str, 'np.ndarray']) -> ResampledLap:
+        record_count = len(columns['Lap'])
+        # Include the records on either side of the lap, so both line crossings are interpolated
+        lo = max(lap_range.start - 1, 0)
+        hi = min(lap_range.stop + 1, record_count)
+        x = columns['LapDistPct'][lo:hi].astype(np.float64)
+        if lo < lap_range.start:
+            x[0] -= 1.0
+        if hi > lap_range.stop:
+            x[-1] += 1.0
+        np.maximum.accumulate(x, out=x)
+        time = np.interp(self.grid, x, columns['SessionTime'][lo:hi])
+        time -= time[0]
+        channels = {key: np.interp(self.grid, x, columns[key][lo:hi].astype(np.float64)) for key in self.channels}
+        return ResampledLap(lap_range, self.grid, time, channels, self.track_length)
+
+    def _cached(self, file_name: Optional[str], lap: int) -> Optional[ResampledLap]:
+        resampled = self._cache.get((file_name, lap))
+        if resampled is not None:
+            self._cache.move_to_end((file_name, lap))
+        return resampled
+
+    def _store(self, resampled: ResampledLap) -> None:
+        self._cache[(resampled.lap_range.file_name, resampled.lap_range.lap)] = resampled
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError('Lap resampling requires numpy, install it with: pip install py_iracing[numpy]')
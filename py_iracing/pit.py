@@ -0,0 +1,194 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .enums import PitCommandMode, PitSvFlags
+
+TIRES: Tuple[str, ...] = ('lf', 'rf', 'lr', 'rr')
+
+PIT_SERVICE_KEYS: List[str] = ['PitSvFlags', 'PitSvFuel', 'PitSvLFP', 'PitSvRFP', 'PitSvLRP', 'PitSvRRP']
+
+_TIRE_FLAGS: Dict[str, PitSvFlags] = {
+    'lf': PitSvFlags.lf_tire_change,
+    'rf': PitSvFlags.rf_tire_change,
+    'lr': PitSvFlags.lr_tire_change,
+    'rr': PitSvFlags.rr_tire_change,
+}
+_TIRE_COMMANDS: Dict[str, PitCommandMode] = {
+    'lf': PitCommandMode.lf,
+    'rf': PitCommandMode.rf,
+    'lr': PitCommandMode.lr,
+    'rr': PitCommandMode.rr,
+}
+_TIRE_PRESSURE_KEYS: Dict[str, str] = {'lf': 'PitSvLFP', 'rf': 'PitSvRFP', 'lr': 'PitSvLRP', 'rr': 'PitSvRRP'}
+
+PitCommand = Tuple[PitCommandMode, int]
+
+
+@dataclass(frozen=True)
+class PitServiceRequest:
+    """
+    The desired pit service state.
+
+    Attributes:
+        tires: The tires to change, any of 'lf', 'rf', 'lr' and 'rr'.
+        fuel: The fuel to add in litres, or None to add no fuel.
+        fast_repair: Whether to use a fast repair.
+        windshield: Whether to tear off the windshield.
+        pressures: Optional cold pressures in kPa for the changed tires, keyed by tire.
+    """
+    tires: Tuple[str, ...] = ()
+    fuel: Optional[float] = None
+    fast_repair: bool = False
+    windshield: bool = False
+    pressures: Dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        unknown = set(self.tires) - set(TIRES)
+        if unknown:
+            raise ValueError(f'Unknown tires: {sorted(unknown)}')
+
+
+@dataclass
+class PitServiceResult:
+    """
+    The outcome of applying a `PitServiceRequest`.
+    """
+    success: bool
+    attempts: int
+    sent: List[PitCommand] = field(default_factory=list)
+    state: Optional[Dict[str, Any]] = None
+
+
+def plan_pit_service(request: PitServiceRequest, state: Dict[str, Any],
+                     fuel_tolerance: float = 0.5, pressure_tolerance: float = 0.5) -> List[PitCommand]:
+    """
+    Returns the minimal list of pit commands that turns the current pit service state into `request`.
+
+    Args:
+        request: The desired pit service state.
+        state: The current values of `PIT_SERVICE_KEYS`.
+        fuel_tolerance: The difference in litres below which the fuel amount is left alone.
+        pressure_tolerance: The difference in kPa below which a tire pressure is left alone.
+    """
+    flags = PitSvFlags(state.get('PitSvFlags') or 0)
+    commands: List[PitCommand] = []
+
+    wanted = set(request.tires)
+    selected = {tire for tire in TIRES if flags & _TIRE_FLAGS[tire]}
+
+    def pressure_differs(tire: str) -> bool:
+        pressure = request.pressures.get(tire)
+        current = state.get(_TIRE_PRESSURE_KEYS[tire])
+        return pressure is not None and (current is None or abs(current - pressure) > pressure_tolerance)
+
+    # Tires can only be deselected all at once, so clear them and reselect the wanted ones
+    if selected - wanted:
+        commands.append((PitCommandMode.clear_tires, 0))
+        to_select = [tire for tire in TIRES if tire in wanted]
+    else:
+        to_select = [tire for tire in TIRES if tire in wanted and (tire not in selected or pressure_differs(tire))]
+    for tire in to_select:
+        commands.append((_TIRE_COMMANDS[tire], int(round(request.pressures.get(tire, 0)))))
+
+    fuel_selected = bool(flags & PitSvFlags.fuel_fill)
+    if request.fuel is None or request.fuel <= 0:
+        if fuel_selected:
+            commands.append((PitCommandMode.clear_fuel, 0))
+    elif not fuel_selected or abs((state.get('PitSvFuel') or 0) - request.fuel) > fuel_tolerance:
+        commands.append((PitCommandMode.fuel, int(round(request.fuel))))
+
+    if request.fast_repair != bool(flags & PitSvFlags.fast_repair):
+        commands.append((PitCommandMode.fr if request.fast_repair else PitCommandMode.clear_fr, 0))
+    if request.windshield != bool(flags & PitSvFlags.windshield_tearoff):
+        commands.append((PitCommandMode.ws if request.windshield else PitCommandMode.clear_ws, 0))
+    return commands
+
+
+class PitServicePlanner:
+    """
+    Applies pit service requests through `iRacingClient.pit_command()`, sending only the commands needed
+    and confirming the result against `PitSvFlags`, `PitSvFuel` and the tire pressures.
+    """
+
+    def __init__(self, ir: Any, timeout: float = 1.0, retries: int = 2,
+                 fuel_tolerance: float = 0.5, pressure_tolerance: float = 0.5) -> None:
+        """
+        Args:
+            ir: A started `iRacingClient`.
+            timeout: How long to wait for the pit service state to reflect the commands, in seconds.
+            retries: How many times to re-plan and resend after a timeout.
+            fuel_tolerance: The difference in litres below which the fuel amount counts as applied.
+            pressure_tolerance: The difference in kPa below which a tire pressure counts as applied.
+        """
+        self.ir = ir
+        self.timeout = timeout
+        self.retries = retries
+        self.fuel_tolerance = fuel_tolerance
+        self.pressure_tolerance = pressure_tolerance
+
+    async def read_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Reads the pit service state from the latest tick.
+
+        The latest tick is frozen to read it, and unfrozen again unless the caller had a tick frozen already.
+        """
+        was_frozen = self._is_frozen()
+        await self.ir.freeze_var_buffer_latest()
+        try:
+            return await self.ir.get_consistent(PIT_SERVICE_KEYS)
+        finally:
+            if not was_frozen:
+                self.ir.unfreeze_var_buffer_latest()
+
+    def _is_frozen(self) -> bool:
+        var_buf = self.ir._var_buffer_latest
+        return var_buf is not None and var_buf.is_memory_frozen
+
+    def plan(self, request: PitServiceRequest, state: Dict[str, Any]) -> List[PitCommand]:
+        return plan_pit_service(request, state, self.fuel_tolerance, self.pressure_tolerance)
+
+    async def apply(self, request: PitServiceRequest) -> PitServiceResult:
+        """
+        Sends the commands needed to reach `request` and waits until the sim confirms them.
+
+        Waiting freezes tick after tick of the client's var buffer. If no tick was frozen when `apply()` was called,
+        the buffer is unfrozen again before returning, otherwise the latest tick read stays frozen.
+        """
+        was_frozen = self._is_frozen()
+        try:
+            return await self._apply(request)
+        finally:
+            if not was_frozen:
+                self.ir.unfreeze_var_buffer_latest()
+
+    async def _apply(self, request: PitServiceRequest) -> PitServiceResult:
+        sent: List[PitCommand] = []
+        state = await self.read_state()
+        for attempt in range(1, self.retries + 2):
+            commands = self.plan(request, state or {})
+            if not commands:
+                return PitServiceResult(True, attempt, sent, state)
+            for pit_command_mode, var in commands:
+                result = self.ir.pit_command(pit_command_mode, var)
+                if asyncio.isfuture(result):
+                    await result
+                sent.append((pit_command_mode, var))
+            state = await self._wait_applied(request)
+            if not self.plan(request, state or {}):
+                return PitServiceResult(True, attempt, sent, state)
+        return PitServiceResult(False, self.retries + 1, sent, state)
+
+    async def _wait_applied(self, request: PitServiceRequest) -> Optional[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        state = await self.read_state()
+        while self.plan(request, state or {}):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return state
+            changed = await self.ir.wait_for_change(PIT_SERVICE_KEYS, remaining)
+            if changed is None:
+                return state
+            state = changed
+        return state
@@ -0,0 +1,335 @@
+import ast
+import operator
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .ibt import IBT
+from .laps import LapRange, find_laps
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Evaluates a node over the columns of a chunk
+Evaluator = Callable[[Dict[str, 'np.ndarray']], Any]
+Ranges = List[Tuple[int, int]]
+
+_COMPARE = {ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le,
+            ast.Gt: operator.gt, ast.GtE: operator.ge}
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+           ast.Mod: operator.mod, ast.BitAnd: operator.and_, ast.BitOr: operator.or_}
+_FUNCTIONS = {'abs': abs}
+# The operator with its operands swapped, for a constant on the left
+_SWAPPED = {ast.Eq: ast.Eq, ast.NotEq: ast.NotEq, ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE}
+
+
+@dataclass(frozen=True)
+class QueryResult:
+    """
+    The records of a file that matched a `RecordQuery`.
+
+    Attributes:
+        file_name: The file the query ran on.
+        ranges: The matching records as sorted, disjoint `range`s. Each can be iterated for `IBT.get()` or its
+            `start` and `stop` passed to `IBT.get_array()` and `IBT.iter_chunks()`.
+        scanned: The number of records the query had to read, after narrowing by the lap and time indexes.
+    """
+    file_name: Optional[str]
+    ranges: List[range]
+    scanned: int
+
+    def __len__(self) -> int:
+        return sum(len(matched) for matched in self.ranges)
+
+    def __iter__(self) -> Iterator[range]:
+        return iter(self.ranges)
+
+    def indices(self) -> 'np.ndarray':
+        """
+        The indices of the matching records.
+        """
+        if not self.ranges:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate([np.arange(matched.start, matched.stop) for matched in self.ranges])
+
+    def get_array(self, ibt: IBT, key: str) -> Optional['np.ndarray']:
+        """
+        The values of a channel at the matching records, as one array.
+        """
+        arrays = [ibt.get_array(key, matched.start, matched.stop) for matched in self.ranges or [range(0)]]
+        if arrays[0] is None:
+            return None
+        return np.concatenate(arrays)
+
+
+class RecordQuery:
+    """
+    A filter over the records of `IBT` files, compiled once and run on any number of files.
+
+    The expression is Python syntax over channel names: comparisons (chained too), `and`, `or`, `not`, arithmetic,
+    `&` and `|` for bitfields, `abs()`, and `Name[i]` for an element of an array channel. For example
+    `Brake > 0.9 and Speed > 50 and Lap == 12` or `SessionFlags & 0x4000 and 0.2 <= LapDistPct < 0.4`.
+
+    A query is evaluated as vectorized masks over chunks of records, so memory use is bounded by the chunk size.
+    Before scanning, comparisons of `Lap` and `SessionTime` with constants that must hold (that are not under an
+    `or` or `not`) narrow the records to scan: `Lap` through the lap ranges of the file, `SessionTime` with a
+    binary search, since it only increases.
+    """
+
+    def __init__(self, expression: str) -> None:
+        """
+        Args:
+            expression: The filter expression.
+
+        Raises:
+            ValueError: If the expression is not valid.
+        """
+        if np is None:
+            raise ImportError('RecordQuery requires numpy, install it with: pip install py_iracing[numpy]')
+        self.expression = expression
+        try:
+            tree = ast.parse(expression.strip(), mode='eval').body
+        except SyntaxError as e:
+            raise ValueError(f'Invalid query {expression!r}: {e.msg}') from None
+        self._channels: Set[str] = set()
+        self._elements: Set[str] = set()
+        self._evaluate = self._compile(tree)
+        self._tree = tree
+
+    @property
+    def channels(self) -> List[str]:
+        """
+        The channels the query reads.
+        """
+        return sorted(self._channels)
+
+    def run(self, ibt: IBT, start: int = 0, stop: Optional[int] = None, chunk_size: int = 65536,
+            lap_ranges: Optional[Iterable[Union[LapRange, Tuple[LapRange, Optional[float]]]]] = None) -> QueryResult:
+        """
+        Finds the matching records of a file.
+
+        Args:
+            ibt: An open file.
+            start: The first record to consider.
+            stop: The record to stop at, or None for the end of the file.
+            chunk_size: The number of records evaluated at a time.
+            lap_ranges: Lap ranges to use as the lap index instead of reading the `Lap` channel, e.g. the output of
+                `Catalog.laps()`. Ranges of other files are ignored, and records no range covers (like the out-laps
+                `Catalog.laps()` leaves out by default) are always scanned.
+        """
+        if ibt.metadata_only:
+            raise ValueError(f'{ibt.file_name} was opened with metadata_only')
+        var_headers = ibt._var_headers_dict or {}
+        for key in self._channels:
+            if key not in var_headers:
+                raise KeyError(f'{ibt.file_name} has no {key!r} channel')
+            if var_headers[key].count > 1 and key not in self._elements:
+                raise ValueError(f'{key!r} is an array channel, select an element like {key}[0]')
+        start, stop, _ = slice(start, stop).indices(ibt._disk_header.session_record_count)
+        ranges = [(start, stop)] if start < stop else []
+        if lap_ranges is not None:
+            lap_ranges = _file_lap_ranges(ibt, lap_ranges)
+        narrowed = self._narrow(self._tree, ibt, lap_ranges)
+        if narrowed is not None:
+            ranges = _intersect(ranges, narrowed)
+
+        channels = self.channels
+        matched: Ranges = []
+        for range_start, range_stop in ranges:
+            if not channels:
+                mask = np.broadcast_to(self._evaluate({}), (range_stop - range_start,))
+                _append_runs(matched, range_start, mask)
+                continue
+            for chunk_start, chunk in ibt.iter_chunks(channels, chunk_size, range_start, range_stop):
+                count = len(chunk[channels[0]])
+                mask = np.broadcast_to(np.asarray(self._evaluate(chunk), dtype=bool), (count,))
+                _append_runs(matched, chunk_start, mask)
+        return QueryResult(ibt.file_name, [range(a, b) for a, b in matched], sum(b - a for a, b in ranges))
+
+    def _compile(self, node: ast.AST) -> Evaluator:
+        if isinstance(node, ast.BoolOp):
+            values = [self._compile(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+            def boolean(columns):
+                result = _truth(values[0](columns))
+                for value in values[1:]:
+                    result = combine(result, _truth(value(columns)))
+                return result
+            return boolean
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda columns: np.logical_not(_truth(operand(columns)))
+            if isinstance(node.op, ast.USub):
+                return lambda columns: -operand(columns)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+        elif isinstance(node, ast.Compare):
+            operands = [self._compile(node.left)] + [self._compile(comparator) for comparator in node.comparators]
+            compares = [_COMPARE[type(op)] for op in node.ops if type(op) in _COMPARE]
+            if len(compares) == len(node.ops):
+                def compare(columns):
+                    values = [operand(columns) for operand in operands]
+                    result = compares[0](values[0], values[1])
+                    for i in range(1, len(compares)):
+                        result = np.logical_and(result, compares[i](values[i], values[i + 1]))
+                    return result
+                return compare
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            left, right, binary = self._compile(node.left), self._compile(node.right), _BINARY[type(node.op)]
+            return lambda columns: binary(left(columns), right(columns))
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS \
+                and len(node.args) == 1 and not node.keywords:
+            argument, function = self._compile(node.args[0]), _FUNCTIONS[node.func.id]
+            return lambda columns: function(argument(columns))
+        elif isinstance(node, ast.Name):
+            key = node.id
+            self._channels.add(key)
+            return lambda columns: columns[key]
+        elif isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name):
+            # Python before 3.9 wraps the index in ast.Index
+            index = _constant(getattr(node.slice, 'value', node.slice) if type(node.slice).__name__ == 'Index' else node.slice)
+            if isinstance(index, int) and not isinstance(index, bool):
+                key = node.value.id
+                self._channels.add(key)
+                self._elements.add(key)
+                return lambda columns: columns[key][:, index]
+        elif isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float)):
+            value = node.value
+            return lambda columns: value
+        raise ValueError(f'Unsupported {type(node).__name__} in query {self.expression!r}')
+
+    def _narrow(self, node: ast.AST, ibt: IBT, lap_ranges: Optional[List[LapRange]]) -> Optional[Ranges]:
+        """
+        The records the terms of `node` that must hold can match, from the lap and time indexes, or None if unknown.
+        """
+        if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+            result = None
+            for value in node.values:
+                ranges = self._narrow(value, ibt, lap_ranges)
+                if ranges is not None:
+                    result = ranges if result is None else _intersect(result, ranges)
+            return result
+        if not isinstance(node, ast.Compare):
+            return None
+        result = None
+        operands = [node.left] + node.comparators
+        for op, left, right in zip(node.ops, operands, operands[1:]):
+            op = type(op)
+            if isinstance(right, ast.Name) and isinstance(left, ast.Constant):
+                left, right, op = right, left, _SWAPPED.get(op)
+            value = _constant(right)
+            if not isinstance(left, ast.Name) or not isinstance(value, (int, float)) or op not in _COMPARE \
+                    or op is ast.NotEq:
+                continue
+            ranges = None
+            if left.id == 'Lap':
+                ranges = self._lap_index(ibt, lap_ranges, _COMPARE[op], value)
+            elif left.id == 'SessionTime':
+                ranges = self._time_index(ibt, op, value)
+            if ranges is not None:
+                result = ranges if result is None else _intersect(result, ranges)
+        return result
+
+    @staticmethod
+    def _lap_index(ibt: IBT, lap_ranges: Optional[List[LapRange]], compare: Callable[[Any, Any], bool],
+                   value: float) -> Optional[Ranges]:
+        if lap_ranges is None:
+            if 'Lap' not in ibt._var_headers_dict:
+                return None
+            lap_ranges = find_laps(ibt)
+        matching = [(lap_range.start, lap_range.stop) for lap_range in lap_ranges if compare(lap_range.lap, value)]
+        # Records outside every lap range have an unknown lap, so they must be scanned
+        covered = _merge([(lap_range.start, lap_range.stop) for lap_range in lap_ranges])
+        uncovered, position = [], 0
+        for start, stop in covered + [(ibt._disk_header.session_record_count,) * 2]:
+            if position < start:
+                uncovered.append((position, start))
+            position = max(position, stop)
+        return _merge(matching + uncovered)
+
+    @staticmethod
+    def _time_index(ibt: IBT, op: type, value: float) -> Optional[Ranges]:
+        times = ibt.get_array('SessionTime', copy=False)
+        if times is None:
+            return None
+        start, stop = 0, len(times)
+        if op in (ast.Gt, ast.GtE, ast.Eq):
+            start = int(np.searchsorted(times, value, 'right' if op is ast.Gt else 'left'))
+        if op in (ast.Lt, ast.LtE, ast.Eq):
+            stop = int(np.searchsorted(times, value, 'left' if op is ast.Lt else 'right'))
+        # Release the view of the mmap, so close() never finds it exported
+        del times
+        return [(start, stop)] if start < stop else []
+
+
+def _file_lap_ranges(ibt: IBT, lap_ranges: Iterable[Union[LapRange, Tuple[LapRange, Optional[float]]]]) -> List[LapRange]:
+    """
+    The lap ranges of `ibt`'s file, taking the (lap range, lap time) pairs of `Catalog.laps()` too.
+    """
+    file_name = os.path.abspath(ibt.file_name) if ibt.file_name else None
+    result = []
+    for lap_range in lap_ranges:
+        if not isinstance(lap_range, LapRange):
+            lap_range = lap_range[0]
+        if lap_range.file_name is None or file_name is None or os.path.abspath(lap_range.file_name) == file_name:
+            result.append(lap_range)
+    return result
+
+
+def _constant(node: ast.AST) -> Any:
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _constant(node.operand)
+        return -value if isinstance(value, (int, float)) else None
+    return node.value if isinstance(node, ast.Constant) else None
+
+
+def _truth(value: Any) -> Any:
+    """
+    Bitfield tests like `SessionFlags & 0x4000` are true when nonzero.
+    """
+    if isinstance(value, np.ndarray) and value.dtype != bool:
+        return value != 0
+    return value
+
+
+def _append_runs(ranges: Ranges, offset: int, mask: 'np.ndarray') -> None:
+    """
+    Appends the runs of True in `mask` as ranges, extending the last range when a run continues it.
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).view(np.int8)))
+    for run_start, run_stop in zip((edges[0::2] + offset).tolist(), (edges[1::2] + offset).tolist()):
+        if ranges and ranges[-1][1] == run_start:
+            ranges[-1] = (ranges[-1][0], run_stop)
+        else:
+            ranges.append((run_start, run_stop))
+
+
+def _merge(ranges: Ranges) -> Ranges:
+    merged: Ranges = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        elif start < stop:
+            merged.append((start, stop))
+    return merged
+
+
+def _intersect(a: Ranges, b: Ranges) -> Ranges:
+    """
+    The intersection of two sorted lists of disjoint ranges.
+    """
+    result: Ranges = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start, stop = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if start < stop:
+            result.append((start, stop))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
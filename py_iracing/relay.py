@@ -0,0 +1,518 @@
+import asyncio
+import json
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from aiohttp import WSMsgType, web
+
+from .constants import VAR_TYPE_MAP
+from .instrumentation import Instrumentation
+
+RELAY_PORT: int = 32100
+
+# Every frame is a little-endian payload length and a frame type, followed by the payload
+FRAME_HEADER = struct.Struct('<IB')
+TICK_HEADER = struct.Struct('<i')
+
+FRAME_SUBSCRIBE = 1
+FRAME_SCHEMA = 2
+FRAME_KEYFRAME = 3
+FRAME_DELTA = 4
+FRAME_SESSION_INFO = 5
+FRAME_ERROR = 6
+
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+
+def encode_frame(frame_type: int, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload), frame_type) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[Tuple[int, bytes]]:
+    """
+    Reads a single frame.
+
+    Returns:
+        The frame type and payload, or None at the end of the stream.
+    """
+    try:
+        length, frame_type = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+        if length > MAX_FRAME_SIZE:
+            raise ValueError(f'Frame of {length} bytes exceeds the maximum of {MAX_FRAME_SIZE}')
+        return frame_type, await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+
+
+def decode_frame(data: bytes) -> Tuple[int, bytes]:
+    """
+    Decodes a single frame received as one WebSocket message.
+
+    Raises:
+        ValueError: If the message is not exactly one frame.
+    """
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError('Message is shorter than a frame header')
+    length, frame_type = FRAME_HEADER.unpack_from(data)
+    if length != len(data) - FRAME_HEADER.size:
+        raise ValueError(f'Frame of {length} bytes does not match a message of {len(data)} bytes')
+    return frame_type, data[FRAME_HEADER.size:]
+
+
+def _encode_json(value: Any) -> bytes:
+    return json.dumps(value, separators=(',', ':'), default=str).encode('utf-8')
+
+
+class _WebSocketWriter:
+    """
+    Sends frames to a WebSocket client in order, one binary message per frame, and counts the bytes not yet sent
+    like the write buffer of a TCP client.
+    """
+
+    def __init__(self, ws: web.WebSocketResponse) -> None:
+        self.ws = ws
+        self._frames: Deque[bytes] = deque()
+        self._buffered = 0
+        self._ready = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.get_running_loop().create_task(self._send())
+
+    def write(self, frame: bytes) -> None:
+        self._frames.append(frame)
+        self._buffered += len(frame)
+        self._ready.set()
+
+    def get_write_buffer_size(self) -> int:
+        return self._buffered
+
+    def close(self) -> None:
+        """
+        Closes the WebSocket once the frames already written are sent.
+        """
+        self._closing = True
+        self._ready.set()
+
+    async def wait_closed(self) -> None:
+        await self._task
+
+    async def _send(self) -> None:
+        try:
+            while not self._closing or self._frames:
+                await self._ready.wait()
+                self._ready.clear()
+                while self._frames:
+                    frame = self._frames.popleft()
+                    await self.ws.send_bytes(frame)
+                    self._buffered -= len(frame)
+        except ConnectionError:
+            pass
+        finally:
+            await self.ws.close()
+
+
+Writer = Union[asyncio.StreamWriter, _WebSocketWriter]
+
+
+@dataclass(eq=False)
+class _Subscriber:
+    writer: Writer
+    channels: Tuple[str, ...]
+    sections: Tuple[str, ...]
+    needs_keyframe: bool = True
+
+    def write_buffer_size(self) -> int:
+        if isinstance(self.writer, _WebSocketWriter):
+            return self.writer.get_write_buffer_size()
+        return self.writer.transport.get_write_buffer_size()
+
+
+@dataclass
+class _Group:
+    """
+    The subscribers to the same channel list, which share the encoded frames of every tick.
+    """
+    channels: Tuple[str, ...]
+    slots: List[Tuple[int, int]]
+    mask_size: int
+    subscribers: List[_Subscriber] = field(default_factory=list)
+    previous: Optional[List[bytes]] = None
+    ticks_since_keyframe: int = 0
+
+
+class RelayServer:
+    """
+    Relays live telemetry from an `iRacingClient` to remote clients over TCP, and optionally over WebSocket.
+
+    A client sends a subscribe frame with the channels and session info sections it wants, and gets back a schema
+    frame. From then on it receives one frame per tick. The frame is a keyframe holding every subscribed channel,
+    or a delta holding only the channels whose bytes changed since the previous tick, with a bitmask naming them.
+    Keyframes go out every `keyframe_interval` ticks, and to clients that just joined or fell behind.
+    Session info sections are pushed as JSON when their content changes.
+
+    Clients subscribing to the same channels share the frames encoded for them, so the cost per tick grows with
+    the number of distinct subscriptions rather than the number of clients.
+
+    WebSocket clients, such as browser overlays, exchange the same frames, each sent as one binary message.
+    """
+
+    def __init__(self, ir: Any, host: str = '127.0.0.1', port: int = RELAY_PORT, keyframe_interval: int = 60,
+                 max_buffer: int = 1024 * 1024, instrumentation: Optional[Instrumentation] = None,
+                 websocket_port: Optional[int] = None) -> None:
+        """
+        Args:
+            ir: A started `iRacingClient`.
+            host: The address to listen on.
+            port: The port to listen on, 0 to pick a free port.
+            keyframe_interval: The number of ticks between keyframes.
+            max_buffer: The number of unsent bytes above which a slow client skips ticks until it catches up.
+            instrumentation: Optional instrumentation to record tick encoding latencies and counters in.
+            websocket_port: The port to accept WebSocket clients on, 0 to pick a free port, None for TCP only.
+        """
+        self.ir = ir
+        self.host = host
+        self.port = port
+        self.websocket_port = websocket_port
+        self.keyframe_interval = keyframe_interval
+        self.max_buffer = max_buffer
+        self.instrumentation = instrumentation
+        self.metrics: Dict[str, int] = {'ticks': 0, 'keyframes': 0, 'deltas': 0, 'bytes': 0, 'skipped': 0}
+
+        self._groups: Dict[Tuple[str, ...], _Group] = {}
+        self._session_info: Dict[str, bytes] = {}
+        self._session_info_update: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._web_runner: Optional[web.AppRunner] = None
+        self._task: Optional['asyncio.Task[None]'] = None
+
+    @property
+    def client_count(self) -> int:
+        return sum(len(group.subscribers) for group in self._groups.values())
+
+    async def start(self) -> None:
+        """
+        Starts listening and relaying ticks.
+        """
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.websocket_port is not None:
+            app = web.Application()
+            app.router.add_get('/', self._handle_websocket)
+            self._web_runner = web.AppRunner(app)
+            await self._web_runner.setup()
+            await web.TCPSite(self._web_runner, self.host, self.websocket_port).start()
+            self.websocket_port = self._web_runner.addresses[0][1]
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        await self._task
+
+    async def stop(self) -> None:
+        """
+        Stops relaying and disconnects every client.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._server is not None:
+            self._server.close()
+            for group in self._groups.values():
+                for subscriber in group.subscribers:
+                    subscriber.writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._web_runner is not None:
+            await self._web_runner.cleanup()
+            self._web_runner = None
+        self._groups.clear()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        subscriber = None
+        try:
+            frame = await read_frame(reader)
+            if frame is None:
+                return
+            subscriber = await self._subscribe(frame, writer)
+            if subscriber is None:
+                return
+            # Clients only ever send the subscribe frame, so just wait for them to disconnect
+            while await reader.read(4096):
+                pass
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if subscriber is not None:
+                self._unsubscribe(subscriber)
+            writer.close()
+
+    async def _handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        writer = _WebSocketWriter(ws)
+        subscriber = None
+        try:
+            message = await ws.receive()
+            if message.type != WSMsgType.BINARY:
+                return ws
+            subscriber = await self._subscribe(decode_frame(message.data), writer)
+            if subscriber is None:
+                return ws
+            # Clients only ever send the subscribe frame, so just wait for them to disconnect
+            async for _ in ws:
+                pass
+        except ValueError:
+            pass
+        finally:
+            if subscriber is not None:
+                self._unsubscribe(subscriber)
+            writer.close()
+            await writer.wait_closed()
+        return ws
+
+    async def _subscribe(self, frame: Tuple[int, bytes], writer: Writer) -> Optional[_Subscriber]:
+        frame_type, payload = frame
+        try:
+            if frame_type != FRAME_SUBSCRIBE:
+                raise ValueError('Expected a subscribe frame')
+            request = json.loads(payload)
+            if not isinstance(request, dict):
+                raise ValueError('The subscribe request must be a JSON object')
+            names = [request.get('channels', []), request.get('session_info', [])]
+            if not all(isinstance(value, list) and all(isinstance(name, str) for name in value) for value in names):
+                raise ValueError('channels and session_info must be lists of names')
+            channels, sections = (tuple(dict.fromkeys(value)) for value in names)
+            var_headers_dict = self.ir._var_headers_dict or {}
+            unknown = [key for key in channels if key not in var_headers_dict]
+            if unknown:
+                raise ValueError(f'Unknown channels: {unknown}')
+        except ValueError as e:
+            writer.write(encode_frame(FRAME_ERROR, _encode_json({'error': str(e)})))
+            return None
+
+        group = self._groups.get(channels)
+        if group is None:
+            var_headers = [var_headers_dict[key] for key in channels]
+            slots = [(v.offset, struct.calcsize('<' + VAR_TYPE_MAP[v.type]) * v.count) for v in var_headers]
+            group = self._groups[channels] = _Group(channels, slots, (len(channels) + 7) // 8)
+        subscriber = _Subscriber(writer, channels, sections)
+        group.subscribers.append(subscriber)
+
+        schema = {
+            'channels': [[v.name, v.type, v.count] for v in (var_headers_dict[key] for key in channels)],
+            'keyframe_interval': self.keyframe_interval,
+            'tick_rate': self.ir._header.tick_rate,
+        }
+        writer.write(encode_frame(FRAME_SCHEMA, _encode_json(schema)))
+        if sections:
+            for section in sections:
+                if section not in self._session_info:
+                    self._session_info[section] = _encode_json(await self.ir.get(section))
+            writer.write(encode_frame(FRAME_SESSION_INFO, b'{' + b','.join(
+                _encode_json(section) + b':' + self._session_info[section] for section in sections) + b'}'))
+        return subscriber
+
+    def _unsubscribe(self, subscriber: _Subscriber) -> None:
+        group = self._groups.get(subscriber.channels)
+        if group is not None and subscriber in group.subscribers:
+            group.subscribers.remove(subscriber)
+            if not group.subscribers:
+                del self._groups[subscriber.channels]
+
+    async def _run(self) -> None:
+        ir = self.ir
+        last_tick = None
+        while True:
+            if ir._data_valid_event is None:
+                # Test files have no data valid event to wait on, so poll at the tick rate instead
+                await asyncio.sleep(1 / (ir._header.tick_rate if ir._header.tick_rate > 0 else 60))
+            await ir.freeze_var_buffer_latest()
+            var_buf = ir._var_buffer_latest
+            if var_buf is None or var_buf.tick_count == last_tick:
+                continue
+            last_tick = var_buf.tick_count
+            if self._session_info_update != ir.session_info_update:
+                self._session_info_update = ir.session_info_update
+                await self._push_session_info()
+            self.send_tick(last_tick, var_buf.get_memory(), var_buf.buf_offset)
+
+    def send_tick(self, tick: int, memory: Any, buf_offset: int = 0) -> None:
+        """
+        Encodes a tick once per subscribed channel list and writes it to every subscriber.
+        """
+        start = time.perf_counter_ns() if self.instrumentation is not None else 0
+        self.metrics['ticks'] += 1
+        tick_header = TICK_HEADER.pack(tick)
+        for group in self._groups.values():
+            values = [bytes(memory[buf_offset + offset:buf_offset + offset + size]) for offset, size in group.slots]
+            keyframe = delta = None
+            group.ticks_since_keyframe += 1
+            if group.previous is None or group.ticks_since_keyframe >= self.keyframe_interval:
+                group.ticks_since_keyframe = 0
+                for subscriber in group.subscribers:
+                    subscriber.needs_keyframe = True
+            for subscriber in group.subscribers:
+                if subscriber.write_buffer_size() > self.max_buffer:
+                    # Deltas are relative to the previous tick, so a client that skips one needs a keyframe
+                    subscriber.needs_keyframe = True
+                    self.metrics['skipped'] += 1
+                    continue
+                if subscriber.needs_keyframe:
+                    if keyframe is None:
+                        keyframe = encode_frame(FRAME_KEYFRAME, tick_header + b''.join(values))
+                    frame = keyframe
+                    subscriber.needs_keyframe = False
+                    self.metrics['keyframes'] += 1
+                else:
+                    if delta is None:
+                        delta = self._encode_delta(group, tick_header, values)
+                    frame = delta
+                    self.metrics['deltas'] += 1
+                subscriber.writer.write(frame)
+                self.metrics['bytes'] += len(frame)
+            group.previous = values
+        if self.instrumentation is not None:
+            self.instrumentation.record('relay_tick', time.perf_counter_ns() - start)
+
+    @staticmethod
+    def _encode_delta(group: _Group, tick_header: bytes, values: List[bytes]) -> bytes:
+        mask = 0
+        changed = []
+        for i, (value, previous) in enumerate(zip(values, group.previous)):
+            if value != previous:
+                mask |= 1 << i
+                changed.append(value)
+        return encode_frame(FRAME_DELTA, tick_header + mask.to_bytes(group.mask_size, 'little') + b''.join(changed))
+
+    async def _push_session_info(self) -> None:
+        sections: Set[str] = {section for group in self._groups.values()
+                              for subscriber in group.subscribers for section in subscriber.sections}
+        # Sections nobody subscribes to were not refreshed, so drop them rather than hand them out stale later
+        for section in set(self._session_info) - sections:
+            del self._session_info[section]
+        changed = {}
+        for section in sections:
+            value = _encode_json(await self.ir.get(section))
+            if self._session_info.get(section) != value:
+                self._session_info[section] = value
+                changed[section] = value
+        if not changed:
+            return
+        for group in self._groups.values():
+            for subscriber in group.subscribers:
+                wanted = [section for section in subscriber.sections if section in changed]
+                if wanted:
+                    subscriber.writer.write(encode_frame(FRAME_SESSION_INFO, b'{' + b','.join(
+                        _encode_json(section) + b':' + changed[section] for section in wanted) + b'}'))
+
+
+class RelayClient:
+    """
+    Receives telemetry from a `RelayServer`.
+
+    After `connect()`, each `recv()` applies the next tick to `values` and returns its tick count.
+    Session info sections arrive in `session_info` whenever they change.
+    """
+
+    def __init__(self) -> None:
+        self.values: Dict[str, Any] = {}
+        self.session_info: Dict[str, Any] = {}
+        self.tick: Optional[int] = None
+        self.keyframe_interval: Optional[int] = None
+        self.tick_rate: Optional[int] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._channels: List[Tuple[str, struct.Struct, int]] = []
+        self._mask_size = 0
+        self._has_keyframe = False
+
+    async def connect(self, host: str = '127.0.0.1', port: int = RELAY_PORT, channels: Iterable[str] = (),
+                      session_info: Iterable[str] = ()) -> None:
+        """
+        Connects to a relay server and subscribes to channels and session info sections.
+
+        Raises:
+            ConnectionError: If the server rejects the subscription.
+        """
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._writer.write(encode_frame(FRAME_SUBSCRIBE, _encode_json(
+            {'channels': list(channels), 'session_info': list(session_info)})))
+        frame = await read_frame(self._reader)
+        if frame is None or frame[0] != FRAME_SCHEMA:
+            error = json.loads(frame[1]).get('error') if frame and frame[0] == FRAME_ERROR else 'connection closed'
+            await self.close()
+            raise ConnectionError(f'Relay subscription failed: {error}')
+        schema = json.loads(frame[1])
+        self._channels = [(name, struct.Struct('<' + VAR_TYPE_MAP[var_type] * count), count)
+                          for name, var_type, count in schema['channels']]
+        self._mask_size = (len(self._channels) + 7) // 8
+        self.keyframe_interval = schema['keyframe_interval']
+        self.tick_rate = schema['tick_rate']
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+            self._writer = None
+
+    def get(self, key: str) -> Any:
+        return self.values.get(key)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.values[key]
+
+    async def recv(self) -> Optional[int]:
+        """
+        Waits for the next tick and applies it to `values`.
+
+        Returns:
+            The tick count, or None when the server disconnected.
+        """
+        while True:
+            frame = await read_frame(self._reader)
+            if frame is None:
+                return None
+            frame_type, payload = frame
+            if frame_type == FRAME_SESSION_INFO:
+                self.session_info.update(json.loads(payload))
+            elif frame_type == FRAME_KEYFRAME:
+                self._apply(TICK_HEADER.unpack_from(payload)[0], None, payload[TICK_HEADER.size:])
+                self._has_keyframe = True
+                return self.tick
+            elif frame_type == FRAME_DELTA and self._has_keyframe:
+                values_start = TICK_HEADER.size + self._mask_size
+                mask = int.from_bytes(payload[TICK_HEADER.size:values_start], 'little')
+                self._apply(TICK_HEADER.unpack_from(payload)[0], mask, payload[values_start:])
+                return self.tick
+
+    def _apply(self, tick: int, mask: Optional[int], payload: bytes) -> None:
+        """
+        Unpacks the values of a keyframe, or of the channels set in a delta's `mask`.
+        """
+        self.tick = tick
+        position = 0
+        for i, (name, channel_struct, count) in enumerate(self._channels):
+            if mask is not None and not mask >> i & 1:
+                continue
+            res = channel_struct.unpack_from(payload, position)
+            position += channel_struct.size
+            self.values[name] = res[0] if count == 1 else list(res)
+
+    def __aiter__(self) -> 'RelayClient':
+        return self
+
+    async def __anext__(self) -> int:
+        tick = await self.recv()
+        if tick is None:
+            raise StopAsyncIteration
+        return tick
@@ -0,0 +1,145 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .enums import ReplaySearchMode
+
+REPLAY_KEYS: List[str] = ['ReplayFrameNum', 'ReplaySessionNum', 'ReplaySessionTime', 'CamCarIdx']
+PLAYBACK_KEYS: List[str] = ['ReplayPlaySpeed', 'ReplayPlaySlowMotion']
+
+_SEARCH_MODES: Dict[str, ReplaySearchMode] = {
+    'incident': ReplaySearchMode.next_incident,
+    'lap': ReplaySearchMode.next_lap,
+}
+
+
+@dataclass(frozen=True)
+class ReplayEvent:
+    """
+    An event found in the replay.
+
+    Attributes:
+        kind: 'incident' or 'lap'.
+        session_num: The replay session number.
+        session_time: The seconds since the start of the session.
+        frame_num: The replay frame number.
+        car_idx: The car the camera focused on at the event.
+    """
+    kind: str
+    session_num: int
+    session_time: float
+    frame_num: int
+    car_idx: int
+
+
+@dataclass
+class ReplayIndex:
+    """
+    The events found in a replay, ordered by frame number.
+    """
+    events: List[ReplayEvent] = field(default_factory=list)
+
+    @property
+    def incidents(self) -> List[ReplayEvent]:
+        return [event for event in self.events if event.kind == 'incident']
+
+    @property
+    def laps(self) -> List[ReplayEvent]:
+        return [event for event in self.events if event.kind == 'lap']
+
+    def in_session(self, session_num: int) -> List[ReplayEvent]:
+        return [event for event in self.events if event.session_num == session_num]
+
+
+class ReplayScanner:
+    """
+    Indexes incidents and lap boundaries in a replay by driving the replay search.
+
+    The replay is paused and moved with `replay_search(next_incident / next_lap)`, and each search waits for
+    `ReplayFrameNum` to change tick by tick instead of sleeping, so a full replay is indexed as fast as the
+    sim can seek. A search that does not move the replay within `settle_timeout` marks the end of the tape.
+    """
+
+    def __init__(self, ir: Any, settle_timeout: float = 2.0) -> None:
+        """
+        Args:
+            ir: A started `iRacingClient`.
+            settle_timeout: How long to wait for the replay to move after a search, in seconds.
+        """
+        self.ir = ir
+        self.settle_timeout = settle_timeout
+
+    async def scan(self, kinds: Iterable[str] = ('incident', 'lap'), restore_position: bool = True) -> ReplayIndex:
+        """
+        Scans the whole replay for the given kinds of events.
+
+        Args:
+            kinds: The kinds of events to look for, any of 'incident' and 'lap'.
+            restore_position: Whether to return to the current replay position when done.
+
+        The play speed and slow motion state are always restored when done, even if the scan fails.
+        """
+        kinds = list(kinds)
+        unknown = set(kinds) - set(_SEARCH_MODES)
+        if unknown:
+            raise ValueError(f'Unknown replay event kinds: {sorted(unknown)}')
+
+        start = await self._read()
+        playback = await self.ir.get_consistent(PLAYBACK_KEYS)
+        await self._send(self.ir.replay_set_play_speed, 0)
+        events = []
+        try:
+            for kind in kinds:
+                events.extend(await self._scan_kind(kind))
+        finally:
+            if restore_position and start:
+                await self.seek(start['ReplaySessionNum'], start['ReplaySessionTime'])
+            if playback and playback['ReplayPlaySpeed'] is not None:
+                await self._send(self.ir.replay_set_play_speed, playback['ReplayPlaySpeed'],
+                                 bool(playback['ReplayPlaySlowMotion']))
+        events.sort(key=lambda event: (event.frame_num, event.kind))
+        return ReplayIndex(events)
+
+    async def seek(self, session_num: int, session_time: float) -> Optional[Dict[str, Any]]:
+        """
+        Moves the replay to a session time and waits until it gets there.
+        """
+        return await self._search(lambda: self.ir.replay_search_session_time(session_num, int(session_time * 1000)))
+
+    async def seek_event(self, event: ReplayEvent) -> Optional[Dict[str, Any]]:
+        return await self.seek(event.session_num, event.session_time)
+
+    async def _scan_kind(self, kind: str) -> List[ReplayEvent]:
+        events: List[ReplayEvent] = []
+        state = await self._search(lambda: self.ir.replay_search(ReplaySearchMode.to_start)) or await self._read()
+        last_frame = state['ReplayFrameNum'] if state else None
+        while True:
+            state = await self._search(lambda: self.ir.replay_search(_SEARCH_MODES[kind]))
+            if state is None or (last_frame is not None and state['ReplayFrameNum'] <= last_frame):
+                return events
+            last_frame = state['ReplayFrameNum']
+            events.append(ReplayEvent(kind, state['ReplaySessionNum'], state['ReplaySessionTime'],
+                                      state['ReplayFrameNum'], state['CamCarIdx']))
+
+    async def _search(self, send: Callable[[], Any]) -> Optional[Dict[str, Any]]:
+        """
+        Sends a search command and waits for the replay frame to change.
+
+        Returns:
+            The replay state after the move, or None if the replay did not move.
+        """
+        await self._read()
+        await self._send(send)
+        if await self.ir.wait_for_change(['ReplayFrameNum'], self.settle_timeout) is None:
+            return None
+        return await self.ir.get_consistent(REPLAY_KEYS)
+
+    async def _read(self) -> Optional[Dict[str, Any]]:
+        await self.ir.freeze_var_buffer_latest()
+        return await self.ir.get_consistent(REPLAY_KEYS)
+
+    @staticmethod
+    async def _send(method: Callable[..., Any], *args: Any) -> None:
+        result = method(*args)
+        if asyncio.isfuture(result):
+            await result
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from .yaml_parser import parse_section
+
+# Bump when the parsed representation of a section changes, so stale entries are never returned
+CACHE_FORMAT_VERSION: int = 1
+
+_MISSING = object()
+
+
+class SessionInfoCache:
+    """
+    An on-disk cache of parsed session info sections, shared across process restarts.
+
+    Entries are pickled and keyed by a hash of the raw section bytes, so unchanged sections
+    load without parsing any YAML. The least recently used entries are evicted once the cache
+    grows beyond `max_bytes`. Only point it at a directory you trust, as entries are unpickled.
+    It can be used from several threads, e.g. the worker threads `iRacingClient` parses session info in.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024) -> None:
+        """
+        Args:
+            directory: The directory to store entries in. It is created if it does not exist.
+            max_bytes: The maximum total size of all entries.
+        """
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+        self._load_index()
+
+    def _load_index(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.pickle'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[:-len('.pickle')], stat.st_size))
+        for _, digest, size in sorted(entries):
+            self._entries[digest] = size
+            self._size += size
+
+    @staticmethod
+    def digest(data_binary: bytes) -> str:
+        return hashlib.blake2b(data_binary, digest_size=20, person=b'pyir-si%d' % CACHE_FORMAT_VERSION).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest + '.pickle')
+
+    def get(self, data_binary: bytes, default: Any = None) -> Any:
+        """
+        Returns the parsed section for the given raw section bytes, or `default` if it is not cached.
+        """
+        with self._lock:
+            digest = self.digest(data_binary)
+            if digest in self._entries:
+                try:
+                    with open(self._path(digest), 'rb') as f:
+                        value = pickle.load(f)
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    self._discard(digest)
+                else:
+                    self._entries.move_to_end(digest)
+                    try:
+                        os.utime(self._path(digest))
+                    except OSError:
+                        pass
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return default
+
+    def put(self, data_binary: bytes, value: Any) -> None:
+        """
+        Stores the parsed section for the given raw section bytes.
+        """
+        with self._lock:
+            digest = self.digest(data_binary)
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_path, self._path(digest))
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return
+            self._size += len(payload) - self._entries.pop(digest, 0)
+            self._entries[digest] = len(payload)
+            self._evict()
+
+    def parse(self, data_binary: bytes, key: str) -> Tuple[Any, bool]:
+        """
+        Parses a session info section found with `find_section()`, going through the cache.
+
+        Returns:
+            The parsed section, and whether it came from the cache.
+        """
+        value = self.get(data_binary, _MISSING)
+        if value is not _MISSING:
+            return value, True
+        value = parse_section(data_binary, key)
+        if value is not None:
+            self.put(data_binary, value)
+        return value, False
+
+    def clear(self) -> None:
+        with self._lock:
+            for digest in list(self._entries):
+                self._discard(digest)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, digest: str) -> None:
+        self._size -= self._entries.pop(digest, 0)
+        try:
+            os.remove(self._path(digest))
+        except OSError:
+            pass
+
+
+def load_section(cache: Optional[SessionInfoCache], data_binary: bytes, key: str) -> Tuple[Any, bool]:
+    """
+    Parses a session info section, through `cache` when one is given.
+    """
+    if cache is None:
+        return parse_section(data_binary, key), False
+    return cache.parse(data_binary, key)
@@ -0,0 +1,142 @@
+import struct
+from typing import Any, Dict, List, Optional, Union
+
+from .constants import VAR_TYPE_MAP, YAML_CODE_PAGE
+from .session_cache import SessionInfoCache, load_section
+from .structs import VAR_HEADER_SIZE, Header, VarBuffer, VarHeader, read_var_headers
+from .yaml_parser import find_section
+
+SNAPSHOT_MAGIC: bytes = b'IRSNAP'
+SNAPSHOT_VERSION: int = 1
+
+# Magic, format version, then the irsdk version, tick rate, tick count, session info update,
+# number of variables, var buffer length and session info length. The var header table, the
+# session info YAML and the var buffer follow, each copied verbatim from the memory map.
+SNAPSHOT_HEADER = struct.Struct('<6sH7i')
+
+
+def dump_snapshot(header: Header, var_buf: Optional[VarBuffer] = None, session_info: bool = True) -> bytes:
+    """
+    Serializes one tick of a memory map (or `.ibt` header area) into the snapshot format.
+
+    Args:
+        header: The header of the memory map.
+        var_buf: The var buffer to save, e.g. the frozen buffer of an `iRacingClient`. When omitted,
+            a copy of the latest buffer is taken with the same torn read retries as a freeze.
+        session_info: Whether to include the session info YAML.
+
+    Returns:
+        The snapshot bytes.
+
+    Raises:
+        RuntimeError: If every copy of the latest buffer raced with the writer.
+    """
+    mem = header._shared_mem
+    if var_buf is None:
+        var_buf = sorted(header.var_buf, key=lambda v: v.tick_count, reverse=True)[0]
+    if not var_buf.is_memory_frozen:
+        var_buf = VarBuffer(mem, var_buf._offset, header.buf_len)
+        var_buf.freeze()
+        if not var_buf.is_memory_frozen:
+            raise RuntimeError('Every copy of the var buffer raced with the writer')
+    buffer = var_buf.get_memory()
+
+    var_header_offset = header.var_header_offset
+    num_vars = header.num_vars
+    yaml = b''
+    if session_info:
+        start = header.session_info_offset
+        end = start + header.session_info_len
+        terminator = mem.find(b'\x00', start, end)
+        yaml = mem[start:terminator if terminator >= 0 else end]
+    return b''.join((
+        SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, header.version, header.tick_rate, var_buf.tick_count,
+                             header.session_info_update, num_vars, len(buffer), len(yaml)),
+        mem[var_header_offset:var_header_offset + num_vars * VAR_HEADER_SIZE],
+        yaml,
+        buffer,
+    ))
+
+
+class Snapshot:
+    """
+    A single tick restored from the snapshot format, queryable like a frozen `iRacingClient`.
+    """
+
+    def __init__(self, data: bytes, session_info_cache: Optional[SessionInfoCache] = None) -> None:
+        """
+        Args:
+            data: The bytes written by `dump_snapshot()` or `iRacingClient.save_snapshot()`.
+            session_info_cache: A cache for parsed session info sections.
+        """
+        if len(data) < SNAPSHOT_HEADER.size:
+            raise ValueError('Not a py_iracing snapshot')
+        (magic, format_version, self.version, self.tick_rate, self.tick_count, self.session_info_update, num_vars,
+         buf_len, session_info_len) = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError('Not a py_iracing snapshot')
+        if format_version > SNAPSHOT_VERSION:
+            raise ValueError(f'Unsupported snapshot version {format_version}')
+        self.session_info_cache = session_info_cache
+        self._data = data
+        self._session_info_start = SNAPSHOT_HEADER.size + num_vars * VAR_HEADER_SIZE
+        self._session_info_end = self._session_info_start + session_info_len
+        if len(data) < self._session_info_end + buf_len:
+            raise ValueError('Truncated snapshot')
+        self.buffer = data[self._session_info_end:self._session_info_end + buf_len]
+        self._var_headers = read_var_headers(data, SNAPSHOT_HEADER.size, num_vars)
+        self._var_headers_dict = {var_header.name: var_header for var_header in self._var_headers}
+        self.__var_readers: Dict[str, struct.Struct] = {}
+        self.__session_info_dict: Dict[str, Any] = {}
+
+    @classmethod
+    def load(cls, path: str, session_info_cache: Optional[SessionInfoCache] = None) -> 'Snapshot':
+        with open(path, 'rb') as f:
+            return cls(f.read(), session_info_cache)
+
+    def __getitem__(self, key: str) -> Union[int, float, bool, str, List[Any], None]:
+        return self.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._var_headers_dict
+
+    @property
+    def var_headers_names(self) -> List[str]:
+        return list(self._var_headers_dict)
+
+    @property
+    def var_headers(self) -> List[VarHeader]:
+        return self._var_headers
+
+    def get(self, key: str) -> Union[int, float, bool, str, List[Any], None]:
+        """
+        Gets the value of a telemetry variable, or None if the snapshot does not have it.
+        """
+        reader = self.__var_readers.get(key)
+        if reader is None:
+            var_header = self._var_headers_dict.get(key)
+            if var_header is None:
+                return None
+            reader = self.__var_readers[key] = struct.Struct(
+                '<%dx' % var_header.offset + VAR_TYPE_MAP[var_header.type] * var_header.count)
+        res = reader.unpack_from(self.buffer)
+        return res[0] if len(res) == 1 else list(res)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        All telemetry variables, keyed by name.
+        """
+        return {name: self.get(name) for name in self._var_headers_dict}
+
+    @property
+    def session_info_yaml(self) -> str:
+        return self._data[self._session_info_start:self._session_info_end].decode(YAML_CODE_PAGE)
+
+    def session_info(self, key: str) -> Any:
+        """
+        Gets a section of the session info YAML, parsed on first use.
+        """
+        if key not in self.__session_info_dict:
+            data_binary = find_section(self._data, self._session_info_start, self._session_info_end, key)
+            self.__session_info_dict[key] = load_section(self.session_info_cache, data_binary, key)[0] if data_binary else None
+        return self.__session_info_dict[key]
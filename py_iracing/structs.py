@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 import mmap
 import struct
-from typing import Any, List, Union
+from typing import Any, List, Optional, Tuple, Union
 
 def _get_value(mem: mmap.mmap, offset: int, type: str) -> Any:
     return struct.unpack_from(type, mem, offset)[0]
@@ -9,6 +9,12 @@ def _get_value(mem: mmap.mmap, offset: int, type: str) -> Any:
 def _get_string(mem: mmap.mmap, offset: int, length: int) -> str:
     return struct.unpack_from(f'{length}s', mem, offset)[0].strip(b'\x00').decode('latin-1')
 
+def _decode_string(value: bytes) -> str:
+    return value.strip(b'\x00').decode('latin-1')
+
+VAR_HEADER_SIZE = 144
+_VAR_HEADER_STRUCT = struct.Struct('<3i?3x32s64s32s')
+
 @dataclass
 class VarBuffer:
     """
@@ -19,18 +25,39 @@ class VarBuffer:
     _buf_len: int
     is_memory_frozen: bool = False
     _frozen_memory: Union[bytes, None] = None
+    _frozen_tick_count: int = 0
 
     @property
     def tick_count(self) -> int:
-        return _get_value(self.get_memory(), self.buf_offset, 'i')
+        if self.is_memory_frozen:
+            return self._frozen_tick_count
+        return _get_value(self._shared_mem, self._offset, 'i')
 
     @property
     def _buf_offset_raw(self) -> int:
         return _get_value(self._shared_mem, self._offset + 4, 'i')
 
-    def freeze(self) -> None:
-        self._frozen_memory = self._shared_mem[self._buf_offset_raw : self._buf_offset_raw + self._buf_len]
+    def freeze(self, max_retries: int = 2) -> int:
+        """
+        Copies the buffer, retrying while iRacing overwrites it during the copy.
+
+        Returns:
+            The number of retries. A value above `max_retries` means every copy raced with the writer,
+            and the buffer is left unfrozen.
+        """
+        for retries in range(max_retries + 1):
+            tick_count = _get_value(self._shared_mem, self._offset, 'i')
+            buf_offset = self._buf_offset_raw
+            frozen_memory = self._shared_mem[buf_offset : buf_offset + self._buf_len]
+            if tick_count == _get_value(self._shared_mem, self._offset, 'i'):
+                break
+        else:
+            self.unfreeze()
+            return max_retries + 1
+        self._frozen_memory = frozen_memory
+        self._frozen_tick_count = tick_count
         self.is_memory_frozen = True
+        return retries
 
     def unfreeze(self) -> None:
         self._frozen_memory = None
@@ -94,7 +121,7 @@ class Header:
     @property
     def var_buf(self) -> List[VarBuffer]:
         return [
-            VarBuffer(self._shared_mem, 48 + i * 16, buf_len=self.buf_len)
+            VarBuffer(self._shared_mem, 48 + i * 16, self.buf_len)
             for i in range(self.num_buf)
         ]
 
@@ -105,35 +132,64 @@ class VarHeader:
     """
     _shared_mem: mmap.mmap
     _offset: int
+    _decoded: Optional[Tuple[Any, ...]] = None
+
+    def decode(self) -> 'VarHeader':
+        """
+        Decodes every field at once, so later reads no longer go through the memory map.
+        """
+        var_type, offset, count, count_as_time, name, desc, unit = _VAR_HEADER_STRUCT.unpack_from(self._shared_mem, self._offset)
+        self._decoded = (var_type, offset, count, count_as_time, _decode_string(name), _decode_string(desc), _decode_string(unit))
+        return self
 
     @property
     def type(self) -> int:
+        if self._decoded:
+            return self._decoded[0]
         return _get_value(self._shared_mem, self._offset, 'i')
 
     @property
     def offset(self) -> int:
+        if self._decoded:
+            return self._decoded[1]
         return _get_value(self._shared_mem, self._offset + 4, 'i')
 
     @property
     def count(self) -> int:
+        if self._decoded:
+            return self._decoded[2]
         return _get_value(self._shared_mem, self._offset + 8, 'i')
 
     @property
     def count_as_time(self) -> bool:
+        if self._decoded:
+            return self._decoded[3]
         return _get_value(self._shared_mem, self._offset + 12, '?')
 
     @property
     def name(self) -> str:
+        if self._decoded:
+            return self._decoded[4]
         return _get_string(self._shared_mem, self._offset + 16, 32)
 
     @property
     def desc(self) -> str:
+        if self._decoded:
+            return self._decoded[5]
         return _get_string(self._shared_mem, self._offset + 48, 64)
 
     @property
     def unit(self) -> str:
+        if self._decoded:
+            return self._decoded[6]
         return _get_string(self._shared_mem, self._offset + 112, 32)
 
+def read_var_headers(mem: Union[mmap.mmap, bytes], offset: int, num_vars: int) -> List[VarHeader]:
+    """
+    Reads and decodes the whole var header table in one pass.
+    """
+    return [VarHeader(mem, offset + i * VAR_HEADER_SIZE).decode() for i in range(num_vars)]
+
 @dataclass
 class DiskSubHeader:
     """
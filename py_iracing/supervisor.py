@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .constants import SIM_STATUS_URL
+from .enums import StatusField
+from .instrumentation import Instrumentation
+from .structs import VAR_HEADER_SIZE
+
+
+@dataclass(frozen=True)
+class ConnectionEvent:
+    """
+    A change of the connection to the sim.
+
+    Attributes:
+        kind: 'connected', 'disconnected' or 'layout_changed'.
+        time: The `time.monotonic()` time of the change.
+        reason: Why the connection was lost: 'status' when the header says the sim disconnected,
+            'stale' when the tick count stopped advancing.
+        downtime: For a reconnect, the seconds since the connection was lost.
+    """
+    kind: str
+    time: float
+    reason: str = ''
+    downtime: Optional[float] = None
+
+
+class ConnectionSupervisor:
+    """
+    Keeps an `iRacingClient` connected across sim restarts.
+
+    While connected, it only polls the header: a disconnect is a `status` other than connected, or a tick
+    count that stopped advancing for `stale_after` seconds, so no telemetry or session info is read. While
+    disconnected, it checks the sim status over one pooled HTTP session and reconnects with exponential backoff.
+    On reconnect the session info is dropped, since its update counter starts over, but var headers and compiled
+    readers are only dropped when the variable layout actually changed.
+    """
+
+    def __init__(self, ir: Any, test_file: Optional[str] = None, status_url: Optional[str] = SIM_STATUS_URL,
+                 poll_interval: float = 0.25, stale_after: float = 2.0, backoff_initial: float = 0.5,
+                 backoff_max: float = 10.0, backoff_factor: float = 2.0,
+                 instrumentation: Optional[Instrumentation] = None) -> None:
+        """
+        Args:
+            ir: The `iRacingClient` to supervise. It is started by the supervisor.
+            test_file: A test file to connect to instead of the live memory map.
+            status_url: The sim status URL, or None to skip the HTTP check.
+            poll_interval: The seconds between header checks while connected.
+            stale_after: The seconds without a new tick after which the connection counts as lost.
+            backoff_initial: The seconds to wait after the first failed connection attempt.
+            backoff_max: The maximum seconds between connection attempts.
+            backoff_factor: The factor the wait grows by after every failed attempt.
+            instrumentation: Optional instrumentation to record reconnect times and counters in.
+        """
+        self.ir = ir
+        self.test_file = test_file
+        self.status_url = status_url
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.backoff_factor = backoff_factor
+        self.instrumentation = instrumentation
+        self.connected = False
+        self.metrics: Dict[str, int] = {'connects': 0, 'disconnects': 0, 'attempts': 0, 'layout_changes': 0}
+        self.reconnect_times: List[float] = []
+
+        self._listeners: List[Callable[[ConnectionEvent], Any]] = []
+        self._connected_event = asyncio.Event()
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._layout: Optional[Tuple[int, int, int, int, bytes]] = None
+        self._last_tick: Optional[int] = None
+        self._last_tick_time = 0.0
+        self._disconnected_at: Optional[float] = None
+        self._task: Optional['asyncio.Task[None]'] = None
+
+    def add_listener(self, listener: Callable[[ConnectionEvent], Any]) -> None:
+        """
+        Calls `listener` with every `ConnectionEvent`.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[ConnectionEvent], Any]) -> None:
+        self._listeners.remove(listener)
+
+    async def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        try:
+            await asyncio.wait_for(self._connected_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def start(self) -> None:
+        """
+        Starts supervising in a background task.
+        """
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """
+        Stops supervising and closes the HTTP session. The client is left as it is.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self) -> None:
+        self._http_session = aiohttp.ClientSession()
+        self.ir.http_session = self._http_session
+        if self.status_url is not None:
+            self.ir.sim_status_url = self.status_url
+        backoff = self.backoff_initial
+        try:
+            while True:
+                if self.connected:
+                    await asyncio.sleep(self.poll_interval)
+                    reason = self._check()
+                    if reason:
+                        self._set_disconnected(reason)
+                        backoff = self.backoff_initial
+                elif await self._connect():
+                    backoff = self.backoff_initial
+                else:
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * self.backoff_factor, self.backoff_max)
+        finally:
+            self.ir.http_session = None
+            await self._http_session.close()
+            self._http_session = None
+
+    def _check(self) -> Optional[str]:
+        """
+        Checks the header, returning why the connection was lost or None if it was not.
+        """
+        header = self.ir._header
+        if header is None or header.status != StatusField.status_connected:
+            return 'status'
+        now = time.monotonic()
+        tick = max(var_buf.tick_count for var_buf in header.var_buf)
+        if tick != self._last_tick:
+            self._last_tick, self._last_tick_time = tick, now
+        elif now - self._last_tick_time > self.stale_after:
+            return 'stale'
+        return None
+
+    async def _connect(self) -> bool:
+        self.metrics['attempts'] += 1
+        if self.instrumentation is not None:
+            self.instrumentation.count('connect_attempts')
+        ir = self.ir
+        if self.status_url is not None and not await ir._check_sim_status():
+            return False
+        if not ir.is_initialized:
+            if not await ir.startup(test_file=self.test_file):
+                return False
+            self._layout = self._read_layout()
+        else:
+            header = ir._header
+            if header.status != StatusField.status_connected:
+                return False
+            tick = max(var_buf.tick_count for var_buf in header.var_buf)
+            if tick == self._last_tick:
+                return False
+            layout = self._read_layout()
+            if layout != self._layout:
+                self._layout = layout
+                ir.reset_layout()
+                self.metrics['layout_changes'] += 1
+                self._emit(ConnectionEvent('layout_changed', time.monotonic()))
+            ir.reset_session_info()
+        self._set_connected()
+        return True
+
+    def _read_layout(self) -> Tuple[int, int, int, int, bytes]:
+        """
+        The variable layout: counts, offsets and a hash of the var header table.
+        """
+        header = self.ir._header
+        start = header.var_header_offset
+        var_headers = self.ir._shared_mem[start:start + header.num_vars * VAR_HEADER_SIZE]
+        return (header.num_vars, start, header.num_buf, header.buf_len,
+                hashlib.blake2b(var_headers, digest_size=16).digest())
+
+    def _set_connected(self) -> None:
+        now = time.monotonic()
+        self.connected = True
+        self._connected_event.set()
+        self._last_tick = max(var_buf.tick_count for var_buf in self.ir._header.var_buf)
+        self._last_tick_time = now
+        self.metrics['connects'] += 1
+        downtime = None
+        if self._disconnected_at is not None:
+            downtime = now - self._disconnected_at
+            self._disconnected_at = None
+            self.reconnect_times.append(downtime)
+            if self.instrumentation is not None:
+                self.instrumentation.record('reconnect', int(downtime * 1e9))
+        self._emit(ConnectionEvent('connected', now, downtime=downtime))
+
+    def _set_disconnected(self, reason: str) -> None:
+        now = time.monotonic()
+        self.connected = False
+        self._connected_event.clear()
+        self._disconnected_at = now
+        self.metrics['disconnects'] += 1
+        if self.instrumentation is not None:
+            self.instrumentation.count('disconnects')
+        self.ir.unfreeze_var_buffer_latest()
+        self._emit(ConnectionEvent('disconnected', now, reason=reason))
+
+    def _emit(self, event: ConnectionEvent) -> None:
+        for listener in list(self._listeners):
+            listener(event)
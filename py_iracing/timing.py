@@ -0,0 +1,199 @@
+from typing import Any, Dict, Optional, Sequence
+
+from .enums import TrackLocation
+from .ibt import IBT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TimingEngine:
+    """
+    Lap and sector timing for every car, from `CarIdxLapDistPct` and `SessionTime`.
+
+    Call `update()` once per tick. A car crossing a sector line or the start/finish line between two ticks is
+    timed by interpolating linearly between them, so splits are not quantized to the tick rate. Each update is
+    a handful of array operations over the whole field, and all tables are preallocated arrays indexed by car.
+    A car's first lap and sector are only timed from its first line crossing, and a car that leaves the world
+    (or jumps, e.g. when towed) is untimed until it crosses a line again.
+    """
+
+    def __init__(self, sector_starts: Optional[Sequence[float]] = None, car_count: int = 64, max_laps: int = 256,
+                 max_step: float = 0.5) -> None:
+        """
+        Args:
+            sector_starts: The `SectorStartPct` of each sector. The start/finish line (0.0) is always a sector start.
+            car_count: The number of cars, the length of `CarIdxLapDistPct`.
+            max_laps: The initial number of laps per car in the lap and sector history, grown when exceeded.
+            max_step: The largest fraction of a lap a car may move in one tick; larger jumps untime the car.
+        """
+        if np is None:
+            raise ImportError('TimingEngine requires numpy, install it with: pip install py_iracing[numpy]')
+        self.sector_starts = np.unique(np.concatenate(([0.0], np.asarray(sector_starts or [], dtype=np.float64))))
+        self.car_count = car_count
+        self.max_step = max_step
+        sectors = len(self.sector_starts)
+
+        self.laps_completed = np.zeros(car_count, dtype=np.int32)
+        self.current_sector = np.full(car_count, -1, dtype=np.int32)
+        self.lap_start_time = np.full(car_count, np.nan)
+        self.sector_start_time = np.full(car_count, np.nan)
+        self.last_lap_time = np.full(car_count, np.nan)
+        self.best_lap_time = np.full(car_count, np.nan)
+        self.current_sector_times = np.full((car_count, sectors), np.nan)
+        self.last_sector_times = np.full((car_count, sectors), np.nan)
+        self.best_sector_times = np.full((car_count, sectors), np.nan)
+        self._lap_times = np.full((car_count, max_laps), np.nan)
+        self._lap_sector_times = np.full((car_count, max_laps, sectors), np.nan)
+
+        self._previous_pct = np.full(car_count, np.nan)
+        self._previous_time: Optional[float] = None
+        self._cars = np.arange(car_count)
+
+    @classmethod
+    def from_session_info(cls, split_time_info: Optional[Dict[str, Any]], **kwargs: Any) -> 'TimingEngine':
+        """
+        Creates an engine with the sector lines of the `SplitTimeInfo` session info section.
+        """
+        sectors = (split_time_info or {}).get('Sectors') or []
+        return cls([sector['SectorStartPct'] for sector in sectors], **kwargs)
+
+    @classmethod
+    def from_ibt(cls, ibt: IBT, lap_dist_channel: str = 'CarIdxLapDistPct', chunk_size: int = 4096,
+                 **kwargs: Any) -> 'TimingEngine':
+        """
+        Runs an engine over a whole `.ibt` file, with the sector lines from its session info.
+
+        Args:
+            ibt: An open file.
+            lap_dist_channel: `CarIdxLapDistPct` to time every car, or `LapDistPct` to time only the player.
+        """
+        if lap_dist_channel not in ibt.var_headers_names:
+            raise KeyError(f'{lap_dist_channel!r} is not in {ibt.file_name}')
+        if 'car_count' not in kwargs:
+            kwargs['car_count'] = ibt._var_headers_dict[lap_dist_channel].count
+        engine = cls.from_session_info(ibt.session_info('SplitTimeInfo'), **kwargs)
+        for _, chunk in ibt.iter_chunks(['SessionTime', lap_dist_channel], chunk_size):
+            for session_time, lap_dist_pct in zip(chunk['SessionTime'].tolist(), chunk[lap_dist_channel]):
+                engine.update(session_time, lap_dist_pct)
+        return engine
+
+    def update(self, session_time: float, lap_dist_pct: Sequence[float],
+               track_surface: Optional[Sequence[int]] = None) -> 'np.ndarray':
+        """
+        Times the line crossings since the previous tick.
+
+        Args:
+            session_time: `SessionTime`.
+            lap_dist_pct: `CarIdxLapDistPct`, negative for cars that are not in the world.
+            track_surface: `CarIdxTrackSurface`, used to leave out cars that are not in the world.
+
+        Returns:
+            The indices of the cars that completed a lap.
+        """
+        pct = np.array(lap_dist_pct, dtype=np.float64, ndmin=1)
+        valid = pct >= 0
+        if track_surface is not None:
+            valid &= np.asarray(track_surface) != TrackLocation.not_in_world
+        pct[~valid] = np.nan
+        previous_pct, previous_time = self._previous_pct, self._previous_time
+        self._previous_pct, self._previous_time = pct, session_time
+        if previous_time is None or session_time <= previous_time:
+            return np.empty(0, dtype=np.intp)
+
+        step = pct - previous_pct
+        step[step < -0.5] += 1.0
+        # Cars that left the world or jumped are untimed until their next line crossing
+        lost = ~(np.abs(step) <= self.max_step)
+        if lost.any():
+            self.lap_start_time[lost] = np.nan
+            self.sector_start_time[lost] = np.nan
+            self.current_sector[lost] = -1
+            self.current_sector_times[lost] = np.nan
+        moving = step > 0
+        moving &= ~lost
+        if not moving.any():
+            return np.empty(0, dtype=np.intp)
+
+        cars = self._cars[moving]
+        start, step, end = previous_pct[moving], step[moving], previous_pct[moving] + step[moving]
+        lines = self.sector_starts
+        line_count = len(lines)
+        next_line = np.searchsorted(lines, start, 'right')
+        elapsed = session_time - previous_time
+        completed = []
+        # The k-th line ahead of each car, so cars crossing several lines in a tick time them in order
+        for k in range(line_count):
+            position = next_line + k
+            line = position % line_count
+            line_pct = lines[line] + position // line_count
+            crossed = line_pct <= end
+            if not crossed.any():
+                break
+            crossing_cars, line = cars[crossed], line[crossed]
+            crossing_time = previous_time + (line_pct[crossed] - start[crossed]) / step[crossed] * elapsed
+            completed.append(self._cross(crossing_cars, line, crossing_time))
+        return np.concatenate(completed) if completed else np.empty(0, dtype=np.intp)
+
+    async def update_from(self, ir: Any) -> 'np.ndarray':
+        """
+        Updates from an `iRacingClient`, reading every channel from the same tick.
+        """
+        values = await ir.get_consistent(['SessionTime', 'CarIdxLapDistPct', 'CarIdxTrackSurface'])
+        if values is None:
+            return np.empty(0, dtype=np.intp)
+        return self.update(values['SessionTime'], values['CarIdxLapDistPct'], values['CarIdxTrackSurface'])
+
+    def _cross(self, cars: 'np.ndarray', line: 'np.ndarray', crossing_time: 'np.ndarray') -> 'np.ndarray':
+        """
+        Ends the sector before `line` and starts the next one for each car, and ends the lap at the start/finish line.
+        """
+        sector = (line - 1) % len(self.sector_starts)
+        sector_time = crossing_time - self.sector_start_time[cars]
+        # Only time the sector when the car entered it through its start line
+        timed = (self.current_sector[cars] == sector) & ~np.isnan(sector_time)
+        sector_time[~timed] = np.nan
+        self.current_sector_times[cars, sector] = sector_time
+        self.last_sector_times[cars[timed], sector[timed]] = sector_time[timed]
+        self.best_sector_times[cars, sector] = np.fmin(self.best_sector_times[cars, sector], sector_time)
+        self.sector_start_time[cars] = crossing_time
+        self.current_sector[cars] = line
+
+        finish = line == 0
+        if not finish.any():
+            return np.empty(0, dtype=np.intp)
+        finished, crossing_time = cars[finish], crossing_time[finish]
+        lap_time = crossing_time - self.lap_start_time[finished]
+        self.lap_start_time[finished] = crossing_time
+        timed = ~np.isnan(lap_time)
+        cars, lap_time = finished[timed], lap_time[timed]
+        if len(cars):
+            laps = self.laps_completed[cars]
+            if laps.max() >= self._lap_times.shape[1]:
+                self._grow()
+            self._lap_times[cars, laps] = lap_time
+            self._lap_sector_times[cars, laps] = self.current_sector_times[cars]
+            self.laps_completed[cars] += 1
+            self.last_lap_time[cars] = lap_time
+            self.best_lap_time[cars] = np.fmin(self.best_lap_time[cars], lap_time)
+        self.current_sector_times[finished] = np.nan
+        return cars
+
+    def _grow(self) -> None:
+        self._lap_times = np.concatenate((self._lap_times, np.full_like(self._lap_times, np.nan)), axis=1)
+        self._lap_sector_times = np.concatenate(
+            (self._lap_sector_times, np.full_like(self._lap_sector_times, np.nan)), axis=1)
+
+    def lap_times(self, car_idx: int) -> 'np.ndarray':
+        """
+        The times of the laps a car completed, in order.
+        """
+        return self._lap_times[car_idx, :self.laps_completed[car_idx]].copy()
+
+    def sector_times(self, car_idx: int) -> 'np.ndarray':
+        """
+        The sector times of the laps a car completed, one row per lap, NaN for sectors that were not timed.
+        """
+        return self._lap_sector_times[car_idx, :self.laps_completed[car_idx]].copy()
@@ -0,0 +1,151 @@
+import re
+from typing import Any, Dict, Optional, Sequence
+
+from .enums import TrackLocation
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def parse_track_length(track_length: Optional[str]) -> Optional[float]:
+    """
+    Parses a session info length such as '5.51 km' or '2.50 mi' to metres.
+    """
+    if not track_length:
+        return None
+    match = re.match(r'\s*([0-9.]+)\s*(km|mi|m)?', str(track_length))
+    if not match:
+        return None
+    return float(match.group(1)) * {'km': 1000.0, 'mi': 1609.344, 'm': 1.0}.get(match.group(2) or 'km')
+
+
+class TrackIndex:
+    """
+    A circular 1-D index of car positions around the lap, with start/finish wraparound.
+
+    Call `update()` (or `update_from()`) once per tick with `CarIdxLapDistPct`. Cars that are not in the world
+    are left out of every query. Distances are in metres when the track length is known, and in laps otherwise.
+    """
+
+    def __init__(self, track_length: Optional[float] = None, sector_starts: Optional[Sequence[float]] = None) -> None:
+        """
+        Args:
+            track_length: The track length in metres.
+            sector_starts: The `SectorStartPct` of each sector, in order.
+        """
+        if np is None:
+            raise ImportError('TrackIndex requires numpy, install it with: pip install py_iracing[numpy]')
+        self.track_length = track_length
+        self.sector_starts = np.asarray(sorted(sector_starts) if sector_starts else [0.0], dtype=np.float64)
+        self.lap_dist_pct = np.empty(0, dtype=np.float64)
+        self.valid = np.empty(0, dtype=bool)
+        self._order = np.empty(0, dtype=np.intp)
+        self._sorted = np.empty(0, dtype=np.float64)
+        self._rank = np.empty(0, dtype=np.intp)
+
+    @classmethod
+    def from_session_info(cls, weekend_info: Optional[Dict[str, Any]], split_time_info: Optional[Dict[str, Any]]) -> 'TrackIndex':
+        """
+        Creates an index from the `WeekendInfo` and `SplitTimeInfo` session info sections.
+        """
+        track_length = parse_track_length(weekend_info.get('TrackLength')) if weekend_info else None
+        sectors = (split_time_info or {}).get('Sectors') or []
+        return cls(track_length, [sector['SectorStartPct'] for sector in sectors])
+
+    def update(self, lap_dist_pct: Sequence[float], track_surface: Optional[Sequence[int]] = None) -> None:
+        """
+        Rebuilds the index from the positions of all cars.
+
+        Args:
+            lap_dist_pct: `CarIdxLapDistPct`, negative for cars that are not in the world.
+            track_surface: `CarIdxTrackSurface`, used to leave out cars that are not in the world.
+        """
+        self.lap_dist_pct = np.asarray(lap_dist_pct, dtype=np.float64)
+        self.valid = self.lap_dist_pct >= 0
+        if track_surface is not None:
+            self.valid &= np.asarray(track_surface) != TrackLocation.not_in_world
+        self._order = np.flatnonzero(self.valid)
+        self._order = self._order[np.argsort(self.lap_dist_pct[self._order], kind='stable')]
+        self._sorted = self.lap_dist_pct[self._order]
+        self._rank = np.empty(len(self.lap_dist_pct), dtype=np.intp)
+        self._rank[self._order] = np.arange(len(self._order))
+
+    async def update_from(self, ir: Any) -> None:
+        """
+        Rebuilds the index from an `iRacingClient`, reading both channels from the same tick.
+        """
+        values = await ir.get_consistent(['CarIdxLapDistPct', 'CarIdxTrackSurface'])
+        if values is not None:
+            self.update(values['CarIdxLapDistPct'], values['CarIdxTrackSurface'])
+
+    def _to_laps(self, distance: float) -> float:
+        return distance / self.track_length if self.track_length else distance
+
+    def _from_laps(self, laps: 'np.ndarray') -> 'np.ndarray':
+        return laps * self.track_length if self.track_length else laps
+
+    def in_range(self, start_pct: float, end_pct: float) -> 'np.ndarray':
+        """
+        The cars between two lap positions, going forward from `start_pct` and wrapping at start/finish.
+        """
+        if end_pct - start_pct >= 1.0:
+            return self._order.copy()
+        start_pct %= 1.0
+        end_pct %= 1.0
+        lo = np.searchsorted(self._sorted, start_pct, 'left')
+        hi = np.searchsorted(self._sorted, end_pct, 'right')
+        if start_pct <= end_pct:
+            return self._order[lo:hi]
+        return np.concatenate((self._order[lo:], self._order[:hi]))
+
+    def gaps(self, car_idx: int) -> 'np.ndarray':
+        """
+        The signed distance from `car_idx` to every car, positive for cars ahead, NaN for cars not in the world.
+        """
+        gaps = (self.lap_dist_pct - self.lap_dist_pct[car_idx] + 0.5) % 1.0 - 0.5
+        gaps[~self.valid] = np.nan
+        return self._from_laps(gaps)
+
+    def within(self, car_idx: int, distance: float) -> 'np.ndarray':
+        """
+        The cars other than `car_idx` within `distance` ahead of or behind it.
+        """
+        if not self.valid[car_idx]:
+            return np.empty(0, dtype=np.intp)
+        position = self.lap_dist_pct[car_idx]
+        laps = self._to_laps(distance)
+        cars = self.in_range(position - laps, position + laps)
+        return cars[cars != car_idx]
+
+    def nearest(self, car_idx: int, k: int = 1) -> 'np.ndarray':
+        """
+        The `k` cars closest to `car_idx` in either direction, closest first.
+
+        Only the `k` cars on either side of `car_idx` in the sorted positions are compared, wrapping at start/finish.
+        """
+        count = len(self._order)
+        k = min(k, count - 1)
+        if not self.valid[car_idx] or k <= 0:
+            return np.empty(0, dtype=np.intp)
+        steps = np.arange(1, k + 1)
+        position = self._rank[car_idx]
+        window = np.unique(np.concatenate(((position + steps) % count, (position - steps) % count)))
+        candidates = self._order[window]
+        distance = np.abs((self._sorted[window] - self.lap_dist_pct[car_idx] + 0.5) % 1.0 - 0.5)
+        return candidates[np.lexsort((candidates, distance))[:k]]
+
+    def sectors(self) -> 'np.ndarray':
+        """
+        The sector index of every car, -1 for cars not in the world.
+        """
+        sectors = np.searchsorted(self.sector_starts, self.lap_dist_pct, 'right') - 1
+        sectors[sectors < 0] = len(self.sector_starts) - 1
+        sectors[~self.valid] = -1
+        return sectors
+
+    def sector_of(self, car_idx: int) -> int:
+        if not self.valid[car_idx]:
+            return -1
+        return int(np.searchsorted(self.sector_starts, self.lap_dist_pct[car_idx], 'right') - 1) % len(self.sector_starts)
@@ -1,7 +1,10 @@
+import re
 import yaml
-from typing import Any, Type
+from typing import Any, Optional, Type, Union
 from yaml.reader import Reader as YamlReader
 
+from .constants import YAML_CODE_PAGE, YAML_TRANSLATER
+
 try:
     from yaml.cyaml import CSafeLoader as YamlSafeLoader
 except ImportError:
@@ -16,4 +19,41 @@ class CustomYamlSafeLoader(YamlSafeLoader):
         for first_letter, mappings in cls.yaml_implicit_resolvers.items():
             cls.yaml_implicit_resolvers[first_letter] = [(tag, regexp) for tag, regexp in mappings if tag != tag_to_remove]
 
-CustomYamlSafeLoader.remove_implicit_resolver('tag:yaml.org,2002:timestamp')
\ No newline at end of file
+CustomYamlSafeLoader.remove_implicit_resolver('tag:yaml.org,2002:timestamp')
+
+
+def find_section(buffer: Union[bytes, memoryview, Any], start: int, end: int, key: str) -> Optional[bytes]:
+    """
+    Finds a top-level section of the session info YAML within `buffer[start:end]`.
+
+    Returns:
+        The raw bytes of the section, including its `key:` line, or None if there is no such section.
+    """
+    match_start = re.compile(('\n%s:\n' % key).encode(YAML_CODE_PAGE)).search(buffer, start, end)
+    if not match_start:
+        return None
+    match_end = re.compile(b'\n\n').search(buffer, match_start.start() + 1, end)
+    if not match_end:
+        return None
+    return buffer[match_start.start() + 1: match_end.start()]
+
+
+def prepare_yaml(data_binary: bytes, key: str) -> str:
+    """
+    Decodes a session info section and fixes up the values iRacing does not quote.
+    """
+    yaml_src = re.sub(YamlReader.NON_PRINTABLE, '', data_binary.translate(YAML_TRANSLATER).rstrip(b'\x00').decode(YAML_CODE_PAGE))
+    if key == 'DriverInfo':
+        def name_replace(m: re.Match) -> str:
+            return m.group(1) + '"%s"' % re.sub(r'(["\\])', r'\\\1', m.group(2))
+        yaml_src = re.sub(r'((?:DriverSetupName|UserName|TeamName|AbbrevName|Initials): )(.*)', name_replace, yaml_src)
+    yaml_src = re.sub(r'(\w+: )(,.*)', r'\1"\2"', yaml_src)
+    return yaml_src
+
+
+def parse_section(data_binary: bytes, key: str) -> Any:
+    """
+    Parses a session info section found with `find_section()`.
+    """
+    result = yaml.load(prepare_yaml(data_binary, key), Loader=CustomYamlSafeLoader)
+    return result.get(key) if result else None
@@ -27,6 +27,11 @@ setup(
         'PyYAML >= 5.3',
         'aiohttp >= 3.8.1',
     ],
+    extras_require={
+        'numpy': ['numpy >= 1.20'],
+        'pandas': ['numpy >= 1.20', 'pandas >= 1.3'],
+        'polars': ['numpy >= 1.20', 'polars >= 1.0'],
+    },
     tests_require=[
         'pytest',
         'pytest-asyncio',
@@ -0,0 +1,122 @@
+import mmap
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from py_iracing.constants import VAR_TYPE_MAP
+
+HEADER_SIZE = 112
+DISK_SUB_HEADER_SIZE = 32
+VAR_HEADER_SIZE = 144
+
+Variable = Tuple[str, str, int]
+
+
+def _var_layout(variables: Sequence[Variable]) -> Tuple[List[int], int]:
+    offsets = []
+    offset = 0
+    for _, type_char, count in variables:
+        offsets.append(offset)
+        offset += struct.calcsize('<' + type_char) * count
+    return offsets, (offset + 15) // 16 * 16
+
+
+def _pack_record(variables: Sequence[Variable], offsets: List[int], buf_len: int, values: Dict[str, object]) -> bytes:
+    record = bytearray(buf_len)
+    for (name, type_char, count), offset in zip(variables, offsets):
+        value = values.get(name, [0] * count if count > 1 else 0)
+        if type_char == 'c' and not isinstance(value, (list, tuple)):
+            value = [value] if count > 1 else value
+        items = list(value) if count > 1 else [value]
+        struct.pack_into('<' + type_char * count, record, offset, *items)
+    return bytes(record)
+
+
+def build_image(variables: Sequence[Variable], records: Sequence[Dict[str, object]],
+                session_info: str = '', tick_counts: Optional[Sequence[int]] = None,
+                ibt: bool = False, session_info_update: int = 1, status: int = 1,
+                tick_rate: int = 60, lap_count: int = 0) -> bytearray:
+    """
+    Builds a memory image laid out like the iRacing shared memory map.
+
+    Live images get one var buffer per record, .ibt images get a single var buffer followed by all records.
+    """
+    offsets, buf_len = _var_layout(variables)
+    var_header_offset = HEADER_SIZE + DISK_SUB_HEADER_SIZE
+    session_info_offset = var_header_offset + VAR_HEADER_SIZE * len(variables)
+    session_info_bytes = session_info.encode('latin-1') + b'\x00'
+    session_info_len = len(session_info_bytes)
+    data_offset = (session_info_offset + session_info_len + 15) // 16 * 16
+    num_buf = 1 if ibt else len(records)
+    if tick_counts is None:
+        tick_counts = list(range(1, num_buf + 1))
+
+    size = data_offset + buf_len * len(records)
+    image = bytearray(size)
+    struct.pack_into('<10i', image, 0, 2, status, tick_rate, session_info_update, session_info_len,
+                     session_info_offset, len(variables), var_header_offset, num_buf, buf_len)
+    for i in range(num_buf):
+        struct.pack_into('<2i', image, 48 + i * 16, tick_counts[i], data_offset + i * buf_len)
+    if ibt:
+        struct.pack_into('<QddII', image, HEADER_SIZE, 0, 0.0, 0.0, lap_count, len(records))
+
+    for i, ((name, type_char, count), offset) in enumerate(zip(variables, offsets)):
+        struct.pack_into('<4i32s64s32s', image, var_header_offset + i * VAR_HEADER_SIZE,
+                         VAR_TYPE_MAP.index(type_char), offset, count, 0,
+                         name.encode('latin-1'), b'', b'')
+    image[session_info_offset:session_info_offset + session_info_len] = session_info_bytes
+
+    for i, values in enumerate(records):
+        image[data_offset + i * buf_len:data_offset + (i + 1) * buf_len] = _pack_record(variables, offsets, buf_len, values)
+    return image
+
+
+def write_image(path: str, *args, **kwargs) -> str:
+    with open(path, 'wb') as f:
+        f.write(build_image(*args, **kwargs))
+    return str(path)
+
+
+class FakeSim:
+    """
+    Writes ticks and session info updates into a live test image the way iRacing does, rotating its var buffers.
+    """
+
+    def __init__(self, path: str, variables: Sequence[Variable]) -> None:
+        self._file = open(path, 'r+b')
+        self.mem = mmap.mmap(self._file.fileno(), 0)
+        offsets, _ = _var_layout(variables)
+        self._structs = {name: (struct.Struct('<' + type_char * count), offset)
+                         for (name, type_char, count), offset in zip(variables, offsets)}
+        self.num_buf = struct.unpack_from('<i', self.mem, 32)[0]
+        self.tick = max(struct.unpack_from('<i', self.mem, 48 + i * 16)[0] for i in range(self.num_buf))
+
+    def write(self, **values: object) -> None:
+        """
+        Writes the next tick into the next var buffer, setting only the given variables.
+        """
+        self.tick += 1
+        index = self.tick % self.num_buf
+        buf_offset = struct.unpack_from('<i', self.mem, 48 + index * 16 + 4)[0]
+        for name, value in values.items():
+            var_struct, offset = self._structs[name]
+            items = list(value) if isinstance(value, (list, tuple)) else [value]
+            var_struct.pack_into(self.mem, buf_offset + offset, *items)
+        struct.pack_into('<i', self.mem, 48 + index * 16, self.tick)
+
+    def update_session_info(self, session_info: str) -> None:
+        session_info_update, session_info_len, session_info_offset = struct.unpack_from('<3i', self.mem, 12)
+        self.mem[session_info_offset:session_info_offset + session_info_len] = (
+            session_info.encode('latin-1').ljust(session_info_len, b'\x00'))
+        struct.pack_into('<i', self.mem, 12, session_info_update + 1)
+
+    def rename_track(self, old: bytes, new: bytes) -> None:
+        """
+        Overwrites part of the session info in place, so only the pages holding it change.
+        """
+        start = self.mem.find(old)
+        self.mem[start:start + len(new)] = new
+        struct.pack_into('<i', self.mem, 12, struct.unpack_from('<i', self.mem, 12)[0] + 1)
+
+    def close(self) -> None:
+        self.mem.close()
+        self._file.close()
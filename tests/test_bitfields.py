@@ -0,0 +1,45 @@
+import pytest
+
+from py_iracing.bitfields import EnumDecoder
+from py_iracing.enums import Flags, TrackLocation
+from py_iracing.ibt import IBT
+from tests.fakes import write_image
+
+np = pytest.importorskip('numpy')
+
+
+def test_bitfield_masks_over_live_array():
+    decoder = EnumDecoder.for_channel('CarIdxSessionFlags')
+    assert decoder is EnumDecoder.for_channel('CarIdxSessionFlags')
+    flags = np.array([Flags.green, Flags.yellow | Flags.blue, Flags.start_go | Flags.yellow, 0], dtype='<u4')
+    assert decoder.test(flags, 'yellow').tolist() == [False, True, True, False]
+    assert decoder.where(flags, ['yellow', Flags.blue], require_all=True).tolist() == [1]
+    assert decoder.where(flags.view('<i4'), Flags.start_go).tolist() == [2]
+    assert decoder.where(list(flags), 'green').tolist() == [0]
+    assert decoder.unpack(flags)['blue'].tolist() == [False, True, False, False]
+    assert bool(decoder.test(int(Flags.yellow), 'yellow'))
+
+
+def test_enum_lookup_over_ibt_column(tmp_path):
+    rows = [{'CarIdxTrackSurface': [3, 0, -1, i % 5]} for i in range(5)]
+    path = write_image(tmp_path / 'a.ibt', [('CarIdxTrackSurface', 'i', 4)], rows, ibt=True)
+    decoder = EnumDecoder.for_channel('CarIdxTrackSurface')
+    assert decoder.enum is TrackLocation
+    ibt = IBT()
+    ibt.open(path)
+    try:
+        column = ibt.get_array('CarIdxTrackSurface')
+        off_track = decoder.where(column, TrackLocation.off_track)
+        assert off_track.tolist() == [[0, 1], [0, 3], [1, 1], [2, 1], [3, 1], [4, 1]]
+        assert decoder.where(column[1], ['in_pit_stall', 'on_track']).tolist() == [0, 3]
+    finally:
+        ibt.close()
+
+    assert bool(decoder.test(3, 'on_track')) and not bool(decoder.test(-1, 'on_track'))
+    assert not bool(decoder.test(np.int32(100), 'on_track'))
+    assert decoder.where(3, TrackLocation.on_track).tolist() == [0]
+
+    with pytest.raises(TypeError):
+        decoder.mask('on_track')
+    with pytest.raises(KeyError):
+        EnumDecoder.for_channel('Speed')
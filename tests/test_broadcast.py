@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from py_iracing.broadcast import BroadcastScheduler, FakeBroadcastBackend, coalesce_key
+from py_iracing.client import iRacingClient
+from py_iracing.enums import BroadcastMsg, PitCommandMode, ReplaySearchMode
+
+
+def test_coalesce_key():
+    assert coalesce_key(BroadcastMsg.cam_switch_pos, 1) == coalesce_key(BroadcastMsg.cam_switch_num, 5)
+    assert coalesce_key(BroadcastMsg.pit_command, PitCommandMode.fuel, 10) != coalesce_key(BroadcastMsg.pit_command, PitCommandMode.fuel, 20)
+    assert coalesce_key(BroadcastMsg.replay_search, ReplaySearchMode.next_incident) is None
+    assert coalesce_key(BroadcastMsg.replay_search, ReplaySearchMode.to_end) == coalesce_key(BroadcastMsg.replay_search_session_time, 0, 1000)
+
+
+@pytest.mark.asyncio
+async def test_client_sends_directly_without_scheduler():
+    backend = FakeBroadcastBackend()
+    ir = iRacingClient(broadcast_backend=backend)
+    assert ir.pit_command(PitCommandMode.fuel, 50) == 1
+    assert backend.sent == [(BroadcastMsg.pit_command, PitCommandMode.fuel, 50, 0)]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_coalesces_superseded_commands():
+    backend = FakeBroadcastBackend()
+    ir = iRacingClient(broadcast_backend=backend)
+    scheduler = ir.start_broadcast_scheduler()
+
+    futures = [ir.cam_switch_pos(position) for position in range(1, 100)]
+    futures += [ir.pit_command(PitCommandMode.lf), ir.pit_command(PitCommandMode.lf), ir.pit_command(PitCommandMode.rf)]
+    assert await asyncio.gather(*futures) == [1] * len(futures)
+    await ir.stop_broadcast_scheduler()
+
+    assert backend.sent == [
+        (BroadcastMsg.cam_switch_pos, 99, 1, 0),
+        (BroadcastMsg.pit_command, PitCommandMode.lf, 0, 0),
+        (BroadcastMsg.pit_command, PitCommandMode.rf, 0, 0),
+    ]
+    assert scheduler.metrics == {'submitted': 102, 'sent': 3, 'coalesced': 99, 'failed': 0}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_keeps_command_order():
+    backend = FakeBroadcastBackend()
+    scheduler = BroadcastScheduler(backend)
+    commands = [
+        (BroadcastMsg.pit_command, PitCommandMode.fuel, 50, 0),
+        (BroadcastMsg.pit_command, PitCommandMode.clear_fuel, 0, 0),
+        (BroadcastMsg.pit_command, PitCommandMode.fuel, 50, 0),
+        (BroadcastMsg.replay_search, ReplaySearchMode.to_start, 0, 0),
+        (BroadcastMsg.replay_search, ReplaySearchMode.next_incident, 0, 0),
+        (BroadcastMsg.replay_search_session_time, 0, 1000, 0),
+    ]
+    futures = [scheduler.submit(*command) for command in commands]
+    with pytest.raises(RuntimeError):
+        await scheduler.join()
+    scheduler.start()
+    await asyncio.gather(*futures)
+    await scheduler.stop()
+
+    assert backend.sent == commands
+    assert scheduler.metrics['coalesced'] == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_drops_repeated_pit_commands():
+    backend = FakeBroadcastBackend()
+    scheduler = BroadcastScheduler(backend)
+    # Like a pit service request resent after a timeout, while the first one is still queued
+    tires = [(BroadcastMsg.pit_command, mode, 0, 0) for mode in (PitCommandMode.lf, PitCommandMode.rf)]
+    fuel = (BroadcastMsg.pit_command, PitCommandMode.fuel, 60, 0)
+    futures = [scheduler.submit(*command) for command in tires + [fuel] + tires + [fuel]]
+    futures.append(scheduler.submit(BroadcastMsg.pit_command, PitCommandMode.clear_tires))
+    futures.append(scheduler.submit(*tires[0]))
+    scheduler.start()
+    await asyncio.gather(*futures)
+    await scheduler.stop()
+
+    assert backend.sent == tires + [fuel, (BroadcastMsg.pit_command, PitCommandMode.clear_tires, 0, 0), tires[0]]
+    assert scheduler.metrics['coalesced'] == 3
+
+
+@pytest.mark.asyncio
+async def test_scheduler_applies_rate_limit():
+    backend = FakeBroadcastBackend()
+    scheduler = BroadcastScheduler(backend, rate_limit=100.0, burst=1)
+    scheduler.start()
+    futures = [scheduler.submit(BroadcastMsg.replay_search, ReplaySearchMode.next_frame) for _ in range(6)]
+    await asyncio.gather(*futures)
+    await scheduler.stop()
+
+    assert len(backend.sent) == 6
+    assert backend.sent_at[-1] - backend.sent_at[0] >= 0.045
+
+
+@pytest.mark.asyncio
+async def test_scheduler_propagates_send_errors():
+    class FailingBackend:
+        def send(self, *args):
+            raise OSError('no window')
+
+    scheduler = BroadcastScheduler(FailingBackend())
+    scheduler.start()
+    with pytest.raises(OSError):
+        await scheduler.submit(BroadcastMsg.video_capture)
+    scheduler.close()
+    assert scheduler.metrics['failed'] == 1
@@ -0,0 +1,90 @@
+
+import pytest
+
+from py_iracing.capture import CaptureReader, MemoryCapture
+from py_iracing.client import iRacingClient
+from py_iracing.snapshot import Snapshot, dump_snapshot
+from py_iracing.structs import Header, VarBuffer
+from tests.fakes import FakeSim, build_image
+
+VARIABLES = [('Speed', 'f', 1), ('Gear', 'i', 1)]
+SESSION_INFO = '---\nWeekendInfo:\n TrackName: spa\n\n...\n'
+
+
+def _read(image):
+    return Snapshot(dump_snapshot(Header(bytes(image))))
+
+
+@pytest.mark.asyncio
+async def test_capture_and_replay(tmp_path):
+    path = tmp_path / 'live.bin'
+    path.write_bytes(build_image(VARIABLES, [{}, {}, {}], session_info=SESSION_INFO))
+    sim = FakeSim(path, VARIABLES)
+    ir = iRacingClient()
+    assert await ir.startup(test_file=str(path))
+    capture = MemoryCapture(ir, str(tmp_path / 'session.cap'))
+    for i in range(10):
+        if i == 5:
+            sim.rename_track(b'spa', b'spb')
+        sim.write(Speed=float(i), Gear=i % 6)
+        ir.freeze_var_buffer_now()
+        capture.capture_tick(ir._var_buffer_latest)
+    pages_written = len(capture.writer.pages)
+    capture.close()
+    ir.shutdown()
+    sim.close()
+
+    with CaptureReader(str(tmp_path / 'session.cap')) as reader:
+        assert len(reader) == 10
+        assert [tick.tick_count for tick in reader.ticks] == list(range(4, 14))
+        assert len(reader.pages) == pages_written
+        assert _read(reader.image_at(3))['Speed'] == 3.0
+        assert _read(reader.image_at(3)).session_info('WeekendInfo')['TrackName'] == 'spa'
+        assert _read(reader.image_at(7)).session_info('WeekendInfo')['TrackName'] == 'spb'
+
+        replay_path = tmp_path / 'replay.bin'
+        seen = []
+        await reader.replay(str(replay_path), speed=0, start=2, on_tick=lambda tick: seen.append(
+            (tick.tick_count, _read(replay_path.read_bytes())['Speed'])))
+        assert seen == [(tick, float(tick - 4)) for tick in range(6, 14)]
+        assert _read(replay_path.read_bytes()).session_info('WeekendInfo')['TrackName'] == 'spb'
+
+
+@pytest.mark.asyncio
+async def test_failed_freeze_skips_the_tick(tmp_path, monkeypatch):
+    path = tmp_path / 'live.bin'
+    path.write_bytes(build_image(VARIABLES, [{}, {}, {}], session_info=SESSION_INFO))
+    sim = FakeSim(path, VARIABLES)
+    ir = iRacingClient()
+    assert await ir.startup(test_file=str(path))
+    sim.write(Speed=1.0, Gear=1)
+    # Every freeze races the sim and runs out of retries, leaving the buffer unfrozen
+    monkeypatch.setattr(VarBuffer, 'freeze', lambda self, max_retries=2: max_retries + 1)
+    assert not ir.freeze_var_buffer_now()
+    capture = MemoryCapture(ir, str(tmp_path / 'session.cap'))
+    with pytest.raises(ValueError):
+        capture.capture_tick(ir._var_buffer_latest)
+    await capture.run(duration=0.1)
+    assert capture.writer is None
+    ir.shutdown()
+    sim.close()
+
+
+def test_capture_without_index_is_scanned(tmp_path):
+    path = tmp_path / 'live.bin'
+    path.write_bytes(build_image(VARIABLES, [{'Speed': 1.0}, {'Speed': 3.0}, {'Speed': 2.0}], tick_counts=[1, 3, 2]))
+
+    class Client:
+        _shared_mem = path.read_bytes()
+        _header = Header(_shared_mem)
+
+    capture = MemoryCapture(Client(), str(tmp_path / 'crashed.cap'))
+    var_buf = max(Client._header.var_buf, key=lambda v: v.tick_count)
+    var_buf.freeze()
+    capture.capture_tick(var_buf)
+    capture.writer._file.flush()
+
+    with CaptureReader(str(tmp_path / 'crashed.cap')) as reader:
+        assert [tick.tick_count for tick in reader.ticks] == [3]
+        assert _read(reader.image_at(0))['Speed'] == 3.0
+    capture.close()
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from py_iracing import catalog as catalog_module
+from py_iracing.catalog import Catalog, parse_lap_time
+from py_iracing.ibt import IBT
+from tests.fakes import write_image
+
+np = pytest.importorskip('numpy')
+
+VARIABLES = [('SessionTime', 'd', 1), ('Lap', 'i', 1), ('LapDistPct', 'f', 1), ('Speed', 'f', 1)]
+
+
+def _session_info(track, car):
+    return (
+        '---\n'
+        f'WeekendInfo:\n TrackName: {track}\n TrackDisplayName: {track.title()}\n TrackID: 1\n TrackLength: 7.00 km\n\n'
+        f'DriverInfo:\n DriverCarIdx: 0\n Drivers:\n - CarIdx: 0\n   CarPath: {car}\n   CarScreenName: {car.upper()}\n   CarID: 2\n\n'
+        '...\n'
+    )
+
+
+def _write(path, lap_time, track='spa', car='mx5', records=300, dt=0.5):
+    rows = []
+    for i in range(records):
+        distance = 0.5 + i * dt / lap_time
+        rows.append({'SessionTime': i * dt, 'Lap': int(distance), 'LapDistPct': distance % 1.0, 'Speed': 50.0})
+    return write_image(path, VARIABLES, rows, session_info=_session_info(track, car), ibt=True)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    folder = tmp_path / 'archive'
+    (folder / 'nested').mkdir(parents=True)
+    _write(folder / 'fast.ibt', 95.0)
+    _write(folder / 'nested' / 'slow.ibt', 105.0)
+    _write(folder / 'other.ibt', 90.0, track='monza')
+    return folder
+
+
+def test_parse_lap_time():
+    assert parse_lap_time('1:40') == 100.0
+    assert parse_lap_time('1:39.5') == 99.5
+    assert parse_lap_time('88.25') == 88.25
+    with pytest.raises(ValueError):
+        parse_lap_time('fast')
+
+
+def test_scan_without_numpy(tmp_path, archive, monkeypatch):
+    monkeypatch.setattr(catalog_module, 'np', None)
+    with Catalog(str(tmp_path / 'laps.db')) as catalog:
+        with pytest.raises(ImportError, match='numpy'):
+            catalog.scan(str(archive))
+        # Querying an existing catalog does not need numpy
+        assert catalog.laps() == []
+
+
+def test_scan_and_query(tmp_path, archive):
+    with Catalog(str(tmp_path / 'catalog.db')) as catalog:
+        result = catalog.scan(str(archive), workers=0)
+        assert (result.added, result.failed) == (3, {})
+
+        files = catalog.files(track='spa', car='MX5')
+        assert [os.path.basename(path) for path in files] == ['fast.ibt', 'slow.ibt']
+        assert catalog.files(track='Spa', max_lap_time=parse_lap_time('1:40')) == [files[0]]
+        assert catalog.channels(files[0]) == ['SessionTime', 'Lap', 'LapDistPct', 'Speed']
+
+        laps = catalog.laps(track='spa', max_lap_time=100.0)
+        assert len(laps) == 1
+        lap_range, lap_time = laps[0]
+        assert lap_time == pytest.approx(95.0, abs=1e-3)
+
+    ibt = IBT()
+    ibt.open(lap_range.file_name)
+    lap = ibt.get_array('Lap', lap_range.start, lap_range.stop)
+    ibt.close()
+    assert (lap == lap_range.lap).all()
+
+
+def test_rescan_is_incremental(tmp_path, archive):
+    with Catalog(str(tmp_path / 'catalog.db')) as catalog:
+        catalog.scan(str(archive), workers=0)
+        result = catalog.scan(str(archive), workers=0)
+        assert (result.added, result.updated, result.unchanged) == (0, 0, 3)
+
+        os.remove(archive / 'other.ibt')
+        _write(archive / 'fast.ibt', 99.0, records=320)
+        (archive / 'broken.ibt').write_bytes(b'\x00' * 16)
+        result = catalog.scan(str(archive), workers=2)
+        assert (result.added, result.updated, result.unchanged, result.removed) == (0, 1, 1, 1)
+        assert list(result.failed) == [str(archive / 'broken.ibt')]
+        assert catalog.laps(track='spa')[0][1] == pytest.approx(99.0, abs=1e-3)
+        assert len(catalog) == 2
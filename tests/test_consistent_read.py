@@ -0,0 +1,149 @@
+import struct
+from unittest.mock import PropertyMock, patch
+
+import pytest
+import pytest_asyncio
+
+from py_iracing import client
+from py_iracing.client import iRacingClient
+from py_iracing.structs import Header, VarBuffer
+from tests.fakes import build_image, write_image
+
+VARIABLES = [('Speed', 'f', 1), ('Gear', 'i', 1), ('RPM', 'f', 1), ('CarIdxLap', 'i', 4)]
+RECORDS = [
+    {'Speed': 1.0, 'Gear': 1, 'RPM': 1000.0, 'CarIdxLap': [1, 1, 1, 1]},
+    {'Speed': 3.0, 'Gear': 3, 'RPM': 3000.0, 'CarIdxLap': [3, 3, 3, 3]},
+    {'Speed': 2.0, 'Gear': 2, 'RPM': 2000.0, 'CarIdxLap': [2, 2, 2, 2]},
+]
+
+
+class RacingBuffer(bytearray):
+    """A memory image whose first var buffer gets a new tick while it is being copied."""
+
+    races = 0
+
+    def __getitem__(self, item):
+        if isinstance(item, slice) and self.races:
+            self.races -= 1
+            struct.pack_into('<i', self, 48, struct.unpack_from('<i', self, 48)[0] + 1)
+        return super().__getitem__(item)
+
+
+@pytest_asyncio.fixture
+async def ir(tmp_path):
+    ir = iRacingClient()
+    assert await ir.startup(test_file=write_image(tmp_path / 'test.bin', VARIABLES, RECORDS, tick_counts=[1, 3, 2]))
+    yield ir
+    ir.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_get_consistent_reads_same_buffer_as_get(ir):
+    # Unfrozen reads use the buffer before the latest one, which the sim has finished writing
+    values = await ir.get_consistent(['RPM', 'Speed', 'CarIdxLap'])
+    assert values == {'RPM': 2000.0, 'Speed': 2.0, 'CarIdxLap': [2, 2, 2, 2]}
+    assert values == {key: await ir.get(key) for key in values}
+    assert ir.torn_read_retries == 0
+
+
+@pytest.mark.asyncio
+async def test_get_consistent_retries_torn_reads(ir):
+    with patch.object(VarBuffer, 'tick_count', new_callable=PropertyMock, side_effect=[1, 3, 2, 3, 4, 4, 4]):
+        values = await ir.get_consistent(['Gear'])
+    assert values == {'Gear': 2}
+    assert ir.torn_read_retries == 1
+
+
+@pytest.mark.asyncio
+async def test_get_consistent_gives_up_after_max_retries(ir):
+    with patch.object(VarBuffer, 'tick_count', new_callable=PropertyMock, side_effect=[1, 3, 2, 3, 4, 5, 6, 7, 8]):
+        assert await ir.get_consistent(['Gear'], max_retries=2) is None
+    assert ir.torn_read_retries == 3
+
+
+@pytest.mark.asyncio
+async def test_read_plans_are_shared_and_bounded(ir, monkeypatch):
+    monkeypatch.setattr(client, 'READ_PLAN_CACHE_SIZE', 2)
+    plans = ir._iRacingClient__read_plans
+    assert list(ir.read_consistent(['Speed', 'Gear', 'Speed'])) == ['Speed', 'Gear']
+    assert list(ir.read_consistent(['Gear', 'Speed'])) == ['Gear', 'Speed']
+    assert list(plans) == [('Gear', 'Speed')]
+    ir.read_consistent(['RPM'])
+    ir.read_consistent(['Gear', 'Speed'])
+    ir.read_consistent(['CarIdxLap'])
+    assert list(plans) == [('Gear', 'Speed'), ('CarIdxLap',)]
+    assert len(ir._iRacingClient__compiled_readers) == 2
+
+
+def test_freeze_retries_torn_copy():
+    memory = RacingBuffer(build_image(VARIABLES, RECORDS, tick_counts=[1, 3, 2]))
+    memory.races = 1
+    var_buf = Header(memory).var_buf[0]
+    assert var_buf.freeze() == 1
+    assert var_buf.tick_count == 2
+
+    memory.races = 3
+    var_buf.unfreeze()
+    assert var_buf.freeze() == 3
+    assert not var_buf.is_memory_frozen and var_buf.get_memory() is memory
+
+
+@pytest.mark.asyncio
+async def test_freeze_falls_back_to_previous_tick(ir):
+    freeze = VarBuffer.freeze
+    racing = {3}
+
+    def racing_freeze(var_buf, max_retries=2):
+        if var_buf.tick_count in racing:
+            return max_retries + 1
+        return freeze(var_buf, max_retries)
+
+    with patch.object(VarBuffer, 'freeze', racing_freeze):
+        assert ir.freeze_var_buffer_now()
+        assert ir._var_buffer_latest.tick_count == 2
+        assert ir['Speed'] == 2.0
+        racing.add(2)
+        assert not ir.freeze_var_buffer_now()
+    assert not ir._var_buffer_latest.is_memory_frozen
+    assert ir.torn_read_retries == 9
+
+
+@pytest.mark.asyncio
+async def test_sync_reads_match_async_reads(ir):
+    ir.freeze_var_buffer_now()
+    assert ir.read('Speed') == ir['Speed'] == await ir.get('Speed') == 3.0
+    assert ir.read_consistent(['Gear', 'CarIdxLap', 'WeekendInfo']) == {'Gear': 3, 'CarIdxLap': [3, 3, 3, 3]}
+    assert ir.read('WeekendInfo') is None
+    with pytest.raises(KeyError):
+        ir['WeekendInfo']
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('array_type', ['memoryview', 'numpy'])
+async def test_array_views_share_frozen_snapshot(tmp_path, array_type):
+    if array_type == 'numpy':
+        pytest.importorskip('numpy')
+    ir = iRacingClient(array_type=array_type)
+    assert await ir.startup(test_file=write_image(tmp_path / 'test.bin', VARIABLES, RECORDS, tick_counts=[1, 3, 2]))
+    await ir.freeze_var_buffer_latest()
+    laps = ir['CarIdxLap']
+    assert list(laps) == [3, 3, 3, 3]
+    assert (await ir.get_consistent(['CarIdxLap', 'Gear']))['CarIdxLap'].tolist() == [3, 3, 3, 3]
+    assert ir['Speed'] == 3.0
+    if array_type == 'numpy':
+        assert laps.dtype == 'int32' and not laps.flags.writeable
+    else:
+        assert laps.format == 'i' and laps.readonly
+
+    ir.unfreeze_var_buffer_latest()
+    assert list(laps) == [3, 3, 3, 3]
+    assert list(ir.read_consistent(['CarIdxLap'])['CarIdxLap']) == [2, 2, 2, 2]
+    live = ir.read('CarIdxLap')
+    ir.array_type = 'list'
+    assert list(live) == ir.read('CarIdxLap')
+    ir.shutdown()
+
+
+def test_array_type_is_validated():
+    with pytest.raises(ValueError):
+        iRacingClient(array_type='tuple')
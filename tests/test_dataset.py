@@ -0,0 +1,50 @@
+import math
+
+import pytest
+
+from py_iracing.dataset import IBTDataset
+from tests.fakes import write_image
+
+np = pytest.importorskip('numpy')
+
+
+def _write(path, times, variables, **values):
+    rows = [dict({'SessionTime': t}, **{key: value[i] for key, value in values.items()}) for i, t in enumerate(times)]
+    return write_image(path, [('SessionTime', 'd', 1)] + variables, rows, ibt=True)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    first = _write(tmp_path / 'a.ibt', [0.0, 0.5, 1.0], [('Speed', 'f', 1), ('Gear', 'i', 1)],
+                   Speed=[1.0, 2.0, 3.0], Gear=[1, 2, 3])
+    # The second stint restarts its session clock and has no Gear channel
+    second = _write(tmp_path / 'b.ibt', [0.0, 0.5], [('Speed', 'f', 1), ('FuelLevel', 'f', 1)],
+                    Speed=[4.0, 5.0], FuelLevel=[10.0, 9.0])
+    with IBTDataset([first, second]) as dataset:
+        yield dataset
+
+
+def test_global_indexing_and_schema(dataset):
+    assert len(dataset) == 5
+    assert dataset.var_headers_names == ['SessionTime', 'Speed', 'Gear', 'FuelLevel']
+    assert dataset.locate(3) == (1, 0)
+    assert dataset.segments(1, 4) == [(0, 1, 3), (1, 0, 1)]
+    assert dataset.get(4, 'Speed') == 5.0
+    assert math.isnan(dataset.get(4, 'Gear'))
+    assert dataset.get(-1, 'FuelLevel') == 9.0
+
+
+def test_arrays_fill_missing_channels_with_nan(dataset):
+    gear = dataset.get_all('Gear')
+    assert gear.dtype == np.float64
+    assert gear[:3].tolist() == [1.0, 2.0, 3.0] and np.isnan(gear[3:]).all()
+    assert dataset.get_array('Speed', 2, 4).tolist() == [3.0, 4.0]
+    assert dataset.get_all('Speed').dtype == np.float32
+
+
+def test_time_continuity_and_slices(dataset):
+    times = dataset.get_all('SessionTime')
+    assert times == pytest.approx([0.0, 0.5, 1.0, 1.0 + 1 / 60, 1.5 + 1 / 60])
+    assert dataset.get(3, 'SessionTime') == pytest.approx(1.0 + 1 / 60)
+    assert dataset.time_slice(0.5, 1.2) == (1, 4)
+    assert dataset.get_time_slice('Speed', 0.9, 2.0).tolist() == [3.0, 4.0, 5.0]
@@ -0,0 +1,81 @@
+import pytest
+
+from py_iracing.client import iRacingClient
+from py_iracing.derived import DerivedChannels, builtin_channels
+from py_iracing.ibt import IBT
+from tests.fakes import write_image
+
+VARIABLES = [('LatAccel', 'f', 1), ('LongAccel', 'f', 1), ('Speed', 'f', 1)]
+RECORDS = [{'LatAccel': 9.80665 * i, 'LongAccel': 0.0, 'Speed': 10.0 * i} for i in range(3)]
+
+
+def test_resolve_orders_dependencies_first():
+    channels = builtin_channels()
+    assert channels.resolve('CombinedG') == ['LatG', 'LongG', 'CombinedG']
+    assert channels.native_inputs(['CombinedG', 'SpeedKph']) == ['LatAccel', 'LongAccel', 'Speed']
+
+
+def test_resolve_detects_cycles():
+    channels = DerivedChannels()
+    channels.register('A', ['B'], lambda b: b)
+    channels.register('B', ['A'], lambda a: a)
+    with pytest.raises(ValueError):
+        channels.resolve('A')
+
+
+def test_evaluate_computes_each_channel_once_per_cache():
+    calls = []
+    channels = DerivedChannels()
+
+    @channels.register('Double', ['Speed'])
+    def double(speed):
+        calls.append(speed)
+        return speed * 2
+
+    channels.register('Quadruple', ['Double'], lambda d: d * 2)
+    cache = {}
+    assert channels.evaluate('Quadruple', {'Speed': 3}.get, cache) == 12
+    assert channels.evaluate('Double', {'Speed': 3}.get, cache) == 6
+    assert calls == [3]
+
+
+@pytest.mark.asyncio
+async def test_client_reads_derived_channels(tmp_path):
+    ir = iRacingClient(derived_channels=builtin_channels())
+    assert await ir.startup(test_file=write_image(tmp_path / 'test.bin', VARIABLES, RECORDS))
+    await ir.freeze_var_buffer_latest()
+
+    assert await ir.get('LatG') == pytest.approx(2.0)
+    values = await ir.get_consistent(['SpeedKph', 'CombinedG', 'Speed'])
+    assert values == pytest.approx({'SpeedKph': 72.0, 'CombinedG': 2.0, 'Speed': 20.0})
+    assert await ir.get('VertG') is None
+    ir.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_unfrozen_reads_share_the_tick_cache(tmp_path):
+    calls = []
+    channels = DerivedChannels()
+
+    @channels.register('Double', ['Speed'])
+    def double(speed):
+        calls.append(speed)
+        return speed * 2
+
+    ir = iRacingClient(derived_channels=channels)
+    assert await ir.startup(test_file=write_image(tmp_path / 'test.bin', VARIABLES, RECORDS))
+    for _ in range(3):
+        assert await ir.get('Double') == (await ir.get_consistent(['Double']))['Double']
+    assert len(calls) == 1
+    ir.shutdown()
+
+
+def test_evaluate_columns_over_ibt(tmp_path):
+    np = pytest.importorskip('numpy')
+    ibt = IBT()
+    ibt.open(write_image(tmp_path / 'test.ibt', VARIABLES, RECORDS, ibt=True))
+    columns = builtin_channels().evaluate_columns(ibt, ['LatG', 'SpeedKph'])
+    ibt.close()
+
+    np.testing.assert_allclose(columns['LatG'], [0.0, 1.0, 2.0], rtol=1e-6)
+    np.testing.assert_allclose(columns['SpeedKph'], [0.0, 36.0, 72.0], rtol=1e-6)
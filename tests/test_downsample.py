@@ -0,0 +1,65 @@
+import pytest
+
+from py_iracing.downsample import DownsamplePyramid, lttb
+from py_iracing.ibt import IBT
+from tests.fakes import write_image
+
+np = pytest.importorskip('numpy')
+
+
+def _series(length=1024):
+    time = np.arange(length) / 60.0
+    value = np.sin(time)
+    value[length // 2 - 12] = 10.0
+    return time, value
+
+
+def test_lttb_keeps_ends_and_spikes():
+    time, value = _series()
+    indices = lttb(time, value, 50)
+    assert len(indices) == 50 and indices[0] == 0 and indices[-1] == len(time) - 1
+    assert len(time) // 2 - 12 in indices
+    assert (np.diff(indices) > 0).all()
+
+
+def test_pyramid_levels_match_direct_aggregates():
+    time, value = _series()
+    pyramid = DownsamplePyramid.from_arrays(time, value, bucket_size=4, factor=4, levels=4)
+
+    level = pyramid.query(max_points=20)
+    assert (level.level, level.bucket_size) == (2, 64)
+    grouped = value.reshape(-1, 64)
+    assert np.allclose(level.min, grouped.min(axis=1))
+    assert np.allclose(level.max, grouped.max(axis=1))
+    assert np.allclose(level.mean, grouped.mean(axis=1))
+    assert np.allclose(level.last, grouped[:, -1])
+    assert np.allclose(level.time, time[::64])
+
+    zoomed = pyramid.query(time[256], time[512], max_points=20)
+    assert zoomed.level == 1 and len(zoomed.time) == 16 and zoomed.max.max() == 10.0
+
+    lttb_time, lttb_value = pyramid.query_lttb(max_points=64)
+    assert len(lttb_time) <= 64 and 10.0 in lttb_value
+
+
+def test_live_appends_match_bulk_build():
+    time, value = _series(300)
+    bulk = DownsamplePyramid.from_arrays(time, value, levels=3)
+    live = DownsamplePyramid(levels=3)
+    for t, v in zip(time, value):
+        live.append(t, v)
+    for live_level, bulk_level in zip(live.levels, bulk.levels):
+        for name, column in live_level.columns.items():
+            assert np.array_equal(column.values, bulk_level.columns[name].values)
+        assert np.array_equal(live_level.lttb_value.values, bulk_level.lttb_value.values)
+    assert live.sample_count == 300
+
+
+def test_from_ibt(tmp_path):
+    time, value = _series(256)
+    rows = [{'SessionTime': t, 'Speed': v} for t, v in zip(time, value)]
+    ibt = IBT()
+    ibt.open(write_image(tmp_path / 'a.ibt', [('SessionTime', 'd', 1), ('Speed', 'f', 1)], rows, ibt=True))
+    pyramid = DownsamplePyramid.from_ibt(ibt, 'Speed', chunk_size=100, levels=2)
+    ibt.close()
+    assert np.allclose(pyramid.query(max_points=16).max, value.astype(np.float32).reshape(-1, 16).max(axis=1))
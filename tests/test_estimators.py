@@ -0,0 +1,93 @@
+import statistics
+
+import pytest
+
+from py_iracing.enums import Flags
+from py_iracing.estimators import EWMA, RollingStats, StrategyEstimator
+
+
+def test_rolling_stats_match_window():
+    values = [3.1, 2.9, 3.0, 3.4, 2.8, 3.05, 3.2]
+    stats = RollingStats(window=4)
+    for i, value in enumerate(values):
+        stats.add(value)
+        window = values[max(0, i - 3):i + 1]
+        assert stats.mean == pytest.approx(statistics.mean(window))
+        if len(window) > 1:
+            assert stats.variance == pytest.approx(statistics.variance(window))
+    assert stats.is_outlier(5.0, 3.0) and not stats.is_outlier(3.1, 3.0)
+
+    ewma = EWMA(alpha=0.5)
+    assert [ewma.add(value) for value in (2.0, 4.0, 4.0)] == [2.0, 3.0, 3.5]
+
+
+def _run(estimator, laps):
+    """Feeds 10 ticks per lap, with per-lap fuel use, lap time and what happened on the lap."""
+    fuel, time = 60.0, 0.0
+    samples = []
+    for lap, (fuel_used, lap_time, event) in enumerate(laps):
+        for tick in range(10):
+            values = {'FuelLevel': fuel - fuel_used * tick / 10, 'LapCompleted': lap, 'SessionTime': time + lap_time * tick / 10,
+                      'SessionTimeRemain': 1000.0 - time, 'OnPitRoad': event == 'pit' and tick == 5,
+                      'SessionFlags': int(Flags.yellow) if event == 'caution' and tick == 3 else 0}
+            sample = estimator.update(values)
+            if sample is not None:
+                samples.append(sample)
+        fuel -= fuel_used
+        time += lap_time
+        if event == 'pit':
+            fuel += 40.0
+    samples.append(estimator.update({'FuelLevel': fuel, 'LapCompleted': len(laps), 'SessionTime': time,
+                                     'SessionTimeRemain': 1000.0 - time}))
+    return samples
+
+
+def test_estimator_rejects_pit_caution_and_outlier_laps():
+    estimator = StrategyEstimator(window=3, alpha=0.5)
+    laps = [(2.0, 100.0, ''), (2.1, 101.0, ''), (2.0, 100.5, ''), (2.0, 130.0, 'pit'), (1.0, 140.0, 'caution'),
+            (2.05, 100.0, ''), (6.0, 100.0, ''), (2.0, 101.0, '')]
+    samples = _run(estimator, laps)
+    assert [sample.rejected for sample in samples] == ['', '', '', 'pit', 'caution', '', 'fuel_outlier', '']
+    assert samples[0].lap_time == pytest.approx(100.0) and samples[0].fuel_used == pytest.approx(2.0)
+
+    estimate = estimator.estimate()
+    assert estimator.fuel_stats.count == 3
+    assert estimator.fuel_stats.mean == pytest.approx((2.0 + 2.05 + 2.0) / 3)
+    assert 2.0 < estimate.fuel_per_lap < 2.1
+    assert 100.0 < estimate.lap_time < 101.0
+    assert estimate.pace_trend == pytest.approx(0.5 * 1.0 + 0.5 * -0.5)
+    fuel = 60.0 - sum(fuel_used for fuel_used, _, _ in laps) + 40.0
+    assert estimate.laps_of_fuel == pytest.approx(fuel / estimate.fuel_per_lap)
+    remain = 1000.0 - sum(lap_time for _, lap_time, _ in laps)
+    assert estimate.laps_remaining == pytest.approx(remain / estimate.lap_time)
+    assert estimate.fuel_to_finish == pytest.approx((estimate.laps_remaining + 1) * estimate.fuel_per_lap - fuel)
+
+
+def test_car_lap_times_wait_for_late_update():
+    estimator = StrategyEstimator(car_count=2)
+    estimator.update({'CarIdxLapCompleted': [1, 1], 'CarIdxLastLapTime': [90.0, 95.0]})
+    estimator.update({'CarIdxLapCompleted': [2, 1], 'CarIdxLastLapTime': [90.0, 95.0]})
+    assert estimator.car_lap_time == [None, None]
+    estimator.update({'CarIdxLapCompleted': [2, 2], 'CarIdxLastLapTime': [91.0, 94.0]})
+    assert estimator.car_lap_time == [91.0, 94.0]
+    assert estimator.estimate().fuel_per_lap is None
+
+
+def test_estimator_follows_step_changes():
+    # A small change of pace is within the outlier floor, a large one is taken as the new level after a run
+    estimator = StrategyEstimator(window=5, alpha=0.5)
+    laps = [(2.0, lap_time, '') for lap_time in (90.0, 90.1, 89.9, 90.0, 90.05)] + [(2.0, 91.0, '')] * 5
+    laps += [(1.8, 100.0, '')] * 5
+    samples = _run(estimator, laps)
+    assert [sample.rejected for sample in samples[5:10]] == [''] * 5
+    # Identical fuel use has no spread, the switch to fuel saving still becomes the new level
+    assert [sample.rejected for sample in samples[10:15]] == ['fuel_outlier', 'fuel_outlier', '', '', '']
+    estimate = estimator.estimate()
+    assert estimate.lap_time == pytest.approx(100.0)
+    assert estimate.fuel_per_lap == pytest.approx(1.8)
+    assert estimator.fuel_stats.count == 5
+
+    spike = StrategyEstimator(window=5)
+    samples = _run(spike, [(2.0, 90.0, '')] * 5 + [(2.0, 120.0, ''), (2.0, 60.0, ''), (2.0, 90.0, '')])
+    assert [sample.rejected for sample in samples[5:8]] == ['pace_outlier', 'pace_outlier', '']
+    assert spike.estimate().lap_time == pytest.approx(90.0)
@@ -0,0 +1,62 @@
+import pytest
+
+from py_iracing.ibt import IBT
+from tests.fakes import write_image
+
+np = pytest.importorskip('numpy')
+
+VARIABLES = [('SessionTime', 'd', 1), ('Speed', 'f', 1), ('Lap', 'i', 1), ('CarIdxLapDistPct', 'f', 3)]
+
+
+@pytest.fixture
+def ibt(tmp_path):
+    rows = [{'SessionTime': i / 10.0, 'Speed': float(i), 'Lap': i // 10, 'CarIdxLapDistPct': [i / 100.0, 0.5, -1.0]}
+            for i in range(100)]
+    ibt = IBT()
+    ibt.open(write_image(tmp_path / 'a.ibt', VARIABLES, rows, ibt=True))
+    yield ibt
+    ibt.close()
+
+
+def test_pandas_columns_are_views(ibt):
+    pytest.importorskip('pandas')
+    frame = ibt.to_frame(backend='pandas')
+    assert list(frame.columns) == ['SessionTime', 'Speed', 'Lap']
+    assert frame['Lap'].dtype == np.int32
+    assert frame['Speed'].tolist() == list(map(float, range(100)))
+    assert np.shares_memory(frame['Speed'].to_numpy(), ibt.get_array('Speed', copy=False))
+    del frame
+
+
+def test_pandas_array_channels_and_time_range(ibt):
+    pytest.importorskip('pandas')
+    assert list(ibt.to_frame(['CarIdxLapDistPct[1]'], backend='pandas').columns) == ['CarIdxLapDistPct[1]']
+    frame = ibt.to_frame(['Speed', 'CarIdxLapDistPct'], time_range=(2.0, 3.0), backend='pandas', copy=True)
+    assert list(frame.columns) == ['Speed', 'CarIdxLapDistPct[0]', 'CarIdxLapDistPct[1]', 'CarIdxLapDistPct[2]']
+    assert frame.index.tolist() == list(range(20, 30))
+    assert frame['CarIdxLapDistPct[2]'].tolist() == [-1.0] * 10
+    # A copied frame does not keep the file open
+    ibt.close()
+    assert frame['Speed'].tolist() == list(map(float, range(20, 30)))
+
+
+def test_unknown_channels(ibt):
+    with pytest.raises(KeyError):
+        ibt.to_frame(['Nope'], backend='pandas')
+    with pytest.raises(KeyError):
+        ibt.to_frame(['CarIdxLapDistPct[3]'], backend='pandas')
+    with pytest.raises(ValueError):
+        ibt.to_frame(backend='arrow')
+
+
+def test_polars_lazy_frame(ibt):
+    pl = pytest.importorskip('polars')
+    lazy = ibt.to_frame(['SessionTime', 'Speed', 'CarIdxLapDistPct[1]'], time_range=(1.0, None), backend='polars')
+    assert isinstance(lazy, pl.LazyFrame)
+    assert lazy.collect_schema()['Speed'] == pl.Float32
+
+    frame = lazy.filter(pl.col('Speed') >= 95).select('Speed', 'CarIdxLapDistPct[1]').collect()
+    assert frame['Speed'].to_list() == [95.0, 96.0, 97.0, 98.0, 99.0]
+    assert frame['CarIdxLapDistPct[1]'].to_list() == [0.5] * 5
+    assert lazy.head(3).collect()['SessionTime'].to_list() == pytest.approx([1.0, 1.1, 1.2])
+    assert lazy.select(pl.len()).collect().item() == 90
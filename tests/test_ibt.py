@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+import pytest
+
+from py_iracing.ibt import IBT
+from py_iracing.instrumentation import Instrumentation
+from py_iracing.session_cache import SessionInfoCache
+from tests.fakes import write_image
+
+VARIABLES = [('SessionTime', 'd', 1), ('Speed', 'f', 1)]
+
+SESSION_INFO = (
+    '---\n'
+    'WeekendInfo:\n TrackName: spa\n TrackLength: 7.00 km\n\n'
+    'DriverInfo:\n DriverCarIdx: 0\n Drivers:\n - CarIdx: 0\n   UserName: Jane Doe\n\n'
+    '...\n'
+)
+
+
+def _write(path):
+    rows = [{'SessionTime': i * 0.1, 'Speed': float(i)} for i in range(10)]
+    return write_image(path, VARIABLES, rows, session_info=SESSION_INFO, ibt=True)
+
+
+def test_session_info_is_parsed_once_per_file(tmp_path):
+    ibt = IBT(instrumentation=Instrumentation())
+    ibt.open(_write(tmp_path / 'a.ibt'))
+    try:
+        assert ibt.session_info('WeekendInfo')['TrackName'] == 'spa'
+        assert ibt.session_info('WeekendInfo')['TrackLength'] == '7.00 km'
+        assert ibt.session_info('DriverInfo')['Drivers'][0]['UserName'] == 'Jane Doe'
+        assert ibt.session_info('SplitTimeInfo') is None
+        assert ibt.instrumentation.snapshot()['latency']['session_info_parse']['count'] == 2
+    finally:
+        ibt.close()
+
+
+def test_session_info_uses_cache(tmp_path):
+    path = _write(tmp_path / 'a.ibt')
+    cache = SessionInfoCache(str(tmp_path / 'cache'))
+    ibt = IBT(session_info_cache=cache)
+    ibt.open(path)
+    ibt.session_info('WeekendInfo')
+    ibt.close()
+
+    ibt.open(path)
+    with patch('py_iracing.session_cache.parse_section') as parse_section:
+        assert ibt.session_info('WeekendInfo')['TrackName'] == 'spa'
+    parse_section.assert_not_called()
+    assert cache.hits == 1
+    ibt.close()
+
+
+def test_metadata_only_open_skips_records(tmp_path):
+    ibt = IBT()
+    ibt.open(_write(tmp_path / 'a.ibt'), metadata_only=True)
+    try:
+        assert isinstance(ibt._shared_mem, bytes)
+        assert len(ibt._shared_mem) < ibt._header.var_buf[0].buf_offset
+        assert ibt.var_headers_names == ['SessionTime', 'Speed']
+        assert ibt._disk_header.session_record_count == 10
+        assert ibt.session_info('WeekendInfo')['TrackName'] == 'spa'
+        assert ibt.get(0, 'Speed') is None
+        assert ibt.get_all('Speed') is None
+    finally:
+        ibt.close()
+
+    ibt.open(_write(tmp_path / 'b.ibt'))
+    assert ibt.get_all('Speed')[-1] == 9.0
+    ibt.close()
+
+
+def test_iter_chunks_and_records(tmp_path):
+    np = pytest.importorskip('numpy')
+    rows = [{'SessionTime': i * 0.1, 'Speed': float(i), 'Tire': [i, -i]} for i in range(10)]
+    path = write_image(tmp_path / 'a.ibt', VARIABLES + [('Tire', 'i', 2)], rows, ibt=True)
+    ibt = IBT()
+    ibt.open(path)
+    try:
+        chunks = [(first, {key: value.copy() for key, value in chunk.items()})
+                  for first, chunk in ibt.iter_chunks(['Speed', 'Tire'], chunk_size=4, start=1)]
+        assert [first for first, _ in chunks] == [1, 5, 9]
+        assert np.concatenate([chunk['Speed'] for _, chunk in chunks]).tolist() == [float(i) for i in range(1, 10)]
+        assert chunks[-1][1]['Tire'].tolist() == [[9, -9]]
+        assert chunks[0][1]['Speed'].dtype == np.float32
+
+        records = list(ibt.iter_records(['SessionTime', 'Tire'], chunk_size=3, stop=4))
+        assert records == [(pytest.approx(i * 0.1), [i, -i]) for i in range(4)]
+
+        with pytest.raises(KeyError):
+            next(ibt.iter_chunks(['Missing']))
+    finally:
+        ibt.close()
@@ -0,0 +1,73 @@
+import pytest
+
+from py_iracing.client import iRacingClient
+from py_iracing.ibt import IBT
+from py_iracing.instrumentation import Instrumentation, LatencyHistogram
+from tests.fakes import write_image
+
+VARIABLES = [('Speed', 'f', 1), ('Gear', 'i', 1)]
+
+
+def test_histogram_percentiles_within_precision():
+    histogram = LatencyHistogram()
+    for value in range(1, 10001):
+        histogram.record(value * 1000)
+
+    assert histogram.count == 10000
+    assert histogram.min == 1000
+    assert histogram.max == 10000000
+    assert histogram.percentile(50) == pytest.approx(5000000, rel=1 / 16)
+    assert histogram.percentile(99) == pytest.approx(9900000, rel=1 / 16)
+    assert histogram.percentile(100) == 10000000
+
+
+def test_histogram_clamps_large_values():
+    histogram = LatencyHistogram(max_value=1000)
+    histogram.record(10 ** 12)
+    assert histogram.count == 1
+    assert histogram.percentile(50) == 10 ** 12
+
+
+def test_record_tick_counts_skipped_ticks():
+    instrumentation = Instrumentation()
+    for tick in (10, 11, 14, 15):
+        instrumentation.record_tick(tick)
+    assert instrumentation.snapshot()['counters'] == {'ticks': 4, 'ticks_skipped': 2}
+
+
+def test_report_hook_is_called_periodically():
+    reports = []
+    instrumentation = Instrumentation(report_hook=reports.append, report_interval=0)
+    instrumentation.record('get', 100)
+    assert reports and reports[-1]['latency']['get']['count'] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_records_get_and_freeze(tmp_path):
+    test_file = write_image(tmp_path / 'test.bin', VARIABLES,
+                            [{'Speed': 10.0}, {'Speed': 30.0}, {'Speed': 20.0}], tick_counts=[7, 9, 8])
+    instrumentation = Instrumentation()
+    ir = iRacingClient(instrumentation=instrumentation)
+    assert await ir.startup(test_file=test_file)
+
+    await ir.freeze_var_buffer_latest()
+    assert await ir.get('Speed') == 30.0
+    ir.shutdown()
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot['counters']['ticks'] == 1
+    assert snapshot['latency']['freeze']['count'] == 1
+    assert snapshot['latency']['get']['count'] == 1
+
+
+def test_ibt_records_get(tmp_path):
+    ibt_file = write_image(tmp_path / 'test.ibt', VARIABLES, [{'Speed': float(i)} for i in range(5)], ibt=True)
+    ibt = IBT(instrumentation=Instrumentation())
+    ibt.open(ibt_file)
+    assert ibt.get(3, 'Speed') == 3.0
+    assert ibt.get_all('Speed') == [0.0, 1.0, 2.0, 3.0, 4.0]
+    latency = ibt.instrumentation.snapshot()['latency']
+    ibt.close()
+
+    assert latency['get']['count'] == 1
+    assert latency['get_all']['count'] == 1
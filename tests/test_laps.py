@@ -0,0 +1,53 @@
+import pytest
+
+from py_iracing.ibt import IBT
+from py_iracing.laps import LapResampler, delta_time, find_laps
+from tests.fakes import write_image
+
+np = pytest.importorskip('numpy')
+
+VARIABLES = [('SessionTime', 'd', 1), ('Lap', 'i', 1), ('LapDistPct', 'f', 1), ('Speed', 'f', 1)]
+
+
+def _write_laps(path, lap_time, records=400, dt=0.1, start_pct=0.5):
+    rows = []
+    for i in range(records):
+        distance = start_pct + i * dt / lap_time
+        rows.append({'SessionTime': i * dt, 'Lap': int(distance), 'LapDistPct': distance % 1.0,
+                     'Speed': 100.0 * (distance % 1.0)})
+    return write_image(path, VARIABLES, rows, ibt=True)
+
+
+@pytest.fixture
+def ibt(tmp_path):
+    ibt = IBT()
+    ibt.open(_write_laps(tmp_path / 'a.ibt', lap_time=10.0))
+    yield ibt
+    ibt.close()
+
+
+def test_find_laps(ibt):
+    laps = find_laps(ibt)
+    assert [(lap.lap, lap.complete) for lap in laps] == [(0, False), (1, True), (2, True), (3, True), (4, False)]
+    assert laps[1].start == 50 and laps[1].stop == 150
+
+
+def test_resample_interpolates_lap_time(ibt):
+    lap = LapResampler(channels=['Speed'], points=101).resample(ibt, 1)
+    assert lap.lap_time == pytest.approx(10.0, abs=1e-3)
+    assert lap.time[50] == pytest.approx(5.0, abs=1e-3)
+    assert lap.channels['Speed'][50] == pytest.approx(50.0, abs=1e-2)
+
+
+def test_resample_all_is_cached(ibt):
+    resampler = LapResampler(channels=['Speed'])
+    laps = resampler.resample_all(ibt, complete_only=True)
+    assert [lap.lap_range.lap for lap in laps] == [1, 2, 3]
+    assert resampler.resample(ibt, 2) is laps[1]
+
+
+def test_delta_time_between_files(tmp_path):
+    resampler = LapResampler(channels=['Speed'], points=11)
+    laps = resampler.resample_files([_write_laps(tmp_path / 'a.ibt', 10.0), _write_laps(tmp_path / 'b.ibt', 11.0)])
+    fast, slow = laps[str(tmp_path / 'a.ibt')][0], laps[str(tmp_path / 'b.ibt')][0]
+    np.testing.assert_allclose(delta_time(fast, slow), np.linspace(0.0, 1.0, 11), atol=1e-3)
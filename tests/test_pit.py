@@ -0,0 +1,137 @@
+import mmap
+import struct
+
+import pytest
+import pytest_asyncio
+
+from py_iracing.broadcast import FakeBroadcastBackend
+from py_iracing.client import iRacingClient
+from py_iracing.enums import BroadcastMsg, PitCommandMode, PitSvFlags
+from py_iracing.pit import PitServicePlanner, PitServiceRequest, plan_pit_service
+from tests.fakes import build_image
+
+VARIABLES = [('PitSvFlags', 'I', 1), ('PitSvFuel', 'f', 1), ('PitSvLFP', 'f', 1), ('PitSvRFP', 'f', 1),
+             ('PitSvLRP', 'f', 1), ('PitSvRRP', 'f', 1)]
+TIRE_FLAGS = {PitCommandMode.lf: PitSvFlags.lf_tire_change, PitCommandMode.rf: PitSvFlags.rf_tire_change,
+              PitCommandMode.lr: PitSvFlags.lr_tire_change, PitCommandMode.rr: PitSvFlags.rr_tire_change}
+
+
+class FakePitSim(FakeBroadcastBackend):
+    """Applies pit commands to the pit service variables of a test file, optionally dropping the first few."""
+
+    def __init__(self, path, drop=0):
+        super().__init__()
+        self._file = open(path, 'r+b')
+        self.mem = mmap.mmap(self._file.fileno(), 0)
+        self.drop = drop
+
+    def _write(self, offset, fmt, value):
+        for i in range(3):
+            buf_offset = struct.unpack_from('<i', self.mem, 48 + i * 16 + 4)[0]
+            struct.pack_into(fmt, self.mem, buf_offset + offset, value)
+
+    def send(self, broadcast_type, var1=0, var2=0, var3=0):
+        result = super().send(broadcast_type, var1, var2, var3)
+        if self.drop:
+            self.drop -= 1
+            return result
+        assert broadcast_type == BroadcastMsg.pit_command
+        buf_offset = struct.unpack_from('<i', self.mem, 48 + 4)[0]
+        flags = PitSvFlags(struct.unpack_from('<I', self.mem, buf_offset)[0])
+        mode = PitCommandMode(var1)
+        if mode in TIRE_FLAGS:
+            flags |= TIRE_FLAGS[mode]
+        elif mode == PitCommandMode.clear_tires:
+            flags &= ~(PitSvFlags.lf_tire_change | PitSvFlags.rf_tire_change | PitSvFlags.lr_tire_change | PitSvFlags.rr_tire_change)
+        elif mode == PitCommandMode.fuel:
+            flags |= PitSvFlags.fuel_fill
+            self._write(4, '<f', var2)
+        elif mode == PitCommandMode.clear_fuel:
+            flags &= ~PitSvFlags.fuel_fill
+        elif mode == PitCommandMode.fr:
+            flags |= PitSvFlags.fast_repair
+        elif mode == PitCommandMode.ws:
+            flags |= PitSvFlags.windshield_tearoff
+        self._write(0, '<I', flags)
+        return result
+
+    def close(self):
+        self.mem.close()
+        self._file.close()
+
+
+def test_plan_sends_only_missing_commands():
+    state = {'PitSvFlags': PitSvFlags.lf_tire_change | PitSvFlags.fuel_fill, 'PitSvFuel': 40.0}
+    request = PitServiceRequest(tires=('lf', 'rf'), fuel=40.0, windshield=True)
+    assert plan_pit_service(request, state) == [(PitCommandMode.rf, 0), (PitCommandMode.ws, 0)]
+    assert plan_pit_service(PitServiceRequest(tires=('lf',), fuel=40.0), state) == []
+
+
+def test_plan_clears_unwanted_tires_and_fuel():
+    state = {'PitSvFlags': PitSvFlags.lf_tire_change | PitSvFlags.rr_tire_change | PitSvFlags.fuel_fill | PitSvFlags.fast_repair}
+    request = PitServiceRequest(tires=('lf',))
+    assert plan_pit_service(request, state) == [
+        (PitCommandMode.clear_tires, 0), (PitCommandMode.lf, 0), (PitCommandMode.clear_fuel, 0), (PitCommandMode.clear_fr, 0),
+    ]
+
+
+def test_plan_rejects_unknown_tires():
+    with pytest.raises(ValueError):
+        PitServiceRequest(tires=('front',))
+
+
+@pytest_asyncio.fixture
+async def sim(tmp_path):
+    path = tmp_path / 'test.bin'
+    path.write_bytes(build_image(VARIABLES, [{}, {}, {}], tick_rate=1000))
+    sim = FakePitSim(path)
+    ir = iRacingClient(broadcast_backend=sim)
+    assert await ir.startup(test_file=str(path))
+    yield ir, sim
+    ir.shutdown()
+    sim.close()
+
+
+@pytest.mark.asyncio
+async def test_apply_confirms_against_telemetry(sim):
+    ir, backend = sim
+    planner = PitServicePlanner(ir, timeout=0.2)
+    request = PitServiceRequest(tires=('lf', 'rf', 'lr', 'rr'), fuel=60.0)
+
+    result = await planner.apply(request)
+    assert result.success and result.attempts == 1
+    assert len(backend.sent) == 5
+    # Later get() calls read live telemetry again, not the last tick apply() froze
+    assert not ir._var_buffer_latest.is_memory_frozen
+
+    result = await planner.apply(request)
+    assert result.success and result.sent == []
+    assert len(backend.sent) == 5
+
+
+@pytest.mark.asyncio
+async def test_apply_retries_dropped_commands(sim):
+    ir, backend = sim
+    backend.drop = 1
+    result = await PitServicePlanner(ir, timeout=0.05).apply(PitServiceRequest(tires=('lf',), fast_repair=True))
+    assert result.success and result.attempts == 2
+    assert result.sent == [(PitCommandMode.lf, 0), (PitCommandMode.fr, 0), (PitCommandMode.lf, 0)]
+
+
+@pytest.mark.asyncio
+async def test_apply_gives_up(sim):
+    ir, backend = sim
+    backend.drop = 10
+    result = await PitServicePlanner(ir, timeout=0.02, retries=1).apply(PitServiceRequest(windshield=True))
+    assert not result.success and result.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_read_state_keeps_the_callers_freeze(sim):
+    ir, _ = sim
+    planner = PitServicePlanner(ir)
+    assert await planner.read_state() is not None
+    assert not ir._var_buffer_latest.is_memory_frozen
+    ir.freeze_var_buffer_now()
+    await planner.apply(PitServiceRequest(fuel=20.0))
+    assert ir._var_buffer_latest.is_memory_frozen
@@ -0,0 +1,91 @@
+import pytest
+
+from py_iracing.catalog import Catalog
+from py_iracing.ibt import IBT
+from py_iracing.laps import find_laps
+from py_iracing.query import RecordQuery
+from tests.fakes import write_image
+
+np = pytest.importorskip('numpy')
+
+VARIABLES = [('SessionTime', 'd', 1), ('Lap', 'i', 1), ('Speed', 'f', 1), ('Brake', 'f', 1),
+             ('SessionFlags', 'I', 1), ('CarIdxLapDistPct', 'f', 2)]
+
+SESSION_INFO = '---\nWeekendInfo:\n TrackName: spa\n\n...\n'
+
+
+@pytest.fixture
+def ibt(tmp_path):
+    rows = [{'SessionTime': i / 10.0, 'Lap': i // 100, 'Speed': float(i % 100), 'Brake': 1.0 if i % 100 >= 90 else 0.0,
+             'SessionFlags': 0x4000 if 250 <= i < 260 else 0, 'CarIdxLapDistPct': [(i % 100) / 100.0, 0.5]}
+            for i in range(1000)]
+    write_image(tmp_path / 'a.ibt', VARIABLES, rows, session_info=SESSION_INFO, ibt=True)
+    write_image(tmp_path / 'b.ibt', VARIABLES, rows[:300], session_info=SESSION_INFO, ibt=True)
+    ibt = IBT()
+    ibt.open(str(tmp_path / 'a.ibt'))
+    yield ibt
+    ibt.close()
+
+
+def _brute_force(ibt, predicate):
+    lap, speed, brake = ibt.get_all('Lap'), ibt.get_all('Speed'), ibt.get_all('Brake')
+    return [i for i in range(len(lap)) if predicate(lap[i], speed[i], brake[i])]
+
+
+def test_matches_brute_force_across_chunks(ibt):
+    query = RecordQuery('Brake > 0.9 and Speed > 95 or Lap == 3 and not Speed < 98')
+    assert query.channels == ['Brake', 'Lap', 'Speed']
+    result = query.run(ibt, chunk_size=7)
+    expected = _brute_force(ibt, lambda lap, speed, brake: brake > 0.9 and speed > 95 or lap == 3 and not speed < 98)
+    assert result.indices().tolist() == expected
+    assert len(result) == len(expected)
+    assert result.ranges[0] == range(96, 100)
+    # The ranges work with get_array() and get()
+    assert result.get_array(ibt, 'Speed').tolist() == [ibt.get(i, 'Speed') for matched in result for i in matched]
+
+
+def test_lap_and_time_indexes_narrow_the_scan(ibt):
+    result = RecordQuery('Brake > 0.9 and Lap == 4').run(ibt, chunk_size=16)
+    assert result.ranges == [range(490, 500)]
+    assert result.scanned == 100
+
+    result = RecordQuery('30.0 <= SessionTime < 40.0 and Speed % 10 == 0').run(ibt)
+    assert result.indices().tolist() == list(range(300, 400, 10))
+    assert result.scanned == 100
+
+    result = RecordQuery('Lap >= 8 and Speed == 0').run(ibt, lap_ranges=find_laps(ibt))
+    assert result.ranges == [range(800, 801), range(900, 901)]
+    assert result.scanned == 200
+    # An index under "or" does not narrow
+    assert RecordQuery('Lap == 4 or Speed < 0').run(ibt).scanned == 1000
+
+
+def test_lap_index_from_catalog(ibt, tmp_path):
+    with Catalog(str(tmp_path / 'laps.db')) as catalog:
+        catalog.scan(str(tmp_path))
+        laps = catalog.laps()
+    # The catalog leaves out the out-lap and the last lap, and lists the laps of both files
+    assert {lap_range.lap for lap_range, _ in laps} == set(range(1, 9))
+    result = RecordQuery('Speed == 0 and Lap == 0').run(ibt, lap_ranges=laps)
+    assert result.ranges == [range(0, 1)]
+    result = RecordQuery('Speed == 0 and Lap == 5').run(ibt, lap_ranges=laps)
+    assert result.ranges == [range(500, 501)]
+    assert result.scanned == 300
+
+
+def test_bitfields_and_array_elements(ibt):
+    assert RecordQuery('SessionFlags & 0x4000').run(ibt).ranges == [range(250, 260)]
+    result = RecordQuery('CarIdxLapDistPct[0] >= 0.98 and CarIdxLapDistPct[1] == 0.5 and Lap < 2').run(ibt)
+    assert result.ranges == [range(98, 100), range(198, 200)]
+    assert len(RecordQuery('abs(Speed - 50) < 1').run(ibt, start=0, stop=100)) == 1
+
+
+def test_errors(ibt):
+    with pytest.raises(ValueError):
+        RecordQuery('Speed >')
+    with pytest.raises(ValueError):
+        RecordQuery('Speed in (1, 2)')
+    with pytest.raises(ValueError):
+        RecordQuery('CarIdxLapDistPct > 0').run(ibt)
+    with pytest.raises(KeyError):
+        RecordQuery('Throttle > 0').run(ibt)
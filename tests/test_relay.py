@@ -0,0 +1,128 @@
+import asyncio
+import struct
+
+import aiohttp
+import pytest
+import pytest_asyncio
+
+from py_iracing.client import iRacingClient
+from py_iracing.relay import (FRAME_ERROR, FRAME_KEYFRAME, FRAME_SCHEMA, FRAME_SUBSCRIBE, RelayClient, RelayServer,
+                              decode_frame, encode_frame, read_frame)
+from tests.fakes import FakeSim, build_image
+
+VARIABLES = [('Speed', 'f', 1), ('Gear', 'i', 1), ('CarIdxLap', 'i', 4)]
+SESSION_INFO = '---\nWeekendInfo:\n TrackName: spa\n\n...\n'
+
+
+@pytest_asyncio.fixture
+async def relay(tmp_path):
+    path = tmp_path / 'test.bin'
+    path.write_bytes(build_image(VARIABLES, [{}, {}, {}], session_info=SESSION_INFO, tick_rate=1000))
+    sim = FakeSim(path, VARIABLES)
+    ir = iRacingClient()
+    assert await ir.startup(test_file=str(path))
+    server = RelayServer(ir, port=0, keyframe_interval=3, websocket_port=0)
+    await server.start()
+    yield server, sim
+    await server.stop()
+    ir.shutdown()
+    sim.close()
+
+
+async def _next(client, tick):
+    while True:
+        received = await asyncio.wait_for(client.recv(), 1.0)
+        if received >= tick:
+            return received
+
+
+@pytest.mark.asyncio
+async def test_relay_keyframes_and_deltas(relay):
+    server, sim = relay
+    fast = RelayClient()
+    await fast.connect(port=server.port, channels=['Speed', 'CarIdxLap'], session_info=['WeekendInfo'])
+    gear = RelayClient()
+    await gear.connect(port=server.port, channels=['Gear'])
+
+    sim.write(Speed=10.0, Gear=2, CarIdxLap=[1, 2, 3, 4])
+    assert await _next(fast, sim.tick) == sim.tick
+    await _next(gear, sim.tick)
+    assert fast.values == {'Speed': 10.0, 'CarIdxLap': [1, 2, 3, 4]}
+    assert gear['Gear'] == 2
+    assert fast.session_info['WeekendInfo'] == {'TrackName': 'spa'}
+
+    sim.write(Speed=20.0, Gear=2, CarIdxLap=[1, 2, 3, 4])
+    await _next(fast, sim.tick)
+    assert fast.values == {'Speed': 20.0, 'CarIdxLap': [1, 2, 3, 4]}
+
+    for speed in range(5):
+        sim.write(Speed=float(speed), Gear=3, CarIdxLap=[speed] * 4)
+        await _next(fast, sim.tick)
+        assert fast['Speed'] == float(speed) and fast['CarIdxLap'] == [speed] * 4
+    assert server.metrics['keyframes'] >= 3 and server.metrics['deltas'] >= 3
+
+    await fast.close()
+    await gear.close()
+
+
+@pytest.mark.asyncio
+async def test_relay_rejects_unknown_channels(relay):
+    server, _ = relay
+    with pytest.raises(ConnectionError, match='Unknown channels'):
+        await RelayClient().connect(port=server.port, channels=['Missing'])
+
+
+@pytest.mark.asyncio
+async def test_relay_drops_session_info_nobody_subscribes_to(relay):
+    server, sim = relay
+    first = RelayClient()
+    await first.connect(port=server.port, channels=['Gear'], session_info=['WeekendInfo'])
+    sim.write(Speed=0.0, Gear=1, CarIdxLap=[0] * 4)
+    await _next(first, sim.tick)
+    assert first.session_info['WeekendInfo'] == {'TrackName': 'spa'}
+    await first.close()
+
+    sim.update_session_info(SESSION_INFO.replace('spa', 'zol'))
+    while server._session_info_update != server.ir.session_info_update:
+        sim.write(Speed=0.0, Gear=0, CarIdxLap=[0] * 4)
+        await asyncio.sleep(0.01)
+    late = RelayClient()
+    await late.connect(port=server.port, channels=['Gear'], session_info=['WeekendInfo'])
+    sim.write(Speed=0.0, Gear=1, CarIdxLap=[0] * 4)
+    await _next(late, sim.tick)
+    assert late.session_info['WeekendInfo'] == {'TrackName': 'zol'}
+    await late.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('request_json', [b'[]', b'{"channels": "Speed"}'])
+async def test_relay_rejects_malformed_requests(relay, request_json):
+    server, _ = relay
+    reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+    writer.write(encode_frame(FRAME_SUBSCRIBE, request_json))
+    frame_type, payload = await asyncio.wait_for(read_frame(reader), 1.0)
+    assert frame_type == FRAME_ERROR and b'error' in payload
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_relay_over_websocket(relay):
+    server, sim = relay
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(f'http://127.0.0.1:{server.websocket_port}/') as ws:
+            await ws.send_bytes(encode_frame(FRAME_SUBSCRIBE, b'{"channels": ["Gear", "CarIdxLap"]}'))
+            frame_type, payload = decode_frame(await asyncio.wait_for(ws.receive_bytes(), 1.0))
+            assert frame_type == FRAME_SCHEMA and b'CarIdxLap' in payload
+            while server.client_count < 1:
+                await asyncio.sleep(0.01)
+            sim.write(Speed=1.0, Gear=4, CarIdxLap=[5, 6, 7, 8])
+            while True:
+                frame_type, payload = decode_frame(await asyncio.wait_for(ws.receive_bytes(), 1.0))
+                if frame_type == FRAME_KEYFRAME and struct.unpack_from('<i', payload)[0] == sim.tick:
+                    break
+            assert struct.unpack_from('<5i', payload, 4) == (4, 5, 6, 7, 8)
+
+        async with session.ws_connect(f'http://127.0.0.1:{server.websocket_port}/') as ws:
+            await ws.send_bytes(encode_frame(FRAME_SUBSCRIBE, b'{"channels": ["Missing"]}'))
+            frame_type, payload = decode_frame(await asyncio.wait_for(ws.receive_bytes(), 1.0))
+            assert frame_type == FRAME_ERROR and b'Unknown channels' in payload
@@ -0,0 +1,106 @@
+import mmap
+import struct
+
+import pytest
+import pytest_asyncio
+
+from py_iracing.broadcast import FakeBroadcastBackend
+from py_iracing.client import iRacingClient
+from py_iracing.enums import BroadcastMsg, ReplaySearchMode
+from py_iracing.replay import ReplayScanner
+from tests.fakes import build_image
+
+VARIABLES = [('ReplayFrameNum', 'i', 1), ('ReplaySessionNum', 'i', 1), ('ReplaySessionTime', 'd', 1), ('CamCarIdx', 'i', 1),
+             ('ReplayPlaySpeed', 'i', 1), ('ReplayPlaySlowMotion', '?', 1)]
+INCIDENTS = [(600, 3), (1800, 7), (4000, 3)]
+LAPS = [(300, 0), (2000, 0), (3900, 0), (5500, 0)]
+
+
+class FakeReplaySim(FakeBroadcastBackend):
+    """Moves the replay position of a test file in response to replay searches."""
+
+    def __init__(self, path, start_frame=3000):
+        super().__init__()
+        self._file = open(path, 'r+b')
+        self.mem = mmap.mmap(self._file.fileno(), 0)
+        self._move(start_frame, 0)
+        self._play(2, True)
+
+    def _play(self, speed, slow_motion):
+        self.play_speed = (speed, slow_motion)
+        for i in range(3):
+            buf_offset = struct.unpack_from('<i', self.mem, 48 + i * 16 + 4)[0]
+            struct.pack_into('<i?', self.mem, buf_offset + 20, speed, slow_motion)
+
+    def _move(self, frame, car_idx):
+        self.frame = frame
+        for i in range(3):
+            buf_offset = struct.unpack_from('<i', self.mem, 48 + i * 16 + 4)[0]
+            struct.pack_into('<iidi', self.mem, buf_offset, frame, 0, frame / 60.0, car_idx)
+
+    def send(self, broadcast_type, var1=0, var2=0, var3=0):
+        result = super().send(broadcast_type, var1, var2, var3)
+        if broadcast_type == BroadcastMsg.replay_search:
+            if var1 == ReplaySearchMode.to_start:
+                self._move(0, 0)
+            else:
+                events = INCIDENTS if var1 == ReplaySearchMode.next_incident else LAPS
+                following = [event for event in events if event[0] > self.frame]
+                if following:
+                    self._move(*following[0])
+        elif broadcast_type == BroadcastMsg.replay_set_play_speed:
+            self._play(var1, bool(var2))
+        elif broadcast_type == BroadcastMsg.replay_search_session_time:
+            self._move(int(var2 / 1000 * 60), 0)
+        return result
+
+    def close(self):
+        self.mem.close()
+        self._file.close()
+
+
+@pytest_asyncio.fixture
+async def sim(tmp_path):
+    path = tmp_path / 'test.bin'
+    path.write_bytes(build_image(VARIABLES, [{}, {}, {}], tick_rate=1000))
+    sim = FakeReplaySim(path)
+    ir = iRacingClient(broadcast_backend=sim)
+    assert await ir.startup(test_file=str(path))
+    yield ir, sim
+    ir.shutdown()
+    sim.close()
+
+
+@pytest.mark.asyncio
+async def test_scan_indexes_incidents_and_laps(sim):
+    ir, backend = sim
+    index = await ReplayScanner(ir, settle_timeout=0.05).scan()
+
+    assert [(event.frame_num, event.car_idx) for event in index.incidents] == INCIDENTS
+    assert [event.frame_num for event in index.laps] == [frame for frame, _ in LAPS]
+    assert index.incidents[1].session_time == pytest.approx(30.0)
+    assert [event.kind for event in index.events][:3] == ['lap', 'incident', 'incident']
+    assert backend.frame == 3000
+    assert backend.play_speed == (2, True)
+
+
+@pytest.mark.asyncio
+async def test_scan_rejects_unknown_kinds(sim):
+    ir, _ = sim
+    with pytest.raises(ValueError):
+        await ReplayScanner(ir).scan(kinds=['overtake'])
+
+
+@pytest.mark.asyncio
+async def test_scan_restores_playback_when_it_fails(sim, monkeypatch):
+    ir, backend = sim
+    scanner = ReplayScanner(ir, settle_timeout=0.05)
+
+    async def fail(kind):
+        raise RuntimeError('lost the sim')
+
+    monkeypatch.setattr(scanner, '_scan_kind', fail)
+    with pytest.raises(RuntimeError):
+        await scanner.scan()
+    assert backend.play_speed == (2, True)
+    assert backend.frame == 3000
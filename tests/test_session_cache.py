@@ -0,0 +1,67 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from py_iracing.client import iRacingClient
+from py_iracing.session_cache import SessionInfoCache
+from py_iracing.yaml_parser import find_section
+from tests.fakes import write_image
+
+SESSION_INFO = (
+    '---\n'
+    'WeekendInfo:\n TrackName: spa\n TrackLength: 7.00 km\n\n'
+    'DriverInfo:\n DriverCarIdx: 0\n Drivers:\n - CarIdx: 0\n   UserName: O\'Brien "Jr"\n\n'
+    '...\n'
+)
+
+
+def test_find_section():
+    data = b'\x00' * 4 + SESSION_INFO.encode()
+    assert find_section(data, 0, len(data), 'WeekendInfo') == b'WeekendInfo:\n TrackName: spa\n TrackLength: 7.00 km'
+    assert find_section(data, 0, len(data), 'SplitTimeInfo') is None
+
+
+def test_cache_round_trip_and_lru_eviction(tmp_path):
+    cache = SessionInfoCache(str(tmp_path), max_bytes=250)
+    cache.put(b'a', {'value': 'a' * 80})
+    cache.put(b'b', {'value': 'b' * 80})
+    assert cache.get(b'a') == {'value': 'a' * 80}
+    cache.put(b'c', {'value': 'c' * 80})
+
+    assert cache.get(b'b') is None
+    assert cache.get(b'a') is not None
+    assert len(cache) == 2 and cache.size <= 250
+
+    reopened = SessionInfoCache(str(tmp_path), max_bytes=250)
+    assert reopened.get(b'c') == {'value': 'c' * 80}
+
+
+@pytest.mark.asyncio
+async def test_client_loads_unchanged_sections_from_cache(tmp_path):
+    test_file = write_image(tmp_path / 'test.bin', [('Speed', 'f', 1)], [{}, {}, {}], session_info=SESSION_INFO)
+    cache_dir = str(tmp_path / 'cache')
+
+    ir = iRacingClient(session_info_cache=SessionInfoCache(cache_dir))
+    assert await ir.startup(test_file=test_file)
+    assert (await ir.get('WeekendInfo'))['TrackName'] == 'spa'
+    assert (await ir.get('DriverInfo'))['Drivers'][0]['UserName'] == 'O\'Brien "Jr"'
+    ir.shutdown()
+
+    ir = iRacingClient(session_info_cache=SessionInfoCache(cache_dir))
+    assert await ir.startup(test_file=test_file)
+    get = SessionInfoCache.get
+    threads = []
+
+    def recording_get(cache, *args):
+        threads.append(threading.get_ident())
+        return get(cache, *args)
+
+    with patch('py_iracing.session_cache.parse_section') as parse_section, \
+            patch.object(SessionInfoCache, 'get', recording_get):
+        assert (await ir.get('WeekendInfo'))['TrackLength'] == '7.00 km'
+    parse_section.assert_not_called()
+    assert ir.session_info_cache.hits == 1
+    # The cache reads files, so it must not run on the event loop
+    assert threads and threading.get_ident() not in threads
+    ir.shutdown()
@@ -0,0 +1,47 @@
+import pytest
+
+from py_iracing.client import iRacingClient
+from py_iracing.snapshot import Snapshot
+from tests.fakes import write_image
+
+VARIABLES = [('SessionTime', 'd', 1), ('Speed', 'f', 1), ('OnPitRoad', '?', 1), ('CarIdxLap', 'i', 3)]
+RECORDS = [
+    {'SessionTime': 1.0, 'Speed': 10.0, 'OnPitRoad': True, 'CarIdxLap': [1, 2, 3]},
+    {'SessionTime': 3.0, 'Speed': 30.0, 'OnPitRoad': False, 'CarIdxLap': [3, 4, 5]},
+    {'SessionTime': 2.0, 'Speed': 20.0, 'OnPitRoad': False, 'CarIdxLap': [2, 3, 4]},
+]
+SESSION_INFO = '---\nWeekendInfo:\n TrackName: spa\n\nDriverInfo:\n DriverCarIdx: 2\n\n...\n'
+
+
+@pytest.mark.asyncio
+async def test_snapshot_round_trip(tmp_path):
+    ir = iRacingClient()
+    assert await ir.startup(test_file=write_image(tmp_path / 'test.bin', VARIABLES, RECORDS,
+                                                  session_info=SESSION_INFO, tick_counts=[1, 3, 2]))
+    try:
+        ir.freeze_var_buffer_now()
+        ir.save_snapshot(str(tmp_path / 'tick.snap'))
+        expected = {key: ir.read(key) for key in ir.var_headers_names}
+        # Without a frozen buffer the snapshot freezes its own copy of the latest tick
+        ir.unfreeze_var_buffer_latest()
+        unfrozen = ir.snapshot(session_info=False)
+    finally:
+        ir.shutdown()
+
+    snapshot = Snapshot.load(str(tmp_path / 'tick.snap'))
+    assert snapshot.tick_count == 3 and snapshot.tick_rate == 60
+    assert snapshot.to_dict() == expected
+    assert snapshot['CarIdxLap'] == [3, 4, 5]
+    assert snapshot.get('Missing') is None
+    assert snapshot.session_info('WeekendInfo')['TrackName'] == 'spa'
+    assert snapshot.session_info('DriverInfo')['DriverCarIdx'] == 2
+    assert snapshot.session_info_yaml == SESSION_INFO
+
+    bare = Snapshot(unfrozen)
+    assert bare.to_dict() == expected
+    assert bare.session_info('WeekendInfo') is None
+
+    with pytest.raises(ValueError):
+        Snapshot(b'not a snapshot at all, just text')
+    with pytest.raises(ValueError):
+        Snapshot(unfrozen[:-1])
@@ -0,0 +1,111 @@
+import asyncio
+import mmap
+import struct
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from py_iracing.client import iRacingClient
+from py_iracing.instrumentation import Instrumentation
+from py_iracing.supervisor import ConnectionSupervisor
+from tests.fakes import build_image
+
+VARIABLES = [('Speed', 'f', 1), ('Gear', 'i', 1)]
+
+
+class FakeSim:
+    """Writes ticks and connection status into a test file, and answers status checks over HTTP."""
+
+    def __init__(self, path):
+        self._file = open(path, 'r+b')
+        self.mem = mmap.mmap(self._file.fileno(), 0)
+        self.tick = 3
+        self.running = False
+
+    def write(self):
+        self.tick += 1
+        struct.pack_into('<i', self.mem, 48 + self.tick % 3 * 16, self.tick)
+
+    def set_status(self, status):
+        struct.pack_into('<i', self.mem, 4, status)
+
+    def rename(self, old, new):
+        start = self.mem.find(old)
+        self.mem[start:start + len(new)] = new
+
+    async def handle_status(self, request):
+        return web.Response(text=f'running:{int(self.running)}')
+
+    def close(self):
+        self.mem.close()
+        self._file.close()
+
+
+@pytest_asyncio.fixture
+async def sim(tmp_path):
+    path = tmp_path / 'test.bin'
+    path.write_bytes(build_image(VARIABLES, [{}, {}, {}]))
+    sim = FakeSim(path)
+    sim.path = str(path)
+    app = web.Application()
+    app.router.add_get('/get_sim_status', sim.handle_status)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    sim.url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/get_sim_status?object=simStatus'
+    yield sim
+    await runner.cleanup()
+    sim.close()
+
+
+async def _until(condition, sim=None):
+    for _ in range(200):
+        if condition():
+            return
+        if sim is not None:
+            sim.write()
+        await asyncio.sleep(0.01)
+    raise AssertionError('condition not reached')
+
+
+@pytest.mark.asyncio
+async def test_supervisor_reconnects(sim):
+    ir = iRacingClient()
+    instrumentation = Instrumentation()
+    supervisor = ConnectionSupervisor(ir, test_file=sim.path, status_url=sim.url, poll_interval=0.01,
+                                      stale_after=0.1, backoff_initial=0.01, backoff_max=0.02,
+                                      instrumentation=instrumentation)
+    events = []
+    supervisor.add_listener(events.append)
+    await supervisor.start()
+    try:
+        await _until(lambda: supervisor.metrics['attempts'] >= 2)
+        assert not supervisor.connected and not ir.is_initialized
+
+        sim.running = True
+        assert await supervisor.wait_connected(2.0)
+        var_headers = ir._var_headers
+
+        sim.set_status(0)
+        await _until(lambda: not supervisor.connected, sim)
+        sim.set_status(1)
+        await _until(lambda: supervisor.connected, sim)
+        assert ir._var_headers is var_headers
+
+        await _until(lambda: not supervisor.connected)
+        sim.rename(b'Gear', b'Fuel')
+        await _until(lambda: supervisor.connected, sim)
+        assert ir.var_headers_names == ['Speed', 'Fuel']
+    finally:
+        await supervisor.stop()
+        ir.shutdown()
+
+    assert [(event.kind, event.reason) for event in events] == [
+        ('connected', ''), ('disconnected', 'status'), ('connected', ''),
+        ('disconnected', 'stale'), ('layout_changed', ''), ('connected', '')]
+    assert events[0].downtime is None and events[2].downtime > 0
+    assert len(supervisor.reconnect_times) == 2 and supervisor.metrics['layout_changes'] == 1
+    assert instrumentation.snapshot()['latency']['reconnect']['count'] == 2
+    assert ir.http_session is None
@@ -0,0 +1,62 @@
+import pytest
+
+from py_iracing.ibt import IBT
+from py_iracing.timing import TimingEngine
+from tests.fakes import write_image
+
+np = pytest.importorskip('numpy')
+
+SPLIT_TIME_INFO = {'Sectors': [{'SectorNum': 0, 'SectorStartPct': 0.0}, {'SectorNum': 1, 'SectorStartPct': 0.3},
+                               {'SectorNum': 2, 'SectorStartPct': 0.6}]}
+SPEEDS = [1 / 20.0, 1 / 25.0, 1 / 30.0]
+
+
+def _positions(tick):
+    time = tick / 60.0
+    pct = [(0.9 + speed * time) % 1.0 for speed in SPEEDS]
+    if 1000 <= tick < 1100:
+        pct[2] = -1.0
+    return time, pct
+
+
+def test_laps_and_sectors_are_interpolated():
+    engine = TimingEngine.from_session_info(SPLIT_TIME_INFO, car_count=3, max_laps=2)
+    completed = []
+    for tick in range(60 * 95):
+        completed.extend(engine.update(*_positions(tick)).tolist())
+
+    assert engine.laps_completed.tolist() == [4, 3, 2]
+    assert completed.count(0) == 4
+    assert engine.lap_times(0) == pytest.approx([20.0] * 4)
+    assert engine.lap_times(1) == pytest.approx([25.0] * 3)
+    assert engine.best_lap_time[1] == pytest.approx(25.0)
+    assert engine.sector_times(0)[0] == pytest.approx([6.0, 6.0, 8.0])
+    assert engine.last_sector_times[1] == pytest.approx([7.5, 7.5, 10.0])
+    # Car 2 left the world during its first timed lap, so its timing restarts at the next crossing
+    assert engine.lap_times(2) == pytest.approx([30.0, 30.0])
+    assert engine.current_sector.tolist() == [2, 2, 0]
+
+
+def test_ibt_matches_live(tmp_path):
+    session_info = ('---\nSplitTimeInfo:\n Sectors:\n - SectorNum: 0\n   SectorStartPct: 0.000000\n'
+                    ' - SectorNum: 1\n   SectorStartPct: 0.300000\n - SectorNum: 2\n   SectorStartPct: 0.600000\n\n...\n')
+    rows = []
+    for tick in range(60 * 70):
+        time, pct = _positions(tick)
+        rows.append({'SessionTime': time, 'CarIdxLapDistPct': pct})
+    path = write_image(tmp_path / 'a.ibt', [('SessionTime', 'd', 1), ('CarIdxLapDistPct', 'f', 3)], rows,
+                       session_info=session_info, ibt=True)
+    ibt = IBT()
+    ibt.open(path)
+    try:
+        offline = TimingEngine.from_ibt(ibt, chunk_size=1000)
+    finally:
+        ibt.close()
+
+    live = TimingEngine.from_session_info(SPLIT_TIME_INFO, car_count=3)
+    for row in rows:
+        live.update(row['SessionTime'], np.float32(row['CarIdxLapDistPct']))
+    assert offline.laps_completed.tolist() == live.laps_completed.tolist() == [3, 2, 1]
+    for car in range(3):
+        assert offline.lap_times(car) == pytest.approx(live.lap_times(car))
+    assert offline.lap_times(0) == pytest.approx([20.0] * 3, abs=1e-3)
@@ -0,0 +1,49 @@
+import pytest
+
+from py_iracing.track import TrackIndex, parse_track_length
+
+np = pytest.importorskip('numpy')
+
+WEEKEND_INFO = {'TrackLength': '4.00 km'}
+SPLIT_TIME_INFO = {'Sectors': [{'SectorNum': 0, 'SectorStartPct': 0.0},
+                               {'SectorNum': 1, 'SectorStartPct': 0.4},
+                               {'SectorNum': 2, 'SectorStartPct': 0.7}]}
+
+
+@pytest.fixture
+def index():
+    index = TrackIndex.from_session_info(WEEKEND_INFO, SPLIT_TIME_INFO)
+    index.update([0.99, 0.005, 0.5, 0.52, -1.0, 0.98], [3, 3, 3, 3, -1, 1])
+    return index
+
+
+def test_parse_track_length():
+    assert parse_track_length('5.51 km') == pytest.approx(5510.0)
+    assert parse_track_length('1.00 mi') == pytest.approx(1609.344)
+    assert parse_track_length(None) is None
+
+
+def test_within_wraps_at_start_finish(index):
+    assert sorted(index.within(0, 100.0)) == [1, 5]
+    assert list(index.within(2, 100.0)) == [3]
+    assert len(index.within(4, 100.0)) == 0
+
+
+def test_nearest(index):
+    assert list(index.nearest(0, 2)) == [5, 1]
+    assert list(index.nearest(2, 10)) == [3, 5, 0, 1]
+    # The closest car behind is across start/finish
+    assert list(index.nearest(1, 1)) == [0]
+    assert len(index.nearest(4, 2)) == 0 and len(index.nearest(0, 0)) == 0
+
+
+def test_gaps_are_signed_metres(index):
+    gaps = index.gaps(0)
+    assert gaps[1] == pytest.approx(60.0)
+    assert gaps[5] == pytest.approx(-40.0)
+    assert np.isnan(gaps[4])
+
+
+def test_sectors(index):
+    assert list(index.sectors()) == [2, 0, 1, 1, -1, 2]
+    assert index.sector_of(3) == 1